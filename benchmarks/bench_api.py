@@ -0,0 +1,209 @@
+# benchmarks/bench_api.py
+#
+# Load test for the server mode. Starts serve_api.py on a scratch database
+# and a free localhost port, then runs client processes that each keep one
+# request in flight, in a front-desk mix: mostly patient lookups from a hot
+# set, list pages and free-slot searches, with some new patients,
+# appointments and bills. Reports requests per second, latency per request
+# type and the server's response cache hit rate. Fails if a request errored
+# or if the rows written do not match the writes that succeeded.
+#
+#   python -m benchmarks.bench_api [--clients 8] [--seconds 10] [--patients 100000]
+#
+# --cache-size 0 turns the response cache off for comparison.
+
+import argparse
+import datetime
+import multiprocessing
+import os
+import random
+import socket
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.common import create_scratch_db, insert_patients
+
+# (request type, weight)
+MIX = (
+    ("get patient", 55),
+    ("patient page", 15),
+    ("appointment page", 10),
+    ("free slots", 10),
+    ("add patient", 5),
+    ("book appointment", 3),
+    ("add bill", 2),
+)
+HOT_PATIENTS = 500
+# Pages near the top of the lists, where the windows open
+PAGE_STARTS = 50
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(path, port, readers):
+    from serve_api import main
+    main(["--db", path, "--port", str(port), "--readers", str(readers)])
+
+
+def client(url, index, doctors, patients, seconds, start_line, results):
+    from services.api_client import ApiClient, ApiError
+
+    # Every desk sees the same patients of the day
+    hot = random.Random(0).sample(range(1, patients + 1), HOT_PATIENTS)
+    rng = random.Random(index)
+    api = ApiClient(url)
+    names, weights = zip(*MIX)
+    doctor_id = index + 1
+    day = datetime.date(2030, 1, 7)
+    slot = 0
+    latencies = {name: [] for name in names}
+    errors = []
+    written = {"patients": 0, "appointments": 0, "bills": 0}
+    start_line.wait()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            if name == "get patient":
+                patient_id = rng.choice(hot) if rng.random() < 0.8 else rng.randint(1, patients)
+                api.get(f"/patients/{patient_id}")
+            elif name == "patient page":
+                api.get("/patients", after=rng.randrange(PAGE_STARTS) * 200, limit=200)
+            elif name == "appointment page":
+                api.get("/appointments", after=0, limit=200)
+            elif name == "free slots":
+                api.get(f"/doctors/{rng.randint(1, doctors)}/free-slots", start=f"{day} 08:00",
+                        end=(day + datetime.timedelta(days=6)).isoformat(), duration=30, limit=8)
+            elif name == "add patient":
+                api.request("POST", "/patients", body={
+                    "name": f"Load {index}-{written['patients']}", "age": 30, "gender": "F", "contact": "9800000000"
+                })
+                written["patients"] += 1
+            elif name == "book appointment":
+                # Every client books its own doctor, 15-minute slots in a row
+                start = datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(minutes=15 * slot)
+                slot += 1
+                api.request("POST", "/appointments", body={
+                    "patient_id": rng.choice(hot), "doctor_id": doctor_id, "date": start.strftime("%Y-%m-%d"),
+                    "time": start.strftime("%H:%M"), "purpose": "Checkup", "duration": 15
+                })
+                written["appointments"] += 1
+            else:
+                api.request("POST", "/bills", body={
+                    "patient_id": rng.choice(hot), "items": [["Consultation", 1, 500.0, 500.0]],
+                    "date": f"{day} 10:00:00"
+                })
+                written["bills"] += 1
+        except ApiError as error:
+            errors.append(f"{name}: {error}")
+            continue
+        latencies[name].append((time.perf_counter() - started) * 1000)
+    results.put((latencies, errors, written))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+def run(clients, seconds, patients, readers, cache_size):
+    from services.api_client import ApiClient, ApiError
+
+    if cache_size is not None:
+        # Read by services.api_server on import in the server process
+        os.environ["HMS_API_CACHE"] = str(cache_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "api.db")
+        conn = create_scratch_db(path)
+        insert_patients(conn, patients)
+        conn.executemany("INSERT INTO doctors (name, specialization) VALUES (?, ?)",
+                         ((f"Dr. {i}", "General Medicine") for i in range(clients)))
+        conn.commit()
+        conn.close()
+
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        context = multiprocessing.get_context("spawn")
+        server = context.Process(target=serve, args=(path, port, readers), daemon=True)
+        server.start()
+        api = ApiClient(url)
+        for _ in range(200):
+            try:
+                api.get("/status")
+                break
+            except ApiError:
+                time.sleep(0.05)
+
+        results = context.Queue()
+        # Clients start together once all of them have imported
+        start_line = context.Barrier(clients + 1)
+        workers = [context.Process(target=client, args=(url, i, clients, patients, seconds, start_line, results))
+                   for i in range(clients)]
+        for worker in workers:
+            worker.start()
+        start_line.wait()
+        started = time.perf_counter()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        status = api.get("/status")
+        server.terminate()
+        server.join()
+        conn = sqlite3.connect(path)
+        rows = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("patients", "appointments", "bills")}
+        conn.close()
+
+    latencies = {name: [] for name, _ in MIX}
+    errors = []
+    written = {"patients": 0, "appointments": 0, "bills": 0}
+    for worker_latencies, worker_errors, worker_written in outcomes:
+        for name, values in worker_latencies.items():
+            latencies[name].extend(values)
+        errors.extend(worker_errors)
+        for table, count in worker_written.items():
+            written[table] += count
+
+    every = [value for values in latencies.values() for value in values]
+    cache = status["cache"]
+    print(f"{clients} clients for {elapsed:.1f}s against {readers} readers, {patients:,} patients")
+    print(f"{len(every):,} requests, {len(every) / elapsed:,.0f} requests/s, "
+          f"p50={percentile(every, 0.5):.2f}ms p99={percentile(every, 0.99):.2f}ms")
+    print(f"{'request':18s} {'count':>8s} {'p50 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for name, values in latencies.items():
+        print(f"{name:18s} {len(values):8d} {percentile(values, 0.5):8.2f} {percentile(values, 0.99):8.2f} "
+              f"{max(values, default=float('nan')):8.2f}")
+    hit_rate = cache["hits"] / max(1, cache["hits"] + cache["misses"])
+    print(f"response cache: {cache['hits']:,} hits, {cache['misses']:,} misses ({hit_rate:.0%}), "
+          f"{cache['entries']} entries; {status['writes']} writes through the queue")
+    print(f"{len(errors)} errors")
+    for error in sorted(set(errors))[:5]:
+        print(f"  {errors.count(error)} x {error}")
+    rows["patients"] -= patients
+    print(f"rows written: {rows}, writes acknowledged: {written}")
+    return not errors and rows == written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the JSON API server")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--patients", type=int, default=100000, help="patients already in the database")
+    parser.add_argument("--readers", type=int, default=4, help="server read connections")
+    parser.add_argument("--cache-size", type=int, help="override HMS_API_CACHE (0 turns the cache off)")
+    args = parser.parse_args()
+    if not run(args.clients, args.seconds, args.patients, args.readers, args.cache_size):
+        print("FAIL: requests failed or written rows are missing")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_availability.py
+#
+# Times the availability engine on a generated database with two years of
+# appointment history: "first free slot for any cardiologist this week",
+# cold (empty cache) and warm, and the next free slots for one doctor.
+#
+#   python -m benchmarks.bench_availability [--patients 100000]
+
+import argparse
+import datetime
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.generate_data import create
+from database.connection import Database
+from services.availability import AvailabilityEngine
+
+# A week inside the generated history (2024-01-01 .. 2025-12-31)
+WEEK_START = datetime.datetime(2025, 6, 2, 9, 0)
+
+
+def timed_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def run(patients, specialization, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "availability.db")
+        counts = create(path, patients)
+        db = Database(path)
+        engine = AvailabilityEngine(db)
+        week_end = WEEK_START.date() + datetime.timedelta(days=6)
+        doctors = engine.doctors.ids_by_specialization(specialization)
+        print(f"{counts['appointments']} appointments, {counts['doctors']} doctors, "
+              f"{len(doctors)} in {specialization}")
+
+        def cold():
+            engine.clear()
+            return engine.first_free_by_specialization(specialization, WEEK_START, week_end, 30)
+
+        def warm():
+            return engine.first_free_by_specialization(specialization, WEEK_START, week_end, 30)
+
+        found, cold_ms = timed_ms(cold, repeat)
+        _, warm_ms = timed_ms(warm, repeat * 10)
+        print(f"first free {specialization} slot this week: {found}")
+        print(f"  cold cache: {cold_ms:7.3f} ms   warm cache: {warm_ms:7.3f} ms")
+
+        doctor_id = doctors[0] if doctors else 1
+        engine.clear()
+        slots, slots_ms = timed_ms(
+            lambda: engine.free_slots(doctor_id, WEEK_START, WEEK_START.date() + datetime.timedelta(days=14), 30, 8),
+            repeat * 10
+        )
+        print(f"next 8 free slots for doctor {doctor_id}: {slots_ms:7.3f} ms  "
+              f"(first {slots[0] if slots else None})")
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=100000)
+    parser.add_argument("--specialization", default="Cardiology")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.patients, args.specialization, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_booking.py
+#
+# Books appointments at random slots through AppointmentRepository.add and
+# reports booking latency, how many requests were rejected as overlapping,
+# and whether the conflict check slows down as the history grows. Finishes
+# by verifying that no doctor ended up with overlapping appointments.
+#
+#   python -m benchmarks.bench_booking [--bookings 100000] [--doctors 50]
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import create_scratch_db, insert_patients
+from database.connection import Database
+from database.repository import AppointmentConflict, AppointmentRepository
+
+DURATIONS = [15, 30, 45, 60]
+FIRST_SLOT = 8 * 60
+LAST_SLOT = 18 * 60
+
+
+def build_db(path, doctors, patients):
+    conn = create_scratch_db(path)
+    insert_patients(conn, patients)
+    conn.executemany(
+        "INSERT INTO doctors (name, specialization) VALUES (?, ?)",
+        ((f"Dr. {i}", "General Medicine") for i in range(doctors))
+    )
+    conn.commit()
+    conn.close()
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return (f"mean={statistics.fmean(samples):7.1f}us  p50={samples[len(samples) // 2]:7.1f}us  "
+            f"p99={samples[int(len(samples) * 0.99) - 1]:7.1f}us")
+
+
+def overlapping_pairs(db):
+    return db.fetch_one("""
+        SELECT COUNT(*) FROM (
+            SELECT start_at, LAG(end_at) OVER (PARTITION BY doctor_id ORDER BY start_at) AS previous_end
+            FROM appointments
+        ) WHERE previous_end > start_at
+    """)[0]
+
+
+def run(bookings, doctors, patients, seed):
+    rng = random.Random(seed)
+    first_day = datetime.date(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "booking.db")
+        build_db(path, doctors, patients)
+        db = Database(path)
+        repo = AppointmentRepository(db)
+
+        booked = rejected = 0
+        samples = []
+        started = time.perf_counter()
+        for _ in range(bookings):
+            day = first_day + datetime.timedelta(days=rng.randrange(365))
+            minute = rng.randrange(FIRST_SLOT, LAST_SLOT, 15)
+            start = time.perf_counter()
+            try:
+                repo.add(rng.randint(1, patients), rng.randint(1, doctors), day.isoformat(),
+                         f"{minute // 60:02d}:{minute % 60:02d}", "Checkup", rng.choice(DURATIONS))
+                booked += 1
+            except AppointmentConflict:
+                rejected += 1
+            samples.append((time.perf_counter() - start) * 1e6)
+        elapsed = time.perf_counter() - started
+
+        print(f"{bookings} booking requests for {doctors} doctors in {elapsed:.1f}s "
+              f"({bookings / elapsed:,.0f}/s): {booked} booked, {rejected} rejected as overlapping")
+        print(f"  first 1000 requests: {summary(samples[:1000])}")
+        print(f"  last 1000 requests:  {summary(samples[-1000:])}")
+        print(f"  all requests:        {summary(samples)}")
+
+        # The check alone, against the full history of a busy doctor
+        day = first_day + datetime.timedelta(days=180)
+        check_start = datetime.datetime.combine(day, datetime.time(10, 0))
+        check_end = check_start + datetime.timedelta(minutes=30)
+        check = []
+        for _ in range(2000):
+            start = time.perf_counter()
+            repo.find_conflict(1, check_start, check_end)
+            check.append((time.perf_counter() - start) * 1e6)
+        print(f"  conflict check only: {summary(check)}")
+
+        overlaps = overlapping_pairs(db)
+        print(f"  overlapping appointments after the run: {overlaps}")
+        db.close()
+        return overlaps
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if run(args.bookings, args.doctors, args.patients, args.seed):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
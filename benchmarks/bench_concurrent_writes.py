@@ -0,0 +1,183 @@
+# benchmarks/bench_concurrent_writes.py
+#
+# Several front-desk processes share one database file and save as fast as
+# they can through the repositories: a new patient, an appointment for it and
+# a bill, the same writes the patient, appointment and billing windows make.
+# A reader process keeps paging through patients meanwhile. Reports write
+# throughput and latency, how often BEGIN IMMEDIATE had to be retried, and
+# the slowest read. Fails if a save raised, or if any row a save reported as
+# committed is missing afterwards.
+#
+#   python -m benchmarks.bench_concurrent_writes [--workstations 4] [--writes 250]
+#
+# --busy-timeout-ms 0 and --retries 0 switch the concurrency layer off, to
+# see the "database is locked" errors it prevents.
+
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import create_scratch_db, insert_patients
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float("nan")
+
+
+def workstation(path, doctor_id, writes, day, results):
+    # Imported here so the settings the parent put in the environment apply
+    from database.connection import BUSY_TIMEOUT_MS, WRITE_RETRIES, Database
+    from database.repository import AppointmentRepository, BillItem, BillRepository, PatientRepository
+
+    db = Database(path)
+    patients = PatientRepository(db)
+    appointments = AppointmentRepository(db)
+    bills = BillRepository(db)
+    saved = {"patients": [], "appointments": [], "bills": []}
+    latencies = []
+    errors = []
+    for i in range(writes):
+        started = time.perf_counter()
+        try:
+            patient = patients.add(f"Walk-in {doctor_id}-{i}", 30, "F", "9800000000")
+            saved["patients"].append(patient.id)
+            # Five-minute slots from midnight never overlap for one doctor
+            minutes = i * 5
+            appointment = appointments.add(patient.id, doctor_id, day, f"{minutes // 60:02d}:{minutes % 60:02d}",
+                                           "Checkup", 5)
+            saved["appointments"].append(appointment.id)
+            bill_id = bills.add(patient.id, [BillItem("Consultation", 1, 500.0, 500.0)], f"{day} 10:00:00")
+            saved["bills"].append(bill_id)
+        except Exception as error:
+            errors.append(str(error))
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    results.put((saved, latencies, errors, db.write_retries, (BUSY_TIMEOUT_MS, WRITE_RETRIES)))
+    db.close()
+
+
+def reader(path, stop, results):
+    from database.connection import Database
+    from database.repository import PatientRepository
+
+    db = Database(path)
+    patients = PatientRepository(db)
+    latencies = []
+    errors = 0
+    after_id = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            page = patients.page(after_id, 100)
+        except Exception:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+        after_id = page[-1].id if page else 0
+    results.put((latencies, errors))
+    db.close()
+
+
+def missing_rows(db, table, ids):
+    found = 0
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        found += db.fetch_one(
+            f"SELECT COUNT(*) FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+        )[0]
+    return len(ids) - found
+
+
+def run(workstations, writes, patients):
+    from database.connection import Database
+
+    day = datetime.date.today().isoformat()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "concurrent.db")
+        conn = create_scratch_db(path)
+        insert_patients(conn, patients)
+        conn.executemany("INSERT INTO doctors (name, specialization) VALUES (?, ?)",
+                         ((f"Dr. {i}", "General Medicine") for i in range(workstations)))
+        conn.commit()
+        conn.close()
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        reads = context.Queue()
+        stop = context.Event()
+        read_process = context.Process(target=reader, args=(path, stop, reads))
+        read_process.start()
+        workers = [context.Process(target=workstation, args=(path, i + 1, writes, day, results))
+                   for i in range(workstations)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        stop.set()
+        read_latencies, read_errors = reads.get()
+        read_process.join()
+
+        saved = {"patients": [], "appointments": [], "bills": []}
+        latencies, errors, retries = [], [], 0
+        for worker_saved, worker_latencies, worker_errors, worker_retries, settings in outcomes:
+            for table, ids in worker_saved.items():
+                saved[table].extend(ids)
+            latencies.extend(worker_latencies)
+            errors.extend(worker_errors)
+            retries += worker_retries
+
+        db = Database(path)
+        lost = {table: missing_rows(db, table, ids) for table, ids in saved.items()}
+        totals = {table: db.fetch_one(f"SELECT COUNT(*) FROM {table}")[0] for table in saved}
+        db.close()
+
+    committed = sum(len(ids) for ids in saved.values())
+    busy_timeout_ms, write_retries = settings
+    print(f"busy_timeout={busy_timeout_ms}ms retries={write_retries}: {workstations} workstations x {writes} saves "
+          f"(patient + appointment + bill)")
+    print(f"{committed} writes committed in {elapsed:.1f}s ({committed / elapsed:,.0f} writes/s), "
+          f"save latency p50={percentile(latencies, 0.5):.1f}ms p99={percentile(latencies, 0.99):.1f}ms "
+          f"max={max(latencies, default=float('nan')):.1f}ms")
+    print(f"BEGIN IMMEDIATE retried {retries} times; {len(errors)} saves failed")
+    for error in sorted(set(errors))[:5]:
+        print(f"  {errors.count(error)} x {error}")
+    print(f"reader: {len(read_latencies)} pages, {read_errors} failed, p99={percentile(read_latencies, 0.99):.2f}ms "
+          f"max={max(read_latencies, default=float('nan')):.2f}ms")
+    print(f"rows: patients={totals['patients']} (base {patients}) appointments={totals['appointments']} "
+          f"bills={totals['bills']}; missing after commit: {sum(lost.values())}")
+    extra = {
+        "patients": totals["patients"] - patients - len(saved["patients"]),
+        "appointments": totals["appointments"] - len(saved["appointments"]),
+        "bills": totals["bills"] - len(saved["bills"]),
+    }
+    return not errors and not read_errors and not any(lost.values()) and not any(extra.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent writes from several processes")
+    parser.add_argument("--workstations", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=250, help="saves per workstation (at most 288)")
+    parser.add_argument("--patients", type=int, default=10000, help="patients already in the database")
+    parser.add_argument("--busy-timeout-ms", type=int, help="override HMS_BUSY_TIMEOUT_MS")
+    parser.add_argument("--retries", type=int, help="override HMS_WRITE_RETRIES")
+    args = parser.parse_args()
+    # Read by database.connection on import, in this process and the spawned ones
+    if args.busy_timeout_ms is not None:
+        os.environ["HMS_BUSY_TIMEOUT_MS"] = str(args.busy_timeout_ms)
+    if args.retries is not None:
+        os.environ["HMS_WRITE_RETRIES"] = str(args.retries)
+    if not run(args.workstations, min(args.writes, 288), args.patients):
+        print("FAIL: saves failed or committed rows are missing")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_dashboard_counters.py
+#
+# Several clerk processes add patients, book appointments for today and
+# issue bills through the repositories while this process runs the
+# dashboard's live counters with a Qt event loop (offscreen). Reports how
+# often the snapshot was re-read and what a read cost, the worst GUI event
+# loop stall, and how long the counters lagged behind the last commit. Fails
+# if the final numbers differ from COUNT(*) over the base tables.
+#
+#   python -m benchmarks.bench_dashboard_counters [--clerks 4] [--writes 200] [--patients 100000]
+
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.common import create_scratch_db, insert_patients
+from database.connection import Database
+from database.repository import AppointmentRepository, BillItem, BillRepository, PatientRepository
+from services.live_counters import LiveCounters
+
+HEARTBEAT_MS = 10
+
+
+def clerk(path, doctor_id, writes, day):
+    db = Database(path)
+    patients = PatientRepository(db)
+    appointments = AppointmentRepository(db)
+    bills = BillRepository(db)
+    for i in range(writes):
+        patient = patients.add(f"Walk-in {doctor_id}-{i}", 30, "F", "9800000000")
+        # Five-minute slots from midnight never overlap for one doctor
+        minutes = i * 5
+        appointments.add(patient.id, doctor_id, day, f"{minutes // 60:02d}:{minutes % 60:02d}", "Checkup", 5)
+        bills.add(patient.id, [BillItem("Consultation", 1, 500.0, 500.0)], f"{day} 10:00:00")
+    db.close()
+
+
+def truth(db, day):
+    return (
+        db.fetch_one("SELECT COUNT(*) FROM patients")[0],
+        db.fetch_one("SELECT COUNT(*) FROM appointments WHERE date = ?", (day,))[0],
+        db.fetch_one("SELECT COUNT(*), COALESCE(SUM(total), 0) FROM bills WHERE date >= ?", (day,)),
+    )
+
+
+def run(clerks, writes, patients):
+    app = QApplication.instance() or QApplication(sys.argv)
+    day = datetime.date.today().isoformat()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "counters.db")
+        conn = create_scratch_db(path)
+        insert_patients(conn, patients)
+        conn.executemany("INSERT INTO doctors (name, specialization) VALUES (?, ?)",
+                         ((f"Dr. {i}", "General Medicine") for i in range(clerks)))
+        conn.commit()
+        conn.close()
+
+        db = Database(path)
+        counters = LiveCounters(db)
+        snapshots = []
+        counters.updated.connect(lambda snapshot: snapshots.append((time.perf_counter(), snapshot)))
+        beats = []
+        heartbeat = QTimer()
+        heartbeat.timeout.connect(lambda: beats.append(time.perf_counter()))
+        heartbeat.start(HEARTBEAT_MS)
+        counters.start()
+
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=clerk, args=(path, i + 1, writes, day)) for i in range(clerks)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        while any(worker.is_alive() for worker in workers):
+            app.processEvents()
+            time.sleep(0.002)
+        finished = time.perf_counter()
+        # Let the last commit reach the counters
+        expected_patients = patients + clerks * writes
+        while time.perf_counter() - finished < 5 and (
+                not snapshots or snapshots[-1][1].patients != expected_patients):
+            app.processEvents()
+            time.sleep(0.002)
+        lag = (snapshots[-1][0] - finished) * 1000 if snapshots else float("nan")
+        counters.stop()
+        heartbeat.stop()
+
+        final = snapshots[-1][1]
+        patients_total, appointments_today, (bills_today, revenue_today) = truth(db, day)
+        db.close()
+
+    gaps = [b - a for a, b in zip(beats, beats[1:])]
+    read_ms = sorted(snapshot.read_ms for _, snapshot in snapshots)
+    elapsed = finished - started
+    print(f"{clerks} clerks x {writes} saves (patient + appointment + bill) in {elapsed:.1f}s "
+          f"({clerks * writes * 3 / elapsed:,.0f} writes/s)")
+    print(f"snapshots read: {len(snapshots)}, read time p50={read_ms[len(read_ms) // 2]:.2f}ms "
+          f"max={read_ms[-1]:.2f}ms")
+    print(f"worst GUI stall: {max(gaps) * 1000 - HEARTBEAT_MS:.1f}ms, counters caught up {lag:.0f}ms "
+          f"after the last save")
+    print(f"counters: patients={final.patients} appointments_today={final.appointments_today} "
+          f"bills_today={final.bills_today} revenue_today={final.revenue_today:.2f}")
+    print(f"COUNT(*): patients={patients_total} appointments_today={appointments_today} "
+          f"bills_today={bills_today} revenue_today={revenue_today:.2f}")
+    return (final.patients, final.appointments_today, final.bills_today, round(final.revenue_today, 2)) == (
+        patients_total, appointments_today, bills_today, round(revenue_today, 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard counters under concurrent writers")
+    parser.add_argument("--clerks", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200, help="saves per clerk (at most 288)")
+    parser.add_argument("--patients", type=int, default=100000, help="patients already in the database")
+    args = parser.parse_args()
+    if not run(args.clerks, min(args.writes, 288), args.patients):
+        print("FAIL: counters do not match the tables")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
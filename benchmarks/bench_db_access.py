@@ -0,0 +1,102 @@
+# benchmarks/bench_db_access.py
+#
+# Compares per-operation latency of the old connect-per-call pattern used by
+# the windows against the shared, tuned connection in database.connection,
+# and reads of a small working set through the shared record cache.
+#
+#   python -m benchmarks.bench_db_access [--rows 50000] [--ops 2000]
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import create_scratch_db, insert_patients
+from database.connection import Database
+from database.repository import PatientRepository
+
+
+def build_db(path, rows):
+    conn = create_scratch_db(path)
+    insert_patients(conn, rows)
+    conn.close()
+
+
+def timed(fn, ops):
+    samples = []
+    for _ in range(ops):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[int(len(samples) * 0.99) - 1],
+    }
+
+
+def run(rows, ops):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, rows)
+        ids = [random.randint(1, rows) for _ in range(ops)]
+        it_old, it_new = iter(ids), iter(ids)
+        # The handful of patients a front desk keeps looking at
+        hot = [random.randint(1, rows) for _ in range(50)]
+
+        def per_call_read():
+            conn = sqlite3.connect(path)
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name, age, contact FROM patients WHERE id=?", (next(it_old),))
+            cursor.fetchone()
+            conn.close()
+
+        db = Database(path)
+        repo = PatientRepository(db)
+
+        def shared_read():
+            repo.load(next(it_new))
+
+        def cached_read():
+            repo.get(random.choice(hot))
+
+        def per_call_write():
+            conn = sqlite3.connect(path)
+            cursor = conn.cursor()
+            cursor.execute("UPDATE patients SET contact=? WHERE id=?", ("0", random.randint(1, rows)))
+            conn.commit()
+            conn.close()
+
+        def shared_write():
+            repo.update(random.randint(1, rows), "Patient", 30, "F", "0")
+
+        results = {
+            "read / connect-per-call": timed(per_call_read, ops),
+            "read / shared connection": timed(shared_read, ops),
+            "read / record cache": timed(cached_read, ops),
+            "write / connect-per-call": timed(per_call_write, ops // 4),
+            "write / shared connection": timed(shared_write, ops // 4),
+        }
+        cache = db.records.stats()
+        print(f"record cache: {cache.hits} hits, {cache.misses} misses, {cache.evictions} evictions")
+        db.close()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"patients={args.rows} ops={args.ops}")
+    for name, stats in run(args.rows, args.ops).items():
+        print(f"{name:28s} mean={stats['mean_us']:9.1f}us  p50={stats['p50_us']:9.1f}us  p99={stats['p99_us']:9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_export.py
+#
+# Exports appointments, joined with patient and doctor names, from a scratch
+# database through services.exporter and samples the process's memory after
+# every chunk. The export streams, so the only memory that may grow is
+# SQLite's own page cache, which stops at the connection's cache_size; the
+# run fails if the process grows past that bound, whatever the row count.
+#
+#   python -m benchmarks.bench_export [--rows 10000000] [--format csv|jsonl] [--gzip]
+#
+# Memory is RssAnon (heap and page cache). Database pages read through
+# SQLite's mmap are file-backed and shared, so they are reported apart; once
+# the file is larger than mmap_size, reads move to the page cache instead.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import create_scratch_db, insert_patients
+from database.connection import Database
+from services.exporter import FORMATS, Exporter
+
+# Allowed RssAnon growth during the export on top of a full page cache
+MAX_GROWTH_MB = 32
+
+
+def rss_mb():
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                name, kb, _ = line.split()
+                values[name[:-1]] = int(kb) / 1024
+    return values.get("RssAnon", 0.0), values.get("RssFile", 0.0)
+
+
+def build_db(path, rows, patients, doctors):
+    conn = create_scratch_db(path)
+    insert_patients(conn, patients)
+    conn.executemany("INSERT INTO doctors (name, specialization) VALUES (?, ?)",
+                     ((f"Dr. {i}", "General Medicine") for i in range(doctors)))
+    # The export reads appointments through idx_appointments_date only;
+    # dropping the others makes a 10M-row table quick to build
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                "AND tbl_name = 'appointments' AND sql IS NOT NULL "
+                                "AND name != 'idx_appointments_date'").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("""
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO appointments (patient_id, doctor_id, date, time, duration, purpose)
+        SELECT i % ? + 1, i % ? + 1,
+               date('2020-01-01', '+' || (i / 5000) || ' days'),
+               printf('%02d:%02d', 9 + i % 32 / 4, i % 4 * 15),
+               15, 'Checkup'
+        FROM n
+    """, (rows, patients, doctors))
+    conn.commit()
+    conn.close()
+
+
+def run(rows, fmt, compress, chunk_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.db")
+        start = time.perf_counter()
+        build_db(path, rows, patients=100000, doctors=200)
+        print(f"built {rows:,} appointments in {time.perf_counter() - start:.1f}s")
+
+        samples = []
+
+        def progress(dataset, done):
+            samples.append((done, *rss_mb()))
+
+        out = os.path.join(tmp, f"appointments.{fmt}" + (".gz" if compress else ""))
+        db = Database(path)
+        exporter = Exporter(db, chunk_size=chunk_size, progress=progress)
+        cache_size = db.fetch_one("PRAGMA cache_size")[0]
+        page_size = db.fetch_one("PRAGMA page_size")[0]
+        # Negative cache sizes are in KiB, positive ones in pages
+        cache_mb = (-cache_size * 1024 if cache_size < 0 else cache_size * page_size) / 2 ** 20
+        before = rss_mb()
+        result = exporter.run("appointments", out, fmt)
+        size_mb = os.path.getsize(out) / 2 ** 20
+
+    rate = result.rows / result.elapsed if result.elapsed else 0.0
+    print(f"exported {result.rows:,} rows to {fmt}{' (gzip)' if compress else ''} in {result.elapsed:.1f}s "
+          f"({rate:,.0f} rows/s, {size_mb:,.0f} MB)")
+    print(f"{'rows':>12}{'RssAnon MB':>12}{'RssFile MB':>12}")
+    print(f"{'start':>12}{before[0]:>12.1f}{before[1]:>12.1f}")
+    for fraction in (0.01, 0.1, 0.25, 0.5, 0.75, 1.0):
+        done, anon, file_backed = samples[min(len(samples) - 1, int(len(samples) * fraction))]
+        print(f"{done:>12,}{anon:>12.1f}{file_backed:>12.1f}")
+
+    growth = max(anon for _, anon, _ in samples) - before[0]
+    limit = cache_mb + MAX_GROWTH_MB
+    print(f"RssAnon growth: {growth:.1f} MB (limit {limit:.0f} MB: {cache_mb:.0f} MB page cache "
+          f"+ {MAX_GROWTH_MB} MB)")
+    return growth, limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming export memory and throughput")
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    growth, limit = run(args.rows, args.format, args.gzip, args.chunk_size)
+    if growth > limit:
+        print("FAIL: memory grows with the number of rows exported")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_import.py
+#
+# Writes seeded patient, doctor and appointment CSV files, imports them into a
+# scratch database through CsvImporter and reports rows/s per entity. A few
+# invalid and overlapping rows are mixed in so the reject path is exercised;
+# the run fails if their count does not come out as expected.
+#
+#   python -m benchmarks.bench_import [--rows 200000] [--doctors 500]
+
+import argparse
+import csv
+import datetime
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.common import FIRST_NAMES, LAST_NAMES, create_scratch_db
+from database.connection import Database
+from services.importer import CsvImporter
+
+# Rows per entity the import is expected to sustain on a typical laptop
+TARGET_ROWS_PER_SECOND = 100000
+BAD_ROWS = 100
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def patient_rows(rng, count):
+    for i in range(count):
+        age = "old" if i % (count // BAD_ROWS) == 1 else rng.randint(0, 95)
+        yield (f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+               age, rng.choice("MF"), f"98{rng.randint(0, 99999999):08d}")
+
+
+def doctor_rows(count):
+    for i in range(count):
+        yield (f"Dr. Import {i}", "General Medicine", f"doctor{i}@example.com", f"97{i:08d}")
+
+
+def slot_time(slot, slots_per_day=20):
+    # Each doctor's day is cut into 30-minute slots from 08:00
+    day = datetime.date(2025, 1, 1) + datetime.timedelta(days=slot // slots_per_day)
+    minutes = 8 * 60 + (slot % slots_per_day) * 30
+    return day.isoformat(), f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def appointment_rows(rng, count, patients, doctors):
+    # Slots are handed out in order, so only the deliberate repeats overlap.
+    # `patients` is the number imported, so every patient id resolves.
+    for i in range(count):
+        slot = i // doctors
+        if i % (count // BAD_ROWS) == 1:
+            # Takes the doctor's neighbouring slot; one of the two is rejected
+            slot = slot - 1 if slot else slot + 1
+        date, time = slot_time(slot)
+        yield [rng.randint(1, patients), i % doctors + 1, date, time, 30, "Checkup"]
+
+
+def run(rows, doctors, seed):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {
+            "patients": os.path.join(tmp, "patients.csv"),
+            "doctors": os.path.join(tmp, "doctors.csv"),
+            "appointments": os.path.join(tmp, "appointments.csv"),
+        }
+        write_csv(files["patients"], ["name", "age", "gender", "contact"], patient_rows(rng, rows))
+        write_csv(files["doctors"], ["name", "specialization", "email", "contact"], doctor_rows(doctors))
+        write_csv(files["appointments"], ["patient_id", "doctor_id", "date", "time", "duration", "purpose"],
+                  appointment_rows(rng, rows, rows - BAD_ROWS, doctors))
+
+        path = os.path.join(tmp, "import.db")
+        create_scratch_db(path).close()
+        importer = CsvImporter(Database(path))
+        print(f"{'entity':<14}{'rows':>10}{'imported':>10}{'rejected':>10}{'seconds':>9}{'rows/s':>10}")
+        rejected = 0
+        for entity, csv_path in files.items():
+            result = importer.run(entity, csv_path)
+            rate = result.read / result.elapsed if result.elapsed else 0.0
+            print(f"{entity:<14}{result.read:>10}{result.imported:>10}{result.rejected:>10}"
+                  f"{result.elapsed:>9.2f}{rate:>10,.0f}")
+            rejected += result.rejected
+        print(f"target: {TARGET_ROWS_PER_SECOND:,} rows/s per entity on a typical laptop")
+    return rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV import throughput")
+    parser.add_argument("--rows", type=int, default=200000, help="patients and appointments to import")
+    parser.add_argument("--doctors", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    if args.rows < BAD_ROWS * 10:
+        parser.error(f"--rows must be at least {BAD_ROWS * 10}")
+    rejected = run(args.rows, args.doctors, args.seed)
+    expected = BAD_ROWS * 2
+    if rejected != expected:
+        print(f"FAIL: {rejected} rows rejected, expected {expected}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_invoice_queue.py
+#
+# Queues a burst of invoices and reports PDF throughput plus how long the GUI
+# thread stalls per invoice, against rendering inline in the click handler.
+#
+#   python -m benchmarks.bench_invoice_queue [--bills 300]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.common import create_scratch_db, insert_patients
+from database.connection import Database, set_database
+from database.repository import BillItem, BillRepository
+from services.invoices import InvoiceRenderQueue, render_invoice
+
+
+def seed_bills(count):
+    bills = BillRepository()
+    items = [BillItem(f"Service {i}", 1 + i % 3, 100.0 + i, (1 + i % 3) * (100.0 + i)) for i in range(8)]
+    return [bills.add(1 + i % 100, items, "2026-01-01 10:00:00") for i in range(count)]
+
+
+def heartbeat_gaps(app, work):
+    gaps = []
+    last = [time.perf_counter()]
+
+    def beat():
+        now = time.perf_counter()
+        gaps.append((now - last[0]) * 1000)
+        last[0] = now
+
+    timer = QTimer()
+    timer.setTimerType(Qt.PreciseTimer)
+    timer.timeout.connect(beat)
+    timer.start(16)
+    elapsed = work()
+    timer.stop()
+    return elapsed, max(gaps[1:], default=0.0)
+
+
+def inline(app, bill_ids, output_dir):
+    def work():
+        start = time.perf_counter()
+        for bill_id in bill_ids:
+            render_invoice(bill_id, output_dir)
+            app.processEvents()
+        return time.perf_counter() - start
+    return heartbeat_gaps(app, work)
+
+
+def queued(app, bill_ids, output_dir, enqueue_times):
+    queue = InvoiceRenderQueue(output_dir)
+    done = []
+    queue.rendered.connect(lambda bill_id, path: done.append(bill_id))
+    queue.failed.connect(lambda bill_id, error: done.append(bill_id))
+
+    # Warm up so worker process start-up is not counted as throughput
+    queue.submit(bill_ids[0])
+    while not done:
+        app.processEvents()
+    done.clear()
+
+    def work():
+        start = time.perf_counter()
+        for bill_id in bill_ids:
+            t = time.perf_counter()
+            queue.submit(bill_id)
+            enqueue_times.append((time.perf_counter() - t) * 1000)
+            app.processEvents()
+        while len(done) < len(bill_ids):
+            app.processEvents()
+        return time.perf_counter() - start
+    return heartbeat_gaps(app, work)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bills", type=int, default=300)
+    parser.add_argument("--inline-bills", type=int, default=30)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = create_scratch_db(os.path.join(tmp, "bench.db"))
+        insert_patients(conn, 100)
+        conn.close()
+        db = set_database(Database(os.path.join(tmp, "bench.db")))
+        bill_ids = seed_bills(args.bills)
+
+        elapsed, worst = inline(app, bill_ids[:args.inline_bills], os.path.join(tmp, "inline"))
+        per_invoice = elapsed * 1000 / args.inline_bills
+        print(f"inline  {args.inline_bills / elapsed:7.1f} invoices/s  GUI stall/invoice={per_invoice:6.1f}ms  "
+              f"worst frame gap={worst:6.1f}ms")
+
+        enqueue_times = []
+        elapsed, worst = queued(app, bill_ids, os.path.join(tmp, "queued"), enqueue_times)
+        enqueue_times.sort()
+        print(f"queued  {args.bills / elapsed:7.1f} invoices/s  GUI stall/invoice={enqueue_times[len(enqueue_times) // 2]:6.3f}ms "
+              f"(max {enqueue_times[-1]:.3f}ms)  worst frame gap={worst:6.1f}ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
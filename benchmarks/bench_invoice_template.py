@@ -0,0 +1,107 @@
+# benchmarks/bench_invoice_template.py
+#
+# Per-invoice cost of building and printing the invoice document: the old
+# inline f-string + fresh QTextDocument against the prepared templates with
+# a reusable document and in-memory logo.
+#
+#   python -m benchmarks.bench_invoice_template [--invoices 200] [--lines 10]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtGui import QGuiApplication, QTextDocument
+from PyQt5.QtPrintSupport import QPrinter
+
+from database.repository import BillItem
+from services.invoice_templates import InvoiceRenderer, get_logo_path, get_template
+
+
+def legacy_html(patient_info, items, total, date):
+    # The f-string generate_pdf_bill used to build for every invoice
+    logo_path = get_logo_path()
+    services_html = "".join([f"<tr><td>{s}</td><td>{q}</td><td>₹{p:.2f}</td><td>₹{l:.2f}</td></tr>" for s, q, p, l in items])
+    return f"""
+    <html>
+    <head><style>
+    body {{ color: black; font-family: Arial, sans-serif; }}
+    table {{ border-collapse: collapse; width: 100%; color: black; }}
+    th, td {{ border: 1px solid #000; padding: 8px; text-align: left; color: black; }}
+    h2, h3, p {{ color: black; }}
+    </style></head>
+    <body>
+        <img src="{logo_path}" height="80" />
+        <h2>Hospital Bill</h2>
+        <p><strong>Patient Info:</strong> {patient_info}</p>
+        <p><strong>Date:</strong> {date}</p>
+        <h3>Services</h3>
+        <table>
+            <tr><th>Service</th><th>Quantity</th><th>Price</th><th>Total</th></tr>
+            {services_html}
+        </table>
+        <h3>Total Amount: ₹{total:.2f}</h3>
+    </body>
+    </html>
+    """
+
+
+def legacy_render(path, items, total):
+    document = QTextDocument()
+    document.setHtml(legacy_html("ID: 1, Name: Ann Lee", items, total, "2026-01-01 10:00:00"))
+    printer = QPrinter()
+    printer.setOutputFormat(QPrinter.PdfFormat)
+    printer.setOutputFileName(path)
+    document.print_(printer)
+
+
+def timed(fn, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), statistics.fmean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invoices", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=10)
+    args = parser.parse_args()
+
+    app = QGuiApplication(sys.argv)
+    items = [BillItem(f"Service {i}", 1 + i % 3, 100.0 + i, (1 + i % 3) * (100.0 + i)) for i in range(args.lines)]
+    total = sum(item.line_total for item in items)
+    renderer = InvoiceRenderer()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def out(kind, i):
+            return os.path.join(tmp, f"{kind}_{i}.pdf")
+
+        results = {
+            "html build / before": timed(
+                lambda i: legacy_html("ID: 1, Name: Ann Lee", items, total, "2026-01-01"), args.invoices),
+            "html build / after": timed(
+                lambda i: get_template("detailed").render(i, "ID: 1, Name: Ann Lee", items, total, "2026-01-01"),
+                args.invoices),
+            "html + pdf / before": timed(lambda i: legacy_render(out("before", i), items, total), args.invoices),
+            "html + pdf / after": timed(
+                lambda i: renderer.write_pdf(
+                    get_template("detailed").render(i, "ID: 1, Name: Ann Lee", items, total, "2026-01-01"),
+                    out("after", i)),
+                args.invoices),
+        }
+
+    print(f"invoices={args.invoices} lines/invoice={args.lines}")
+    for name, (median, mean) in results.items():
+        print(f"{name:22s} median={median:8.3f}ms  mean={mean:8.3f}ms")
+    del app
+
+
+if __name__ == "__main__":
+    main()
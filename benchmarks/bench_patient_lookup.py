@@ -0,0 +1,87 @@
+# benchmarks/bench_patient_lookup.py
+#
+# Types a patient name into AppointmentWindow one character at a time and
+# records the longest gap between 16 ms heartbeat ticks on the GUI thread.
+# A gap under ~16.7 ms means the form kept up with 60 fps while typing.
+#
+#   python -m benchmarks.bench_patient_lookup [--rows 500000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.common import create_scratch_db, insert_patients
+from database.connection import Database, set_database
+
+
+def build_db(path, rows):
+    conn = create_scratch_db(path)
+    insert_patients(conn, rows)
+    conn.execute("UPDATE patients SET name = ? WHERE id = ?", ("Typed Patient", rows))
+    conn.commit()
+    conn.close()
+
+
+def run(app, text, keystroke_ms):
+    from ui.appointments import AppointmentWindow
+
+    window = AppointmentWindow()
+    window.show()
+
+    gaps = []
+    last = [time.perf_counter()]
+
+    def beat():
+        now = time.perf_counter()
+        gaps.append((now - last[0]) * 1000)
+        last[0] = now
+
+    heartbeat = QTimer()
+    heartbeat.setTimerType(Qt.PreciseTimer)
+    heartbeat.timeout.connect(beat)
+    heartbeat.start(16)
+
+    for i in range(1, len(text) + 1):
+        window.patient_input.setText(text[:i])
+        end = time.perf_counter() + keystroke_ms / 1000
+        while time.perf_counter() < end:
+            app.processEvents()
+
+    end = time.perf_counter() + 1.5
+    while time.perf_counter() < end:
+        app.processEvents()
+    heartbeat.stop()
+    label = window.patient_details_label.text()
+    window.close()
+    return sorted(gaps[1:]), label
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--keystroke-ms", type=int, default=40)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, args.rows)
+        db = set_database(Database(path))
+        gaps, label = run(app, "typed patient", args.keystroke_ms)
+        db.close()
+
+    slow = sum(1 for gap in gaps if gap > 1000 / 60 * 1.5)
+    print(f"patients={args.rows} ticks={len(gaps)} p95 gap={gaps[int(len(gaps) * 0.95)]:.1f}ms "
+          f"worst gap={gaps[-1]:.1f}ms dropped frames={slow}")
+    print(f"final label: {label}")
+
+
+if __name__ == "__main__":
+    main()
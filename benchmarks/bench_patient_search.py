@@ -0,0 +1,65 @@
+# benchmarks/bench_patient_search.py
+#
+# Builds a patients table with realistic names and times PatientSearch
+# suggestions for prefix, multi-word and substring queries.
+#
+#   python -m benchmarks.bench_patient_search [--rows 1000000]
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import insert_patients
+from database.connection import Database
+from database.migrations import m001_base_schema
+from database.search import PatientSearch, create_patient_search_index
+
+
+QUERIES = ["a", "pr", "Sharma", "priya sh", "kav me", "ohn", "eha", "12345", "zzz"]
+
+
+def build_db(path, rows):
+    # Built without the migrations so that the index build can be timed
+    conn = sqlite3.connect(path)
+    conn.execute("BEGIN")
+    m001_base_schema(conn)
+    conn.execute("COMMIT")
+    insert_patients(conn, rows)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, args.rows)
+        db = Database(path)
+        search = PatientSearch(db)
+
+        start = time.perf_counter()
+        with db.transaction() as conn:
+            create_patient_search_index(conn)
+        search.check_index()
+        print(f"patients={args.rows} index build={time.perf_counter() - start:.1f}s trigram={search.has_trigram}")
+
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = search.suggest(query)
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            print(f"{query!r:12} results={len(results):2d} median={statistics.median(samples):6.2f}ms "
+                  f"max={samples[-1]:6.2f}ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
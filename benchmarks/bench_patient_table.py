@@ -0,0 +1,87 @@
+# benchmarks/bench_patient_table.py
+#
+# Measures how long PatientWindow takes to open, to scroll through a few
+# pages and to save an edit to one loaded row at different table sizes. With
+# keyset pagination and row-level patching all three should stay flat as the
+# patients table grows, and the edit must keep the selection and scroll.
+#
+#   python -m benchmarks.bench_patient_table [--sizes 1000 100000 1000000]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from benchmarks.common import create_scratch_db, insert_patients
+from database.connection import Database, set_database
+
+
+def build_db(path, rows):
+    conn = create_scratch_db(path)
+    insert_patients(conn, rows)
+    conn.close()
+
+
+def measure(app, rows, pages):
+    from ui.patients import PatientWindow
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_db(path, rows)
+        db = set_database(Database(path))
+
+        start = time.perf_counter()
+        window = PatientWindow()
+        window.show()
+        app.processEvents()
+        open_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(pages):
+            window.table.scrollToBottom()
+            app.processEvents()
+        scroll_ms = (time.perf_counter() - start) * 1000 / pages
+
+        loaded = window.model.rowCount()
+        target = loaded // 2
+        window.table.selectRow(target)
+        window.table.scrollTo(window.model.index(target, 0))
+        app.processEvents()
+        scroll_before = window.table.verticalScrollBar().value()
+
+        window.load_for_edit(window.model.row_at(target))
+        window.name_input.setText("Edited Patient")
+        start = time.perf_counter()
+        window.add_or_update_patient()
+        app.processEvents()
+        edit_ms = (time.perf_counter() - start) * 1000
+
+        kept = (window.table.verticalScrollBar().value() == scroll_before
+                and window.table.selectionModel().isRowSelected(target, window.table.rootIndex())
+                and window.model.row_at(target).name == "Edited Patient")
+        window.close()
+        db.close()
+        return open_ms, scroll_ms, edit_ms, kept, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--pages", type=int, default=10)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    QMessageBox.information = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    for rows in args.sizes:
+        open_ms, scroll_ms, edit_ms, kept, loaded = measure(app, rows, args.pages)
+        print(f"rows={rows:>8}  open={open_ms:8.1f}ms  scroll/page={scroll_ms:6.2f}ms  "
+              f"edit={edit_ms:6.2f}ms  view kept={'yes' if kept else 'NO'}  loaded={loaded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_startup.py
+#
+# Guards start-up cost: import time of main (via python -X importtime),
+# which heavy modules are loaded before the login box, and time to first
+# paint of LoginWindow on the offscreen platform. Exits non-zero when a
+# budget is exceeded.
+#
+#   python -m benchmarks.bench_startup [--runs 5] [--max-import-ms 120] [--max-paint-ms 300]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported until a feature window is opened
+DEFERRED_MODULES = [
+    "PyQt5.QtPrintSupport", "ui.dashboard", "ui.patients", "ui.doctors",
+    "ui.appointments", "ui.billing", "services.invoices", "multiprocessing",
+]
+
+
+def child_first_paint():
+    # Runs in a fresh interpreter: import main, show the login window and
+    # report how long it took until its first paint event.
+    start = time.perf_counter()
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    sys.path.insert(0, ROOT)
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+    from PyQt5.QtWidgets import QApplication
+    import main  # noqa: F401  (measures the real import chain)
+    from ui.login import LoginWindow
+
+    app = QApplication(sys.argv)
+    window = LoginWindow()
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                print(f"{(time.perf_counter() - start) * 1000:.2f}")
+                loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+                print(",".join(loaded))
+                app.quit()
+            return False
+
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.show()
+    QTimer.singleShot(5000, app.quit)
+    app.exec_()
+
+
+def import_time_ms():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "QT_QPA_PLATFORM": "offscreen"}
+    )
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == "main":
+            return int(parts[1]) / 1000
+    raise RuntimeError(result.stderr[-2000:])
+
+
+def first_paint():
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    lines = result.stdout.split("\n")
+    return float(lines[0]), [name for name in lines[1].split(",") if name]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=120.0)
+    parser.add_argument("--max-paint-ms", type=float, default=300.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_first_paint()
+        return
+
+    imports = [import_time_ms() for _ in range(args.runs)]
+    paints = []
+    loaded = set()
+    for _ in range(args.runs):
+        paint_ms, modules = first_paint()
+        paints.append(paint_ms)
+        loaded.update(modules)
+
+    import_ms = statistics.median(imports)
+    paint_ms = statistics.median(paints)
+    print(f"import main:        median={import_ms:7.1f}ms  (budget {args.max_import_ms:.0f}ms)")
+    print(f"first paint:        median={paint_ms:7.1f}ms  (budget {args.max_paint_ms:.0f}ms)")
+    print(f"deferred modules loaded at startup: {', '.join(sorted(loaded)) or 'none'}")
+
+    failed = import_ms > args.max_import_ms or paint_ms > args.max_paint_ms or loaded
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
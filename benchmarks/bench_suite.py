@@ -0,0 +1,252 @@
+# benchmarks/bench_suite.py
+#
+# End-to-end benchmark: generates seeded databases at several sizes, drives
+# the real windows headlessly on the offscreen platform and records open
+# time, refresh time, save latency, lookup latency and peak RSS. Results go
+# to a JSON file that can be compared with an earlier run.
+#
+#   python -m benchmarks.bench_suite --output results.json [--scales 1k 100k 1m]
+#   python -m benchmarks.bench_suite --output new.json --compare old.json
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCALES = {"1k": 1000, "10k": 10000, "100k": 100000, "1m": 1000000}
+
+WINDOWS = {
+    "patients": ("ui.patients", "PatientWindow"),
+    "doctors": ("ui.doctors", "DoctorWindow"),
+    "appointments": ("ui.appointments", "AppointmentWindow"),
+    "billing": ("ui.billing", "BillingWindow"),
+}
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def save_patient(window):
+    window.name_input.setText("Bench Patient")
+    window.age_input.setText("40")
+    window.add_or_update_patient()
+
+
+def save_doctor(window):
+    window.name_input.setText("Dr. Bench")
+    window.specialization_input.setText("General Medicine")
+    window.add_or_update_doctor()
+
+
+def save_appointment(window, minutes=iter(range(0, 24 * 60, 15))):
+    minute = next(minutes)
+    window.patient_input.setText("1")
+    window.date_input.setText("2030-01-01")
+    window.time_input.setText(f"{minute // 60:02d}:{minute % 60:02d}")
+    window.purpose_input.setText("Benchmark")
+    window.add_or_update_appointment()
+
+
+def save_bill(window):
+    # Measures the bill write path only; PDF rendering has its own benchmark
+    window.generate_pdf_bill = lambda bill_id: None
+    window.patient_id = 1
+    window.service_lines.clear()
+    window.service_lines.add_line("Consultation", 1, "500")
+    window.generate_bill()
+
+
+SAVES = {
+    "patients": save_patient,
+    "doctors": save_doctor,
+    "appointments": save_appointment,
+    "billing": save_bill,
+}
+
+
+def measure_lookups(repeat):
+    from database.repository import PatientRepository
+    from database.search import PatientSearch
+
+    patients = PatientRepository()
+    sample = patients.get(1)
+    search = PatientSearch()
+    initials = " ".join(word[:2] for word in sample.name.split())
+    return {
+        "by_id_ms": median_ms(lambda: patients.find("1"), repeat),
+        "by_name_ms": median_ms(lambda: patients.find(sample.name), repeat),
+        "suggest_prefix_ms": median_ms(lambda: search.suggest(sample.name[:3]), repeat),
+        "suggest_words_ms": median_ms(lambda: search.suggest(initials), repeat),
+    }
+
+
+def run_child(db_path, target, repeat):
+    # Runs in a fresh process per window and scale, so a slow window cannot
+    # hold up the others and peak RSS belongs to a single target
+    import importlib
+    import resource
+
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ["HMS_PREWARM"] = "0"
+
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    from database.connection import Database, set_database
+    from database.migrations import migrate
+
+    # Dialogs would block a headless run; answer them immediately
+    QMessageBox.information = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    QMessageBox.warning = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+
+    app = QApplication(sys.argv)
+    db = set_database(Database(db_path))
+    # Cached databases may predate newer migrations; the app applies them at start-up too
+    migrate(db.connection)
+
+    if target == "lookup":
+        results = measure_lookups(repeat * 10)
+    else:
+        module_name, class_name = WINDOWS[target]
+        window_class = getattr(importlib.import_module(module_name), class_name)
+        start = time.perf_counter()
+        window = window_class()
+        window.show()
+        app.processEvents()
+        results = {"open_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+        def refresh():
+            window.refresh()
+            app.processEvents()
+
+        def save():
+            SAVES[target](window)
+            app.processEvents()
+
+        if hasattr(window, "refresh"):
+            results["refresh_ms"] = median_ms(refresh, repeat)
+        results["save_ms"] = median_ms(save, repeat)
+        window.close()
+
+    db.close()
+    results["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(results))
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def scratch_db(data_dir, patients, seed):
+    from benchmarks.generate_data import create
+
+    path = os.path.join(data_dir, f"hms_{patients}_{seed}.db")
+    if not os.path.exists(path):
+        print(f"generating {patients} patients -> {path}", file=sys.stderr)
+        create(path, patients, seed)
+    return path
+
+
+def run_target(db_path, target, repeat, timeout):
+    # Run against a copy so saves do not change the cached database
+    work_path = db_path + ".run"
+    with open(db_path, "rb") as src, open(work_path, "wb") as dst:
+        while chunk := src.read(1 << 20):
+            dst.write(chunk)
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_suite", "--child", work_path,
+             "--target", target, "--repeat", str(repeat)],
+            cwd=ROOT, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {timeout}s"}
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(work_path + suffix):
+                os.remove(work_path + suffix)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit status {result.returncode}"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(current, baseline):
+    print(f"\n{'metric':45} {'baseline':>12} {'current':>12} {'change':>8}")
+    for scale, results in current["scales"].items():
+        old = flatten(baseline.get("scales", {}).get(scale, {}))
+        for metric, value in flatten(results).items():
+            if old.get(metric):
+                change = (value - old[metric]) / old[metric] * 100
+                print(f"{scale + ' ' + metric:45} {old[metric]:12.3f} {value:12.3f} {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", nargs="+", default=["1k", "100k", "1m"], choices=sorted(SCALES))
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "hms-bench"))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=int, default=300, help="seconds allowed per window and scale")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--target", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.target, args.repeat)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "scales": {},
+    }
+    for scale in args.scales:
+        db_path = scratch_db(args.data_dir, SCALES[scale], args.seed)
+        report["scales"][scale] = results = {}
+        for target in [*WINDOWS, "lookup"]:
+            results[target] = result = run_target(db_path, target, args.repeat, args.timeout)
+            print(f"{scale} {target}: {json.dumps(result)}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
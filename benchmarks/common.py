@@ -0,0 +1,28 @@
+# benchmarks/common.py
+import random
+import sqlite3
+
+from database.migrations import migrate
+
+
+FIRST_NAMES = ["Aarav", "Ananya", "Rohan", "Priya", "Vikram", "Sneha", "Arjun", "Kavya", "Rahul", "Isha",
+               "John", "Mary", "David", "Sarah", "Michael", "Emma", "James", "Olivia", "Daniel", "Sophia"]
+LAST_NAMES = ["Sharma", "Patel", "Singh", "Kumar", "Gupta", "Reddy", "Iyer", "Nair", "Das", "Mehta",
+              "Smith", "Johnson", "Brown", "Williams", "Jones", "Garcia", "Miller", "Davis", "Wilson", "Taylor"]
+
+
+def create_scratch_db(path):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    return conn
+
+
+def insert_patients(conn, rows, seed=7):
+    rng = random.Random(seed)
+    conn.executemany(
+        "INSERT INTO patients (name, age, gender, contact) VALUES (?, ?, ?, ?)",
+        ((f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+          rng.randint(0, 95), rng.choice("MF"), f"98{rng.randint(0, 99999999):08d}")
+         for _ in range(rows))
+    )
+    conn.commit()
@@ -0,0 +1,205 @@
+# benchmarks/generate_data.py
+#
+# Seeded synthetic data for a scratch copy of the hospital schema. The same
+# seed and sizes always produce the same database, so benchmark results can
+# be compared between commits.
+#
+#   python -m benchmarks.generate_data --out /tmp/scratch.db --patients 100000 [--seed 1]
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+from benchmarks.common import FIRST_NAMES, LAST_NAMES, create_scratch_db
+from database.connection import get_db_path
+
+
+SPECIALIZATIONS = [
+    ("General Medicine", 30), ("Pediatrics", 12), ("Orthopedics", 10), ("Cardiology", 8),
+    ("Gynecology", 10), ("Dermatology", 7), ("ENT", 6), ("Neurology", 5), ("Oncology", 4),
+    ("Psychiatry", 4), ("Ophthalmology", 4),
+]
+
+# (service, base price in ₹, max quantity)
+SERVICES = [
+    ("Consultation", 500.0, 1), ("Blood Test", 350.0, 3), ("X-Ray", 800.0, 2), ("ECG", 400.0, 1),
+    ("Ultrasound", 1500.0, 1), ("MRI", 6500.0, 1), ("CT Scan", 4500.0, 1), ("Pharmacy", 300.0, 5),
+    ("Ward (per day)", 2500.0, 10), ("Physiotherapy", 700.0, 6), ("Dressing", 200.0, 4),
+]
+SERVICE_WEIGHTS = [40, 25, 10, 8, 6, 2, 2, 30, 5, 4, 6]
+
+PURPOSES = ["Checkup", "Follow-up", "Consultation", "Test results", "Vaccination", "Post-op review", "Emergency"]
+
+SLOT_MINUTES = 15
+DAY_START = 9 * 60
+DAY_END = 17 * 60
+
+BATCH_SIZE = 50000
+
+
+def default_sizes(patients):
+    return {
+        "doctors": max(5, patients // 1000),
+        "appointments": patients * 2,
+        "bills": patients,
+    }
+
+
+class Generator:
+    def __init__(self, seed=1, start=datetime.date(2024, 1, 1), days=730):
+        self.rng = random.Random(seed)
+        self.start = start
+        self.days = days
+
+    def patient(self):
+        rng = self.rng
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        age = min(99, max(0, int(rng.gauss(42, 21))))
+        admitted = self.day().isoformat() if rng.random() < 0.15 else None
+        return (name, age, rng.choice("MF"), f"9{rng.randint(0, 999999999):09d}", None, admitted)
+
+    def doctor(self, number):
+        rng = self.rng
+        specialization = rng.choices([s for s, _ in SPECIALIZATIONS], [w for _, w in SPECIALIZATIONS])[0]
+        name = f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        return (name, specialization, f"doctor{number}@hospital.example", f"8{rng.randint(0, 999999999):09d}")
+
+    def day(self):
+        # Sundays are rare, weekdays carry most of the load
+        while True:
+            day = self.start + datetime.timedelta(days=self.rng.randrange(self.days))
+            if day.weekday() != 6 or self.rng.random() < 0.1:
+                return day
+
+    def slot(self):
+        # Mornings are busier than afternoons
+        minutes = DAY_START + int(self.rng.triangular(0, DAY_END - DAY_START, 60))
+        minutes -= minutes % SLOT_MINUTES
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    def patient_id(self, patients):
+        # A small share of patients (chronic, elderly) account for many visits
+        return 1 + int(self.rng.random() ** 2 * patients)
+
+    def bill_items(self):
+        rng = self.rng
+        count = min(len(SERVICES), 1 + int(rng.expovariate(0.6)))
+        items = []
+        for service, price, max_qty in rng.choices(SERVICES, SERVICE_WEIGHTS, k=count):
+            qty = rng.randint(1, max_qty)
+            unit_price = round(price * rng.uniform(0.9, 1.1), 2)
+            items.append((service, qty, unit_price, round(qty * unit_price, 2)))
+        return items
+
+
+def insert_batched(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+    conn.commit()
+
+
+def generate(conn, patients, doctors=None, appointments=None, bills=None, seed=1):
+    sizes = default_sizes(patients)
+    doctors = sizes["doctors"] if doctors is None else doctors
+    appointments = sizes["appointments"] if appointments is None else appointments
+    bills = sizes["bills"] if bills is None else bills
+    gen = Generator(seed)
+
+    conn.execute("INSERT OR IGNORE INTO users (username, password) VALUES ('admin', 'admin')")
+    insert_batched(conn, """
+        INSERT INTO patients (name, age, gender, contact, address, date_of_admission)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (gen.patient() for _ in range(patients)))
+    insert_batched(conn, """
+        INSERT INTO doctors (name, specialization, email, contact) VALUES (?, ?, ?, ?)
+    """, (gen.doctor(i) for i in range(doctors)))
+
+    # Busy and quiet doctors: appointment share follows a log-normal weight
+    doctor_weights = [gen.rng.lognormvariate(0, 0.6) for _ in range(doctors)]
+
+    def appointment_rows():
+        taken = set()
+        made = 0
+        while made < appointments:
+            doctor_id = gen.rng.choices(range(1, doctors + 1), doctor_weights)[0]
+            key = (doctor_id, gen.day().isoformat(), gen.slot())
+            if key in taken:
+                continue
+            taken.add(key)
+            made += 1
+            yield (gen.patient_id(patients), doctor_id, key[1], key[2], gen.rng.choice(PURPOSES))
+
+    insert_batched(conn, f"""
+        INSERT INTO appointments (patient_id, doctor_id, date, time, purpose, duration, start_at, end_at)
+        VALUES (?1, ?2, ?3, ?4, ?5, {SLOT_MINUTES}, ?3 || ' ' || ?4,
+                strftime('%Y-%m-%d %H:%M', ?3 || ' ' || ?4, '+{SLOT_MINUTES} minutes'))
+    """, appointment_rows())
+
+    first_bill = (conn.execute("SELECT MAX(id) FROM bills").fetchone()[0] or 0) + 1
+    items = []
+
+    def bill_rows():
+        for bill_id in range(first_bill, first_bill + bills):
+            lines = gen.bill_items()
+            items.extend((bill_id, *line) for line in lines)
+            moment = f"{gen.day().isoformat()} {gen.slot()}:00"
+            yield (bill_id, gen.patient_id(patients), round(sum(line[3] for line in lines), 2), moment)
+            if len(items) >= BATCH_SIZE:
+                conn.executemany("""
+                    INSERT INTO bill_items (bill_id, service, qty, unit_price, line_total) VALUES (?, ?, ?, ?, ?)
+                """, items)
+                items.clear()
+
+    insert_batched(conn, "INSERT INTO bills (id, patient_id, total, date) VALUES (?, ?, ?, ?)", bill_rows())
+    if items:
+        conn.executemany("""
+            INSERT INTO bill_items (bill_id, service, qty, unit_price, line_total) VALUES (?, ?, ?, ?, ?)
+        """, items)
+    conn.commit()
+    conn.execute("ANALYZE")
+    return {"patients": patients, "doctors": doctors, "appointments": appointments, "bills": bills}
+
+
+def create(path, patients, seed=1, **sizes):
+    if os.path.abspath(path) == get_db_path():
+        raise ValueError("Refusing to fill the live database; give a scratch path")
+    if os.path.exists(path):
+        os.remove(path)
+    conn = create_scratch_db(path)
+    try:
+        return generate(conn, patients, seed=seed, **sizes)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--doctors", type=int)
+    parser.add_argument("--appointments", type=int)
+    parser.add_argument("--bills", type=int)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        counts = create(args.out, args.patients, args.seed, doctors=args.doctors,
+                        appointments=args.appointments, bills=args.bills)
+    except ValueError as exc:
+        sys.exit(str(exc))
+    print(", ".join(f"{count} {name}" for name, count in counts.items()),
+          f"in {time.perf_counter() - start:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
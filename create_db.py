@@ -1,66 +1,16 @@
+import os
 import sqlite3
 
-conn = sqlite3.connect('db/hospital.db')
-cursor = conn.cursor()
-
-# Users table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS users (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT UNIQUE NOT NULL,
-    password TEXT NOT NULL
-)
-''')
-
-# Patients table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS patients (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    age INTEGER,
-    gender TEXT,
-    contact TEXT,
-    address TEXT,
-    date_of_admission TEXT
-)
-''')
+from database.migrations import LATEST_VERSION, migrate
 
-# Doctors table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS doctors (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    specialization TEXT,
-    contact TEXT
-)
-''')
-
-# Appointments table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS appointments (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    patient_id INTEGER,
-    doctor_id INTEGER,
-    appointment_date TEXT,
-    notes TEXT,
-    FOREIGN KEY(patient_id) REFERENCES patients(id),
-    FOREIGN KEY(doctor_id) REFERENCES doctors(id)
-)
-''')
+os.makedirs('db', exist_ok=True)
+conn = sqlite3.connect('db/hospital.db')
 
-# Billing table
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS billing (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    patient_id INTEGER,
-    amount REAL,
-    billing_date TEXT,
-    details TEXT,
-    FOREIGN KEY(patient_id) REFERENCES patients(id)
-)
-''')
+# Creates the tables on a fresh file and brings an older database up to date
+applied = migrate(conn)
 
-conn.commit()
 conn.close()
 
-print("✅ Database and tables created successfully.")
+for name in applied:
+    print(f"  applied {name}")
+print(f"✅ Database is at schema version {LATEST_VERSION}.")
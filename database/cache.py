@@ -0,0 +1,154 @@
+# database/cache.py
+#
+# Bounded LRU cache of patient and doctor records shared by every window and
+# worker thread using a Database. Records are keyed by (entity, id) and, when
+# they were resolved by name, also by (entity, normalized name). The
+# Database drops entries for each write as its transaction commits; a read
+# that overlapped a write is not cached, so a row read just before another
+# thread's commit can never outlive it in the cache. Writes from other
+# processes and workstations produce no change events here, so the cache
+# also watches the database's data_version and starts over when it moves.
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from database.events import BULK, DELETE, UPDATE
+
+RECORD_CACHE_SIZE = int(os.environ.get("HMS_RECORD_CACHE", "10000"))
+# How stale a record written by another workstation may be when served
+RECORD_CACHE_CHECK_MS = int(os.environ.get("HMS_RECORD_CACHE_CHECK_MS", "200"))
+
+CacheStats = namedtuple("CacheStats", "hits misses evictions size capacity")
+
+# SQLite's NOCASE folds ASCII letters only
+_NOCASE = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def normalize_name(name):
+    # Names that `name = ? COLLATE NOCASE` treats as equal share a key
+    return name.translate(_NOCASE)
+
+
+class RecordCache:
+    def __init__(self, capacity=RECORD_CACHE_SIZE, version=None, check_ms=RECORD_CACHE_CHECK_MS):
+        self.capacity = capacity
+        # version() changes whenever anyone commits to the database; it is
+        # read at most once per check interval
+        self.version = version
+        self.check_interval = check_ms / 1000
+        self._version = None
+        self._checked = 0.0
+        self._entries = OrderedDict()
+        # (entity, id) -> (entity, name) key stored for the same record
+        self._names = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; put() ignores reads started earlier
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        if self.version is not None:
+            self.check_version()
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return record
+
+    def check_version(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return
+            self._checked = now
+        version = self.version()
+        with self._lock:
+            # Commits made here move the version too; they were already
+            # invalidated precisely, but cannot be told apart from others'
+            if version != self._version:
+                if self._version is not None:
+                    self._clear()
+                self._version = version
+
+    def put(self, entity, record, generation, name=None):
+        with self._lock:
+            if generation != self.generation:
+                return
+            id_key = (entity, record.id)
+            self._store(id_key, record)
+            if name is not None:
+                name_key = (entity, normalize_name(name))
+                self._store(name_key, record)
+                self._names[id_key] = name_key
+            while len(self._entries) > self.capacity:
+                self._evict_oldest()
+
+    def _store(self, key, record):
+        self._entries[key] = record
+        self._entries.move_to_end(key)
+
+    def _evict_oldest(self):
+        key, record = self._entries.popitem(last=False)
+        self.evictions += 1
+        # The id and name entries of a record leave together
+        id_key = (key[0], record.id)
+        name_key = self._names.pop(id_key, None)
+        if key != id_key:
+            self._entries.pop(id_key, None)
+        elif name_key is not None:
+            self._entries.pop(name_key, None)
+
+    def _drop(self, entity, record_id):
+        id_key = (entity, record_id)
+        self._entries.pop(id_key, None)
+        name_key = self._names.pop(id_key, None)
+        if name_key is not None:
+            self._entries.pop(name_key, None)
+
+    def invalidate(self, events):
+        # Called by the Database with the events of each committed write
+        with self._lock:
+            for event in events:
+                if event.op == BULK:
+                    self._clear_entity(event.entity)
+                elif event.op in (UPDATE, DELETE):
+                    self._drop(event.entity, event.id)
+                    if event.op == UPDATE:
+                        # A rename can change which record a cached name
+                        # resolves to, so the entity's name keys go too
+                        self._drop_names(event.entity)
+            self.generation += 1
+
+    def _drop_names(self, entity):
+        for id_key, name_key in list(self._names.items()):
+            if id_key[0] == entity:
+                del self._names[id_key]
+                self._entries.pop(name_key, None)
+
+    def _clear_entity(self, entity):
+        for key in [key for key in self._entries if key[0] == entity]:
+            del self._entries[key]
+        self._names = {id_key: name_key for id_key, name_key in self._names.items() if id_key[0] != entity}
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._names.clear()
+        self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self.capacity)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,216 @@
+# database/connection.py
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from database.cache import RecordCache
+from database.events import ChangeEvent, get_change_bus
+from database.instrumentation import InstrumentedConnection
+
+
+def get_db_path():
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'db', 'hospital.db'))
+
+
+# Applied once per connection instead of paying the defaults on every query
+PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",   # 256 MB
+    "PRAGMA cache_size=-65536",     # 64 MB
+)
+
+# WAL is recorded in the database file, so only connections that write ask
+# for it; switching modes needs a lock a reader should never wait for
+JOURNAL_MODE = "PRAGMA journal_mode=WAL"
+
+STATEMENT_CACHE_SIZE = 256
+
+# Several workstations share one database file. A statement waits this long
+# inside SQLite for another connection's write lock before failing...
+BUSY_TIMEOUT_MS = int(os.environ.get("HMS_BUSY_TIMEOUT_MS", "5000"))
+# ...and BEGIN IMMEDIATE is then tried again this many times, after a
+# jittered backoff so clerks that gave up together do not retry together
+WRITE_RETRIES = int(os.environ.get("HMS_WRITE_RETRIES", "4"))
+RETRY_BACKOFF_MS = 50
+RETRY_BACKOFF_MAX_MS = 2000
+
+# Per-statement timing and the slow-query log; HMS_QUERY_STATS=0 turns it off
+INSTRUMENT_QUERIES = os.environ.get("HMS_QUERY_STATS", "1") != "0"
+
+
+def connect(path=None, read_only=False):
+    conn = sqlite3.connect(
+        path or get_db_path(),
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+        factory=InstrumentedConnection if INSTRUMENT_QUERIES else sqlite3.Connection
+    )
+    if read_only:
+        conn.execute("PRAGMA query_only=ON")
+    elif conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+        conn.execute(JOURNAL_MODE)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def is_busy(error):
+    # SQLITE_BUSY or SQLITE_LOCKED, including their extended codes
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is None:
+        return "locked" in str(error) or "busy" in str(error)
+    return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+def retry_delay(attempt):
+    # Exponential backoff with the upper half jittered
+    ceiling = min(RETRY_BACKOFF_MAX_MS, RETRY_BACKOFF_MS * 2 ** attempt)
+    return random.uniform(ceiling / 2, ceiling) / 1000
+
+
+class Database:
+    # Each thread gets its own long-lived connections: one that writes, and a
+    # query_only one that serves reads outside transactions. Under WAL the
+    # reader sees the last committed snapshot, so background readers (lookups,
+    # exports) never share a cursor with the GUI thread and no read waits
+    # behind a writer on this or any other workstation.
+    def __init__(self, path=None):
+        self.path = path or get_db_path()
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._probe = None
+        self._probe_lock = threading.Lock()
+        # BEGIN IMMEDIATE attempts that found the database locked, and writes
+        # that gave up after the last retry
+        self.write_retries = 0
+        self.write_failures = 0
+        # Patient and doctor records shared by every thread using this database
+        self.records = RecordCache(version=self.data_version)
+
+    @property
+    def connection(self):
+        return self._thread_connection("conn")
+
+    @property
+    def reader(self):
+        return self._thread_connection("reader", read_only=True)
+
+    def _thread_connection(self, name, read_only=False):
+        conn = getattr(self._local, name, None)
+        if conn is None:
+            conn = connect(self.path, read_only)
+            setattr(self._local, name, conn)
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _read_connection(self):
+        # Reads inside a transaction must see its own uncommitted writes
+        if getattr(self._local, "events", None) is not None:
+            return self.connection
+        return self.reader
+
+    def execute(self, sql, params=()):
+        return self.connection.execute(sql, params)
+
+    def fetch_one(self, sql, params=()):
+        return self._read_connection().execute(sql, params).fetchone()
+
+    def fetch_all(self, sql, params=()):
+        return self._read_connection().execute(sql, params).fetchall()
+
+    def data_version(self):
+        # PRAGMA data_version of a connection that never writes changes
+        # whenever any other connection commits, in this process or another
+        with self._probe_lock:
+            if self._probe is None:
+                self._probe = connect(self.path, read_only=True)
+            return self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    @contextmanager
+    def transaction(self):
+        # Every write takes the write lock up front with BEGIN IMMEDIATE, so
+        # it cannot fail half way because another workstation wrote first,
+        # and reads made inside it cannot go stale before commit. A
+        # transaction opened inside another one joins it.
+        if getattr(self._local, "events", None) is not None:
+            yield self.connection
+            return
+        conn = self.connection
+        self.begin(conn)
+        self._local.events = []
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            events, self._local.events = self._local.events, None
+        self.publish(events)
+
+    def begin(self, conn):
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as error:
+                if not is_busy(error):
+                    raise
+                with self._lock:
+                    if attempt == WRITE_RETRIES:
+                        self.write_failures += 1
+                        raise
+                    self.write_retries += 1
+            time.sleep(retry_delay(attempt))
+
+    def changed(self, entity, op, row_id=None):
+        # Records a write for the change bus; inside a transaction it is held
+        # back until commit so subscribers never see rolled-back changes
+        event = ChangeEvent(entity, op, row_id)
+        events = getattr(self._local, "events", None)
+        if events is None:
+            self.publish([event])
+        else:
+            events.append(event)
+
+    def publish(self, events):
+        if events:
+            self.records.invalidate(events)
+            get_change_bus().publish(events)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._local = threading.local()
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+
+
+_database = None
+
+
+def get_database():
+    global _database
+    if _database is None:
+        _database = Database()
+    return _database
+
+
+def set_database(database):
+    # Lets scripts and benchmarks point every repository at a scratch file
+    global _database
+    if _database is not None and _database is not database:
+        _database.close()
+    _database = database
+    return database
@@ -0,0 +1,70 @@
+# database/events.py
+#
+# Change notifications from the data layer. Repositories record what they
+# wrote with Database.changed(); the events of a transaction are published
+# together after it commits and are dropped if it rolls back. Subscribers are
+# called on the committing thread with a list of ChangeEvent.
+import threading
+from collections import namedtuple
+
+PATIENT = "patient"
+DOCTOR = "doctor"
+APPOINTMENT = "appointment"
+BILL = "bill"
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+# Many rows changed at once (imports, rebuilds); id is None
+BULK = "bulk"
+
+ChangeEvent = namedtuple("ChangeEvent", "entity op id")
+
+
+class ChangeBus:
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s != callback]
+
+    def publish(self, events):
+        if not events:
+            return
+        for callback in self._subscribers:
+            callback(events)
+
+
+def merge(pending, event):
+    # Folds event into pending, a dict keyed by (entity, id), so a burst of
+    # writes to one row reaches subscribers as a single net change
+    key = (event.entity, event.id)
+    previous = pending.get(key)
+    if previous is None or event.op == BULK:
+        pending[key] = event
+    elif previous.op == INSERT and event.op == DELETE:
+        del pending[key]
+    elif previous.op == INSERT:
+        return
+    elif previous.op == DELETE and event.op == INSERT:
+        pending[key] = event._replace(op=UPDATE)
+    else:
+        pending[key] = event
+
+
+_change_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_change_bus():
+    global _change_bus
+    with _bus_lock:
+        if _change_bus is None:
+            _change_bus = ChangeBus()
+        return _change_bus
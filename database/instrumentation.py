@@ -0,0 +1,302 @@
+# database/instrumentation.py
+#
+# Every statement issued through database.connection.connect() goes through
+# InstrumentedConnection/InstrumentedCursor, which record the normalised SQL,
+# the shape of its parameters (types only, never patient data), the row count
+# and the wall time including fetching. Timings are aggregated per statement
+# into fixed-bucket histograms; statements slower than HMS_SLOW_QUERY_MS are
+# written with their query plan to a rotating slow-query log.
+import datetime
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+
+SLOW_QUERY_MS = float(os.environ.get("HMS_SLOW_QUERY_MS", "100"))
+SLOW_LOG_MAX_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 5
+
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def get_log_dir():
+    return os.environ.get("HMS_LOG_DIR") or os.path.abspath(
+        os.path.join(os.path.dirname(__file__), '..', 'logs')
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    # One entry per statement shape: collapse whitespace and IN (?, ?, ...) lists
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("IN (?, ...)", sql)
+
+
+def param_shape(params):
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+    return _tuple_shape(tuple(map(type, params)))
+
+
+@functools.lru_cache(maxsize=1024)
+def _tuple_shape(types):
+    return "(" + ", ".join(t.__name__ for t in types) + ")"
+
+
+class StatementStats:
+    __slots__ = ("sql", "shape", "calls", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self, sql, shape):
+        self.sql = sql
+        self.shape = shape
+        self.calls = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, duration_ms, rows):
+        self.calls += 1
+        self.rows += max(rows, 0)
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if duration_ms <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th sample, capped at the max
+        target = q * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class QueryStats:
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_dir=None):
+        self.slow_ms = slow_ms
+        self.log_dir = log_dir
+        self.statements = {}
+        self.slow_count = 0
+        self.started = datetime.datetime.now()
+        self._lock = threading.Lock()
+        self._slow_log = None
+
+    def record(self, sql, shape, rows, duration_ms, conn=None, params=()):
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = StatementStats(key, shape)
+            stats.add(duration_ms, rows)
+            if duration_ms >= self.slow_ms:
+                self.slow_count += 1
+            else:
+                return
+        # The statement as run: the normalised key is not valid SQL for EXPLAIN
+        self.log_slow(sql, shape, rows, duration_ms, conn, params)
+
+    def log_slow(self, sql, shape, rows, duration_ms, conn, params):
+        plan = explain(conn, sql, params) if conn is not None else []
+        lines = [f"{duration_ms:.1f} ms rows={rows} params={shape}", f"  {normalize_sql(sql)}"]
+        lines += [f"  plan: {detail}" for detail in plan]
+        self.slow_log().warning("\n".join(lines))
+
+    def slow_log(self):
+        if self._slow_log is None:
+            # Imported on the first slow query; logging costs ~15 ms at start-up
+            import logging
+            import logging.handlers
+
+            logger = logging.getLogger("hms.slow_queries")
+            logger.propagate = False
+            if not logger.handlers:
+                log_dir = self.log_dir or get_log_dir()
+                os.makedirs(log_dir, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    os.path.join(log_dir, "slow_queries.log"),
+                    maxBytes=SLOW_LOG_MAX_BYTES, backupCount=SLOW_LOG_BACKUPS, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                logger.addHandler(handler)
+            self._slow_log = logger
+        return self._slow_log
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(self.statements.values(), key=lambda s: s.total_ms, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.slow_count = 0
+            self.started = datetime.datetime.now()
+
+    def report(self, limit=25):
+        statements = self.snapshot()
+        calls = sum(s.calls for s in statements)
+        lines = [
+            f"Query statistics since {self.started:%Y-%m-%d %H:%M:%S}: "
+            f"{calls} calls, {len(statements)} statements, "
+            f"{self.slow_count} slower than {self.slow_ms:g} ms",
+            "",
+            f"{'calls':>8} {'total ms':>10} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'rows':>9}  statement",
+        ]
+        for s in statements[:limit]:
+            lines.append(
+                f"{s.calls:8d} {s.total_ms:10.1f} {s.total_ms / s.calls:8.2f} {s.percentile(0.5):8.2f} "
+                f"{s.percentile(0.95):8.2f} {s.percentile(0.99):8.2f} {s.max_ms:8.2f} {s.rows:9d}  "
+                f"{s.sql[:160]} {s.shape}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        if path is None:
+            log_dir = self.log_dir or get_log_dir()
+            os.makedirs(log_dir, exist_ok=True)
+            path = os.path.join(log_dir, "query_report.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.report(limit=1000) + "\n")
+        return path
+
+
+def explain(conn, sql, params):
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return []
+    try:
+        # A plain cursor, so the plan lookup is not itself recorded
+        rows = sqlite3.Cursor(conn).execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except (sqlite3.Error, ValueError):
+        return []
+    return [row[3] for row in rows]
+
+
+_query_stats = None
+
+
+def get_query_stats():
+    global _query_stats
+    if _query_stats is None:
+        _query_stats = QueryStats()
+    return _query_stats
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # The timing of a SELECT covers execute plus every fetch, and is recorded
+    # once the result set is exhausted, the cursor is reused or it is dropped.
+    _pending = None
+
+    def _start(self, sql, params, shape):
+        self._finish()
+        self._pending = [sql, shape, params, 0, 0.0]
+        return time.perf_counter()
+
+    def _elapsed(self, start, rows=0):
+        pending = self._pending
+        if pending is not None:
+            pending[3] += rows
+            pending[4] += time.perf_counter() - start
+
+    def _finish(self):
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        sql, shape, params, rows, elapsed = pending
+        if rows == 0 and self.rowcount > 0:
+            rows = self.rowcount
+        get_query_stats().record(sql, shape, rows, elapsed * 1000, self.connection, params)
+
+    def execute(self, sql, params=()):
+        start = self._start(sql, params, param_shape(params))
+        try:
+            super().execute(sql, params)
+        finally:
+            self._elapsed(start)
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = seq_of_params if isinstance(seq_of_params, (list, tuple)) else list(seq_of_params)
+        first = seq_of_params[0] if seq_of_params else ()
+        start = self._start(sql, first, f"{len(seq_of_params)} x {param_shape(first)}")
+        try:
+            super().executemany(sql, seq_of_params)
+        finally:
+            self._elapsed(start)
+            self._finish()
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._elapsed(start, row is not None)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._elapsed(start, len(rows))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._elapsed(start, len(rows))
+        self._finish()
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._finish()
+            raise
+        self._elapsed(start, 1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        if not self.in_transaction:
+            return
+        start = time.perf_counter()
+        super().commit()
+        get_query_stats().record("COMMIT", "()", 0, (time.perf_counter() - start) * 1000)
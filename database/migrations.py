@@ -0,0 +1,282 @@
+# database/migrations.py
+#
+# Ordered schema migrations tracked through PRAGMA user_version. Each step
+# runs in its own transaction and is written so that re-running it against a
+# database that already has the change is harmless.
+
+import re
+
+from database.reports import create_report_tables, create_row_counts, rebuild_report_summaries
+from database.search import create_patient_search_index
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+    ).fetchone() is not None
+
+
+def add_column(conn, table, column, definition):
+    if column not in columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def m001_base_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS patients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            age INTEGER,
+            gender TEXT,
+            contact TEXT,
+            address TEXT,
+            date_of_admission TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS doctors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            specialization TEXT,
+            contact TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id INTEGER,
+            doctor_id INTEGER,
+            appointment_date TEXT,
+            notes TEXT,
+            FOREIGN KEY(patient_id) REFERENCES patients(id),
+            FOREIGN KEY(doctor_id) REFERENCES doctors(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS billing (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id INTEGER,
+            amount REAL,
+            billing_date TEXT,
+            details TEXT,
+            FOREIGN KEY(patient_id) REFERENCES patients(id)
+        )
+    """)
+
+
+def m002_reconcile_ui_columns(conn):
+    # The windows were written against doctors.email, appointments
+    # date/time/purpose and a bills table that create_db.py never made.
+    add_column(conn, "doctors", "email", "TEXT")
+
+    appointment_columns = columns(conn, "appointments")
+    add_column(conn, "appointments", "date", "TEXT")
+    add_column(conn, "appointments", "time", "TEXT")
+    add_column(conn, "appointments", "purpose", "TEXT")
+    if "appointment_date" in appointment_columns:
+        # Legacy rows stored "YYYY-MM-DD" or "YYYY-MM-DD HH:MM" in one column
+        conn.execute("""
+            UPDATE appointments
+            SET date = substr(appointment_date, 1, 10),
+                time = NULLIF(trim(substr(appointment_date, 12)), '')
+            WHERE date IS NULL AND appointment_date IS NOT NULL
+        """)
+    if "notes" in appointment_columns:
+        conn.execute("UPDATE appointments SET purpose = notes WHERE purpose IS NULL")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bills (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            patient_id INTEGER,
+            services TEXT,
+            total REAL,
+            date TEXT,
+            FOREIGN KEY(patient_id) REFERENCES patients(id)
+        )
+    """)
+    if table_exists(conn, "billing"):
+        conn.execute("""
+            INSERT INTO bills (patient_id, services, total, date)
+            SELECT b.patient_id, b.details, b.amount, b.billing_date
+            FROM billing b
+            WHERE NOT EXISTS (
+                SELECT 1 FROM bills x
+                WHERE x.patient_id IS b.patient_id AND x.date IS b.billing_date AND x.total IS b.amount
+            )
+        """)
+
+
+def m003_hot_query_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_doctor_slot ON appointments(doctor_id, date, time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments(patient_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_patients_name_nocase ON patients(name COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bills_patient_date ON bills(patient_id, date)")
+
+
+def m004_patient_search(conn):
+    create_patient_search_index(conn)
+
+
+# Matches one "Service x2 @₹150.00" entry of the old pipe-joined services text
+SERVICE_ENTRY = re.compile(r"^(?P<service>.*) x(?P<qty>\d+) @₹(?P<price>[\d.]+)$")
+
+
+def parse_services_text(services, total):
+    items = []
+    pending = ""
+    for entry in (services or "").split(" | "):
+        # A service name may itself contain " | "; glue such pieces back on
+        entry = pending + entry if pending else entry
+        match = SERVICE_ENTRY.match(entry.strip())
+        if match:
+            qty = int(match.group("qty"))
+            price = float(match.group("price"))
+            items.append((match.group("service"), qty, price, qty * price))
+            pending = ""
+        else:
+            pending = entry + " | "
+    if not items and services:
+        # Free-text details from the legacy billing table: keep them as one line
+        items.append((services, 1, total or 0.0, total or 0.0))
+    return items
+
+
+def m005_bill_items(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bill_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bill_id INTEGER NOT NULL,
+            service TEXT NOT NULL,
+            qty INTEGER NOT NULL,
+            unit_price REAL NOT NULL,
+            line_total REAL NOT NULL,
+            FOREIGN KEY(bill_id) REFERENCES bills(id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bill_items_bill ON bill_items(bill_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bills_date ON bills(date)")
+
+    bills = conn.execute("""
+        SELECT b.id, b.services, b.total FROM bills b
+        WHERE NOT EXISTS (SELECT 1 FROM bill_items i WHERE i.bill_id = b.id)
+    """)
+    for bill_id, services, total in bills.fetchall():
+        conn.executemany("""
+            INSERT INTO bill_items (bill_id, service, qty, unit_price, line_total)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(bill_id, *item) for item in parse_services_text(services, total)])
+
+
+def m006_appointment_intervals(conn):
+    # Appointments become [start_at, end_at) intervals so overlapping bookings
+    # for a doctor can be found with one index range seek. Rows whose date or
+    # time cannot be parsed keep NULL bounds and are never reported as clashes.
+    add_column(conn, "appointments", "duration", "INTEGER NOT NULL DEFAULT 15")
+    add_column(conn, "appointments", "start_at", "TEXT")
+    add_column(conn, "appointments", "end_at", "TEXT")
+    conn.execute("""
+        UPDATE appointments
+        SET start_at = strftime('%Y-%m-%d %H:%M', date || ' ' || time)
+        WHERE start_at IS NULL
+    """)
+    conn.execute("""
+        UPDATE appointments
+        SET end_at = strftime('%Y-%m-%d %H:%M', start_at, '+' || duration || ' minutes')
+        WHERE end_at IS NULL AND start_at IS NOT NULL
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_appointments_doctor_interval
+        ON appointments(doctor_id, start_at, end_at)
+    """)
+
+
+def m007_doctor_hours(conn):
+    # Weekly working-hour template per doctor; weekday 0 is Monday and the
+    # bounds are minutes after midnight. Doctors without rows use the default.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS doctor_hours (
+            doctor_id INTEGER NOT NULL,
+            weekday INTEGER NOT NULL,
+            start_minute INTEGER NOT NULL,
+            end_minute INTEGER NOT NULL,
+            PRIMARY KEY (doctor_id, weekday, start_minute),
+            FOREIGN KEY(doctor_id) REFERENCES doctors(id)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_doctors_specialization ON doctors(specialization COLLATE NOCASE)")
+
+
+def m008_report_summaries(conn):
+    # Per-day revenue, per-patient revenue and per-doctor daily load, kept
+    # current by triggers from here on and back-filled once now
+    create_report_tables(conn)
+    rebuild_report_summaries(conn)
+
+
+def m009_row_counts(conn):
+    # Maintained table sizes for the dashboard counters
+    create_row_counts(conn)
+
+
+def m010_appointment_date_index(conn):
+    # Date-filtered appointment exports read the range in date order
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments(date)")
+
+
+def m011_bill_tax(conn):
+    # Tax is charged on the bill, not as one of its services; total includes it
+    add_column(conn, "bills", "tax", "REAL NOT NULL DEFAULT 0")
+
+
+MIGRATIONS = [
+    (1, m001_base_schema),
+    (2, m002_reconcile_ui_columns),
+    (3, m003_hot_query_indexes),
+    (4, m004_patient_search),
+    (5, m005_bill_items),
+    (6, m006_appointment_intervals),
+    (7, m007_doctor_hours),
+    (8, m008_report_summaries),
+    (9, m009_row_counts),
+    (10, m010_appointment_date_index),
+    (11, m011_bill_tax),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    applied = []
+    for version, step in MIGRATIONS:
+        if version <= current_version(conn):
+            continue
+        # Take the write lock before re-checking, so two workstations starting
+        # at once cannot both apply the same step
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= current_version(conn):
+                conn.execute("ROLLBACK")
+                continue
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(step.__name__)
+    return applied
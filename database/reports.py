@@ -0,0 +1,303 @@
+# database/reports.py
+#
+# Summary tables behind the reports. Triggers keep them in step with every
+# write to bills and appointments, whichever code path makes it (windows,
+# imports, scripts), so a report reads a few hundred summary rows instead of
+# scanning the base tables. rebuild_report_summaries() recomputes them from
+# scratch for a backfill or after the base tables were edited by hand.
+# row_counts holds table sizes, maintained the same way, for the dashboard.
+from collections import namedtuple
+from contextlib import contextmanager
+
+from database.connection import get_database
+
+DailyRevenue = namedtuple("DailyRevenue", "day bills revenue")
+MonthlyRevenue = namedtuple("MonthlyRevenue", "month bills revenue")
+PatientRevenue = namedtuple("PatientRevenue", "patient_id name bills revenue")
+DoctorLoad = namedtuple("DoctorLoad", "doctor_id name appointments minutes")
+
+# Amounts are re-rounded to paise on every change, so adding and subtracting
+# bill totals never accumulates floating-point drift
+REPORT_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS daily_revenue (
+        day TEXT PRIMARY KEY,
+        bills INTEGER NOT NULL,
+        revenue REAL NOT NULL
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS patient_revenue (
+        patient_id INTEGER PRIMARY KEY,
+        bills INTEGER NOT NULL,
+        revenue REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_patient_revenue_revenue ON patient_revenue(revenue)",
+    """
+    CREATE TABLE IF NOT EXISTS doctor_day_load (
+        doctor_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        appointments INTEGER NOT NULL,
+        minutes INTEGER NOT NULL,
+        PRIMARY KEY (doctor_id, day)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_doctor_day_load_day ON doctor_day_load(day)",
+    # Bills are dated "YYYY-MM-DD HH:MM:SS"; the summaries are per day.
+    # INSERT ... SELECT ... WHERE skips rows without a date or patient, and
+    # the WHERE also keeps the parser from reading ON CONFLICT as a join.
+    """
+    CREATE TRIGGER IF NOT EXISTS bills_summary_ai AFTER INSERT ON bills BEGIN
+        INSERT INTO daily_revenue (day, bills, revenue)
+        SELECT substr(new.date, 1, 10), 1, round(coalesce(new.total, 0), 2) WHERE new.date IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET bills = bills + 1, revenue = round(revenue + excluded.revenue, 2);
+        INSERT INTO patient_revenue (patient_id, bills, revenue)
+        SELECT new.patient_id, 1, round(coalesce(new.total, 0), 2) WHERE new.patient_id IS NOT NULL
+        ON CONFLICT (patient_id) DO UPDATE SET bills = bills + 1, revenue = round(revenue + excluded.revenue, 2);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bills_summary_ad AFTER DELETE ON bills BEGIN
+        UPDATE daily_revenue SET bills = bills - 1, revenue = round(revenue - coalesce(old.total, 0), 2)
+        WHERE day = substr(old.date, 1, 10);
+        UPDATE patient_revenue SET bills = bills - 1, revenue = round(revenue - coalesce(old.total, 0), 2)
+        WHERE patient_id = old.patient_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS bills_summary_au AFTER UPDATE OF patient_id, total, date ON bills BEGIN
+        UPDATE daily_revenue SET bills = bills - 1, revenue = round(revenue - coalesce(old.total, 0), 2)
+        WHERE day = substr(old.date, 1, 10);
+        UPDATE patient_revenue SET bills = bills - 1, revenue = round(revenue - coalesce(old.total, 0), 2)
+        WHERE patient_id = old.patient_id;
+        INSERT INTO daily_revenue (day, bills, revenue)
+        SELECT substr(new.date, 1, 10), 1, round(coalesce(new.total, 0), 2) WHERE new.date IS NOT NULL
+        ON CONFLICT (day) DO UPDATE SET bills = bills + 1, revenue = round(revenue + excluded.revenue, 2);
+        INSERT INTO patient_revenue (patient_id, bills, revenue)
+        SELECT new.patient_id, 1, round(coalesce(new.total, 0), 2) WHERE new.patient_id IS NOT NULL
+        ON CONFLICT (patient_id) DO UPDATE SET bills = bills + 1, revenue = round(revenue + excluded.revenue, 2);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS appointments_summary_ai AFTER INSERT ON appointments BEGIN
+        INSERT INTO doctor_day_load (doctor_id, day, appointments, minutes)
+        SELECT new.doctor_id, new.date, 1, coalesce(new.duration, 0)
+        WHERE new.doctor_id IS NOT NULL AND new.date IS NOT NULL
+        ON CONFLICT (doctor_id, day) DO UPDATE
+        SET appointments = appointments + 1, minutes = minutes + excluded.minutes;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS appointments_summary_ad AFTER DELETE ON appointments BEGIN
+        UPDATE doctor_day_load SET appointments = appointments - 1, minutes = minutes - coalesce(old.duration, 0)
+        WHERE doctor_id = old.doctor_id AND day = old.date;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS appointments_summary_au
+    AFTER UPDATE OF doctor_id, date, duration ON appointments BEGIN
+        UPDATE doctor_day_load SET appointments = appointments - 1, minutes = minutes - coalesce(old.duration, 0)
+        WHERE doctor_id = old.doctor_id AND day = old.date;
+        INSERT INTO doctor_day_load (doctor_id, day, appointments, minutes)
+        SELECT new.doctor_id, new.date, 1, coalesce(new.duration, 0)
+        WHERE new.doctor_id IS NOT NULL AND new.date IS NOT NULL
+        ON CONFLICT (doctor_id, day) DO UPDATE
+        SET appointments = appointments + 1, minutes = minutes + excluded.minutes;
+    END
+    """,
+)
+
+# Table sizes for the dashboard, so it never runs COUNT(*) over a table
+COUNTER_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS row_counts (
+        name TEXT PRIMARY KEY,
+        rows INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_count_ai AFTER INSERT ON patients BEGIN
+        UPDATE row_counts SET rows = rows + 1 WHERE name = 'patients';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_count_ad AFTER DELETE ON patients BEGIN
+        UPDATE row_counts SET rows = rows - 1 WHERE name = 'patients';
+    END
+    """,
+)
+COUNTED_TABLES = ("patients",)
+
+SUMMARY_TABLES = ("daily_revenue", "patient_revenue", "doctor_day_load")
+
+
+def create_report_tables(conn):
+    # Safe to call repeatedly. The caller owns the transaction.
+    for statement in REPORT_SCHEMA:
+        conn.execute(statement)
+
+
+def create_row_counts(conn):
+    # Creates the counters if needed and sets them from the tables; safe to
+    # call repeatedly. The caller owns the transaction.
+    for statement in COUNTER_SCHEMA:
+        conn.execute(statement)
+    for table in COUNTED_TABLES:
+        conn.execute(f"INSERT OR REPLACE INTO row_counts (name, rows) SELECT '{table}', COUNT(*) FROM {table}")
+
+
+def rebuild_report_summaries(conn):
+    # Recomputes every summary from the base tables in one pass each. The
+    # caller owns the transaction, so readers see either the old or the new
+    # summaries, never an empty table.
+    for table in SUMMARY_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    conn.execute("""
+        INSERT INTO daily_revenue (day, bills, revenue)
+        SELECT substr(date, 1, 10), COUNT(*), round(SUM(coalesce(total, 0)), 2)
+        FROM bills WHERE date IS NOT NULL
+        GROUP BY substr(date, 1, 10)
+    """)
+    conn.execute("""
+        INSERT INTO patient_revenue (patient_id, bills, revenue)
+        SELECT patient_id, COUNT(*), round(SUM(coalesce(total, 0)), 2)
+        FROM bills WHERE patient_id IS NOT NULL
+        GROUP BY patient_id
+    """)
+    conn.execute("""
+        INSERT INTO doctor_day_load (doctor_id, day, appointments, minutes)
+        SELECT doctor_id, date, COUNT(*), SUM(coalesce(duration, 0))
+        FROM appointments WHERE doctor_id IS NOT NULL AND date IS NOT NULL
+        GROUP BY doctor_id, date
+    """)
+
+
+@contextmanager
+def bulk_appointment_summaries(conn):
+    # For bulk loads, like search.bulk_patient_indexing: the per-row insert
+    # trigger is replaced by one grouped upsert per batch. Yields
+    # summarize_since(after_id), to be called once the new appointments are
+    # inserted and before any of them are deleted again. The caller owns the
+    # transaction, so other connections never see the trigger missing.
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='trigger' AND name='appointments_summary_ai'"
+    ).fetchone()
+    if row:
+        conn.execute("DROP TRIGGER appointments_summary_ai")
+
+    def summarize_since(after_id):
+        if row:
+            conn.execute("""
+                INSERT INTO doctor_day_load (doctor_id, day, appointments, minutes)
+                SELECT doctor_id, date, COUNT(*), SUM(coalesce(duration, 0))
+                FROM appointments WHERE id > ? AND doctor_id IS NOT NULL AND date IS NOT NULL
+                GROUP BY doctor_id, date
+                ON CONFLICT (doctor_id, day) DO UPDATE
+                SET appointments = appointments + excluded.appointments, minutes = minutes + excluded.minutes
+            """, (after_id,))
+
+    try:
+        yield summarize_since
+    finally:
+        if row:
+            conn.execute(row[0])
+
+
+@contextmanager
+def bulk_row_counts(conn, table):
+    # The same for a counted table: one count per batch instead of one
+    # counter update per row. Yields count_since(after_id).
+    trigger = f"{table}_count_ai"
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name=?", (trigger,)).fetchone()
+    if row:
+        conn.execute(f"DROP TRIGGER {trigger}")
+
+    def count_since(after_id):
+        if row:
+            conn.execute(f"""
+                UPDATE row_counts SET rows = rows + (SELECT COUNT(*) FROM {table} WHERE id > ?)
+                WHERE name = ?
+            """, (after_id, table))
+
+    try:
+        yield count_since
+    finally:
+        if row:
+            conn.execute(row[0])
+
+
+class ReportRepository:
+    # Every query reads only the summary tables; day bounds are "YYYY-MM-DD",
+    # start inclusive and end exclusive
+    def __init__(self, db=None):
+        self.db = db or get_database()
+
+    def rebuild(self):
+        with self.db.transaction() as conn:
+            create_report_tables(conn)
+            rebuild_report_summaries(conn)
+            create_row_counts(conn)
+
+    def daily_revenue(self, start, end):
+        rows = self.db.fetch_all("""
+            SELECT day, bills, revenue FROM daily_revenue
+            WHERE day >= ? AND day < ? AND bills > 0
+            ORDER BY day
+        """, (start, end))
+        return [DailyRevenue(*row) for row in rows]
+
+    def monthly_revenue(self, start, end):
+        rows = self.db.fetch_all("""
+            SELECT substr(day, 1, 7), SUM(bills), round(SUM(revenue), 2) FROM daily_revenue
+            WHERE day >= ? AND day < ?
+            GROUP BY substr(day, 1, 7)
+            HAVING SUM(bills) > 0
+            ORDER BY 1
+        """, (start, end))
+        return [MonthlyRevenue(*row) for row in rows]
+
+    def top_patients(self, limit=10):
+        rows = self.db.fetch_all("""
+            SELECT r.patient_id, p.name, r.bills, r.revenue
+            FROM patient_revenue r
+            LEFT JOIN patients p ON p.id = r.patient_id
+            WHERE r.bills > 0
+            ORDER BY r.revenue DESC
+            LIMIT ?
+        """, (limit,))
+        return [PatientRevenue(*row) for row in rows]
+
+    def patient_revenue(self, patient_id):
+        row = self.db.fetch_one("SELECT bills, revenue FROM patient_revenue WHERE patient_id = ?", (patient_id,))
+        return row or (0, 0.0)
+
+    def row_count(self, table):
+        row = self.db.fetch_one("SELECT rows FROM row_counts WHERE name = ?", (table,))
+        return row[0] if row else 0
+
+    def day_revenue(self, day):
+        row = self.db.fetch_one("SELECT bills, revenue FROM daily_revenue WHERE day = ?", (day,))
+        return DailyRevenue(day, *row) if row else DailyRevenue(day, 0, 0.0)
+
+    def doctors_on_day(self, day):
+        rows = self.db.fetch_all("""
+            SELECT l.doctor_id, d.name, l.appointments, l.minutes
+            FROM doctor_day_load l
+            LEFT JOIN doctors d ON d.id = l.doctor_id
+            WHERE l.day = ? AND l.appointments > 0
+            ORDER BY l.appointments DESC, d.name
+        """, (day,))
+        return [DoctorLoad(*row) for row in rows]
+
+    def doctor_load(self, start, end):
+        rows = self.db.fetch_all("""
+            SELECT l.doctor_id, d.name, SUM(l.appointments), SUM(l.minutes)
+            FROM doctor_day_load l
+            LEFT JOIN doctors d ON d.id = l.doctor_id
+            WHERE l.day >= ? AND l.day < ?
+            GROUP BY l.doctor_id
+            HAVING SUM(l.appointments) > 0
+            ORDER BY SUM(l.appointments) DESC
+        """, (start, end))
+        return [DoctorLoad(*row) for row in rows]
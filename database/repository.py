@@ -0,0 +1,392 @@
+# database/repository.py
+import datetime
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+from database.cache import normalize_name
+from database.connection import get_database
+from database.events import APPOINTMENT, BILL, DELETE, DOCTOR, INSERT, PATIENT, UPDATE
+
+
+User = namedtuple("User", "id username")
+Patient = namedtuple("Patient", "id name age gender contact")
+Doctor = namedtuple("Doctor", "id name specialization email contact")
+# The displayed columns come first; patient_id and doctor_id let views find
+# the rows a patient or doctor change affects
+AppointmentRow = namedtuple(
+    "AppointmentRow", "id patient_name patient_contact doctor_name date time purpose patient_id doctor_id"
+)
+AppointmentSlot = namedtuple("AppointmentSlot", "id start_at end_at")
+WorkingHours = namedtuple("WorkingHours", "weekday start_minute end_minute")
+Bill = namedtuple("Bill", "id patient_id total date tax")
+BillItem = namedtuple("BillItem", "service qty unit_price line_total")
+ServiceRevenue = namedtuple("ServiceRevenue", "service qty revenue")
+
+
+# Appointment intervals are stored as sortable "YYYY-MM-DD HH:MM" text
+SLOT_FORMAT = "%Y-%m-%d %H:%M"
+DEFAULT_DURATION = 15
+MAX_DURATION = 8 * 60
+CENT = Decimal("0.01")
+
+
+class AppointmentConflict(Exception):
+    def __init__(self, conflict):
+        super().__init__(f"The doctor is already booked from {conflict.start_at} to {conflict.end_at}")
+        self.conflict = conflict
+
+
+def appointment_interval(date, time, duration):
+    try:
+        start = datetime.datetime.strptime(f"{date} {time}", SLOT_FORMAT)
+    except ValueError:
+        raise ValueError("Date must be YYYY-MM-DD and time HH:MM") from None
+    if not 0 < duration <= MAX_DURATION:
+        raise ValueError(f"Duration must be between 1 and {MAX_DURATION} minutes")
+    return start, start + datetime.timedelta(minutes=duration)
+
+
+class Repository:
+    def __init__(self, db=None):
+        self.db = db or get_database()
+
+
+class UserRepository(Repository):
+    def authenticate(self, username, password):
+        row = self.db.fetch_one(
+            "SELECT id, username FROM users WHERE username=? AND password=?",
+            (username, password)
+        )
+        return User(*row) if row else None
+
+
+class PatientRepository(Repository):
+    COLUMNS = "id, name, age, gender, contact"
+
+    def page(self, after_id, limit):
+        rows = self.db.fetch_all(
+            f"SELECT {self.COLUMNS} FROM patients WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        )
+        return [Patient(*row) for row in rows]
+
+    # get() and find_by_name() go through the shared record cache; load()
+    # always reads, and is what writes use to read back inside a transaction
+    def get(self, patient_id):
+        patient = self.db.records.get((PATIENT, patient_id))
+        if patient is None:
+            generation = self.db.records.generation
+            patient = self.load(patient_id)
+            if patient:
+                self.db.records.put(PATIENT, patient, generation)
+        return patient
+
+    def load(self, patient_id):
+        row = self.db.fetch_one(f"SELECT {self.COLUMNS} FROM patients WHERE id=?", (patient_id,))
+        return Patient(*row) if row else None
+
+    def find_by_name(self, name):
+        patient = self.db.records.get((PATIENT, normalize_name(name)))
+        if patient is None:
+            generation = self.db.records.generation
+            row = self.db.fetch_one(
+                f"SELECT {self.COLUMNS} FROM patients WHERE name = ? COLLATE NOCASE", (name,)
+            )
+            patient = Patient(*row) if row else None
+            if patient:
+                self.db.records.put(PATIENT, patient, generation, name)
+        return patient
+
+    def find(self, text):
+        # Front desk forms accept either the numeric id or the full name
+        text = text.strip()
+        if not text:
+            return None
+        if text.isdigit():
+            return self.get(int(text))
+        return self.find_by_name(text)
+
+    # add and update return the stored row, read back inside the write
+    # transaction, so views can patch that one row instead of reloading
+    def add(self, name, age, gender, contact):
+        with self.db.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO patients (name, age, gender, contact)
+                VALUES (?, ?, ?, ?)
+            """, (name, age, gender, contact))
+            self.db.changed(PATIENT, INSERT, cursor.lastrowid)
+            return self.load(cursor.lastrowid)
+
+    def update(self, patient_id, name, age, gender, contact):
+        with self.db.transaction() as conn:
+            conn.execute("""
+                UPDATE patients
+                SET name=?, age=?, gender=?, contact=?
+                WHERE id=?
+            """, (name, age, gender, contact, patient_id))
+            self.db.changed(PATIENT, UPDATE, patient_id)
+            return self.load(patient_id)
+
+    def delete(self, patient_id):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM patients WHERE id=?", (patient_id,))
+            self.db.changed(PATIENT, DELETE, patient_id)
+
+
+class DoctorRepository(Repository):
+    COLUMNS = "id, name, specialization, email, contact"
+
+    def page(self, after_id, limit):
+        rows = self.db.fetch_all(
+            f"SELECT {self.COLUMNS} FROM doctors WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        )
+        return [Doctor(*row) for row in rows]
+
+    def list_names(self):
+        return self.db.fetch_all("SELECT id, name FROM doctors")
+
+    def get(self, doctor_id):
+        doctor = self.db.records.get((DOCTOR, doctor_id))
+        if doctor is None:
+            generation = self.db.records.generation
+            doctor = self.load(doctor_id)
+            if doctor:
+                self.db.records.put(DOCTOR, doctor, generation)
+        return doctor
+
+    def load(self, doctor_id):
+        row = self.db.fetch_one(f"SELECT {self.COLUMNS} FROM doctors WHERE id=?", (doctor_id,))
+        return Doctor(*row) if row else None
+
+    # hours, when given, replace the working hours in the same transaction,
+    # so a doctor is never saved with the template it had before
+    def add(self, name, specialization, email, contact, hours=None):
+        with self.db.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO doctors (name, specialization, email, contact)
+                VALUES (?, ?, ?, ?)
+            """, (name, specialization, email, contact))
+            self.db.changed(DOCTOR, INSERT, cursor.lastrowid)
+            if hours is not None:
+                self.set_working_hours(cursor.lastrowid, hours)
+            return self.load(cursor.lastrowid)
+
+    def update(self, doctor_id, name, specialization, email, contact, hours=None):
+        with self.db.transaction() as conn:
+            cursor = conn.execute("""
+                UPDATE doctors
+                SET name=?, specialization=?, email=?, contact=?
+                WHERE id=?
+            """, (name, specialization, email, contact, doctor_id))
+            self.db.changed(DOCTOR, UPDATE, doctor_id)
+            if hours is not None and cursor.rowcount:
+                self.set_working_hours(doctor_id, hours)
+            return self.load(doctor_id)
+
+    def delete(self, doctor_id):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM doctor_hours WHERE doctor_id=?", (doctor_id,))
+            conn.execute("DELETE FROM doctors WHERE id=?", (doctor_id,))
+            self.db.changed(DOCTOR, DELETE, doctor_id)
+
+    def ids_by_specialization(self, specialization):
+        rows = self.db.fetch_all(
+            "SELECT id FROM doctors WHERE specialization = ? COLLATE NOCASE ORDER BY id", (specialization,)
+        )
+        return [row[0] for row in rows]
+
+    def working_hours(self, doctor_ids):
+        # {doctor_id: [WorkingHours, ...]}; doctors without a template are absent
+        hours = {}
+        doctor_ids = list(doctor_ids)
+        for i in range(0, len(doctor_ids), 500):
+            chunk = doctor_ids[i:i + 500]
+            rows = self.db.fetch_all(f"""
+                SELECT doctor_id, weekday, start_minute, end_minute FROM doctor_hours
+                WHERE doctor_id IN ({", ".join("?" * len(chunk))})
+                ORDER BY doctor_id, weekday, start_minute
+            """, chunk)
+            for doctor_id, *row in rows:
+                hours.setdefault(doctor_id, []).append(WorkingHours(*row))
+        return hours
+
+    def set_working_hours(self, doctor_id, hours):
+        # An empty list puts the doctor back on the default template
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM doctor_hours WHERE doctor_id=?", (doctor_id,))
+            conn.executemany("""
+                INSERT INTO doctor_hours (doctor_id, weekday, start_minute, end_minute)
+                VALUES (?, ?, ?, ?)
+            """, [(doctor_id, *h) for h in hours])
+            self.db.changed(DOCTOR, UPDATE, doctor_id)
+
+
+class AppointmentRepository(Repository):
+    # Outer joins keep pages full-sized: an appointment whose patient or
+    # doctor was deleted still occupies its id in the keyset order
+    ROW_SELECT = """
+        SELECT a.id, p.name, p.contact, d.name, a.date,
+               CASE WHEN a.end_at IS NULL THEN a.time ELSE a.time || ' - ' || substr(a.end_at, 12) END,
+               a.purpose, a.patient_id, a.doctor_id
+        FROM appointments a
+        LEFT JOIN patients p ON a.patient_id = p.id
+        LEFT JOIN doctors d ON a.doctor_id = d.id
+    """
+
+    def page(self, after_id, limit):
+        rows = self.db.fetch_all(self.ROW_SELECT + "WHERE a.id > ? ORDER BY a.id LIMIT ?", (after_id, limit))
+        return [AppointmentRow(*row) for row in rows]
+
+    def row(self, appointment_id):
+        row = self.db.fetch_one(self.ROW_SELECT + "WHERE a.id = ?", (appointment_id,))
+        return AppointmentRow(*row) if row else None
+
+    def list_all(self):
+        rows = self.db.fetch_all("""
+            SELECT a.id, p.name, p.contact, d.name, a.date,
+                   CASE WHEN a.end_at IS NULL THEN a.time ELSE a.time || ' - ' || substr(a.end_at, 12) END,
+                   a.purpose, a.patient_id, a.doctor_id
+            FROM appointments a
+            JOIN patients p ON a.patient_id = p.id
+            JOIN doctors d ON a.doctor_id = d.id
+        """)
+        return [AppointmentRow(*row) for row in rows]
+
+    def find_conflict(self, doctor_id, start, end, exclude_id=None, conn=None):
+        # No appointment is longer than MAX_DURATION, so only those starting
+        # in (start - MAX_DURATION, end) can overlap [start, end): a bounded
+        # range seek on idx_appointments_doctor_interval, not a history scan.
+        row = (conn or self.db.connection).execute("""
+            SELECT id, start_at, end_at FROM appointments
+            WHERE doctor_id = ? AND start_at > ? AND start_at < ? AND end_at > ? AND id IS NOT ?
+            ORDER BY start_at
+            LIMIT 1
+        """, (
+            doctor_id,
+            (start - datetime.timedelta(minutes=MAX_DURATION)).strftime(SLOT_FORMAT),
+            end.strftime(SLOT_FORMAT),
+            start.strftime(SLOT_FORMAT),
+            exclude_id,
+        )).fetchone()
+        return AppointmentSlot(*row) if row else None
+
+    def add(self, patient_id, doctor_id, date, time, purpose, duration=DEFAULT_DURATION,
+            allow_overlap=False):
+        start, end = appointment_interval(date, time, duration)
+        # BEGIN IMMEDIATE: two clerks booking the same slot are serialised, so
+        # the second one sees the first booking when it checks for conflicts
+        with self.db.transaction() as conn:
+            if not allow_overlap:
+                conflict = self.find_conflict(doctor_id, start, end, conn=conn)
+                if conflict:
+                    raise AppointmentConflict(conflict)
+            cursor = conn.execute("""
+                INSERT INTO appointments
+                    (patient_id, doctor_id, date, time, purpose, duration, start_at, end_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                patient_id, doctor_id, start.strftime("%Y-%m-%d"), start.strftime("%H:%M"), purpose,
+                duration, start.strftime(SLOT_FORMAT), end.strftime(SLOT_FORMAT)
+            ))
+            self.db.changed(APPOINTMENT, INSERT, cursor.lastrowid)
+            return self.row(cursor.lastrowid)
+
+    def delete(self, appointment_id):
+        # Returns (doctor_id, start_at, end_at) of the removed appointment, so
+        # callers can release the slot without reading it back
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT doctor_id, start_at, end_at FROM appointments WHERE id=?", (appointment_id,)
+            ).fetchone()
+            conn.execute("DELETE FROM appointments WHERE id=?", (appointment_id,))
+            if row:
+                self.db.changed(APPOINTMENT, DELETE, appointment_id)
+            return row
+
+    def busy_intervals(self, doctor_ids, start, end):
+        # (doctor_id, start_at, end_at) of appointments overlapping [start, end)
+        intervals = []
+        doctor_ids = list(doctor_ids)
+        lower = (start - datetime.timedelta(minutes=MAX_DURATION)).strftime(SLOT_FORMAT)
+        for i in range(0, len(doctor_ids), 500):
+            chunk = doctor_ids[i:i + 500]
+            intervals += self.db.fetch_all(f"""
+                SELECT doctor_id, start_at, end_at FROM appointments
+                WHERE doctor_id IN ({", ".join("?" * len(chunk))})
+                  AND start_at > ? AND start_at < ? AND end_at > ?
+            """, (*chunk, lower, end.strftime(SLOT_FORMAT), start.strftime(SLOT_FORMAT)))
+        return intervals
+
+
+class BillRepository(Repository):
+    def add(self, patient_id, items, date, tax=0.0):
+        # Header and line items are written in one transaction; the tax is
+        # kept on the header so the items are only the services billed. The
+        # total is added up in Decimal, as the bill editor does, so it is
+        # stored to the paisa rather than as a float sum (0.1 + 0.2).
+        total = sum((Decimal(str(item.line_total)) for item in items), Decimal(str(tax)))
+        total = float(total.quantize(CENT, rounding=ROUND_HALF_UP))
+        with self.db.transaction() as conn:
+            cursor = conn.execute("""
+                INSERT INTO bills (patient_id, total, date, tax)
+                VALUES (?, ?, ?, ?)
+            """, (patient_id, total, date, tax))
+            bill_id = cursor.lastrowid
+            conn.executemany("""
+                INSERT INTO bill_items (bill_id, service, qty, unit_price, line_total)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(bill_id, *item) for item in items])
+            self.db.changed(BILL, INSERT, bill_id)
+            return bill_id
+
+    def get(self, bill_id):
+        row = self.db.fetch_one("SELECT id, patient_id, total, date, tax FROM bills WHERE id=?", (bill_id,))
+        return Bill(*row) if row else None
+
+    def items(self, bill_id):
+        rows = self.db.fetch_all("""
+            SELECT service, qty, unit_price, line_total FROM bill_items
+            WHERE bill_id=? ORDER BY id
+        """, (bill_id,))
+        return [BillItem(*row) for row in rows]
+
+    def iter_bills(self, start=None, end=None, patient_ids=None, chunk_size=1000):
+        # Streams bills in id order one chunk at a time, so batch jobs never
+        # hold the whole table in memory
+        conditions = ["id > ?"]
+        params = []
+        if start:
+            conditions.append("date >= ?")
+            params.append(start)
+        if end:
+            conditions.append("date < ?")
+            params.append(end)
+        if patient_ids:
+            conditions.append(f"patient_id IN ({', '.join('?' * len(patient_ids))})")
+            params.extend(patient_ids)
+        sql = f"""
+            SELECT id, patient_id, total, date, tax FROM bills
+            WHERE {' AND '.join(conditions)}
+            ORDER BY id LIMIT ?
+        """
+        last_id = 0
+        while True:
+            rows = self.db.fetch_all(sql, (last_id, *params, chunk_size))
+            for row in rows:
+                yield Bill(*row)
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+
+    def revenue_by_service(self, start, end):
+        # start inclusive, end exclusive, both "YYYY-MM-DD"
+        rows = self.db.fetch_all("""
+            SELECT i.service, SUM(i.qty), SUM(i.line_total)
+            FROM bills b
+            JOIN bill_items i ON i.bill_id = b.id
+            WHERE b.date >= ? AND b.date < ?
+            GROUP BY i.service
+            ORDER BY SUM(i.line_total) DESC
+        """, (start, end))
+        return [ServiceRevenue(*row) for row in rows]
@@ -0,0 +1,210 @@
+# database/search.py
+import sqlite3
+from contextlib import contextmanager
+
+from database.cache import normalize_name
+from database.connection import get_database
+from database.repository import Patient, PatientRepository
+
+
+PATIENT_SEARCH_SCHEMA = (
+    "CREATE INDEX IF NOT EXISTS idx_patients_name_nocase ON patients(name COLLATE NOCASE)",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        name, content='patients', content_rowid='id', prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE OF name ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO patients_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+)
+
+# Substring ("contains") matching needs the trigram tokenizer, which only
+# ships with SQLite 3.34+. Older builds simply skip that tier.
+PATIENT_TRIGRAM_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_trigram USING fts5(
+        name, content='patients', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_trigram_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_trigram(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_trigram_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_trigram(patients_trigram, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_trigram_au AFTER UPDATE OF name ON patients BEGIN
+        INSERT INTO patients_trigram(patients_trigram, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO patients_trigram(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+)
+
+
+def table_exists(conn, name):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name=?", (name,)
+    ).fetchone() is not None
+
+
+def create_patient_search_index(conn):
+    # Safe to call repeatedly; the FTS tables are only back-filled when they
+    # are created for the first time. The caller owns the transaction.
+    if not table_exists(conn, "patients_fts"):
+        for statement in PATIENT_SEARCH_SCHEMA:
+            conn.execute(statement)
+        conn.execute("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')")
+    if not table_exists(conn, "patients_trigram") and has_trigram_tokenizer(conn):
+        for statement in PATIENT_TRIGRAM_SCHEMA:
+            conn.execute(statement)
+        conn.execute("INSERT INTO patients_trigram(patients_trigram) VALUES ('rebuild')")
+
+
+# Per-row insert triggers of each search table
+INSERT_TRIGGERS = {"patients_fts": "patients_fts_ai", "patients_trigram": "patients_trigram_ai"}
+
+
+@contextmanager
+def bulk_patient_indexing(conn):
+    # For bulk loads: the per-row insert triggers are swapped for one
+    # INSERT ... SELECT per search table, several times faster for thousands
+    # of rows. Yields index_since(after_id), to be called once the new
+    # patients are inserted. The caller owns the transaction, so other
+    # connections never see the triggers missing.
+    saved = []
+    for table, trigger in INSERT_TRIGGERS.items():
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name=?", (trigger,)).fetchone()
+        if row:
+            saved.append((table, trigger, row[0]))
+            conn.execute(f"DROP TRIGGER {trigger}")
+
+    def index_since(after_id):
+        for table, _, _ in saved:
+            conn.execute(f"INSERT INTO {table}(rowid, name) SELECT id, name FROM patients WHERE id > ?", (after_id,))
+
+    try:
+        yield index_since
+    finally:
+        for _, _, sql in saved:
+            conn.execute(sql)
+
+
+def has_trigram_tokenizer(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.trigram_probe USING fts5(x, tokenize='trigram')")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp.trigram_probe")
+    return True
+
+
+def fts_quote(token):
+    return '"' + token.replace('"', '""') + '"'
+
+
+class PatientSearch:
+    # Ranked typeahead over patient names. Results come in tiers:
+    #   1. exact id (numeric input)
+    #   2. full name starts with the text (NOCASE index range scan)
+    #   3. every word of the text is a prefix of some word in the name
+    #   4. the text appears anywhere in the name (trigram index)
+    # Each tier is a bounded indexed lookup, so the cost depends on the
+    # number of suggestions rather than the number of patients.
+    COLUMNS = "p.id, p.name, p.age, p.gender, p.contact"
+    RANK_CANDIDATES = 200
+
+    def __init__(self, db=None):
+        self.db = db or get_database()
+        self.patients = PatientRepository(self.db)
+        self.has_fts = None
+        self.has_trigram = None
+
+    def check_index(self):
+        # The migrations build the search tables (create_patient_search_index);
+        # this only reads which of them exist, so the first keystroke never
+        # takes the write lock. Tiers whose table is missing are skipped.
+        reader = self.db.reader
+        self.has_fts = table_exists(reader, "patients_fts")
+        self.has_trigram = table_exists(reader, "patients_trigram")
+
+    def suggest(self, text, limit=10):
+        text = " ".join(text.split())
+        if not text:
+            return []
+        if self.has_fts is None:
+            self.check_index()
+
+        results = []
+        seen = set()
+
+        def take(rows):
+            for row in rows:
+                if row[0] not in seen and len(results) < limit:
+                    seen.add(row[0])
+                    results.append(Patient(*row))
+
+        if text.isdigit():
+            patient = self.patients.get(int(text))
+            if patient:
+                take([patient])
+
+        take(self.name_prefix(text, limit))
+        if len(results) < limit and self.has_fts:
+            take(self.token_prefix(text, limit + len(seen)))
+        if len(results) < limit and self.has_trigram and len(text) >= 3:
+            take(self.contains(text, limit + len(seen)))
+        return results
+
+    def name_prefix(self, text, limit):
+        # NOCASE compares lower-cased, so the bound is built from the
+        # lower-cased text: "LIZ" needs "li{", not "LI["
+        folded = normalize_name(text)
+        upper = folded[:-1] + chr(ord(folded[-1]) + 1)
+        return self.db.fetch_all(f"""
+            SELECT {self.COLUMNS} FROM patients p
+            WHERE p.name >= ? COLLATE NOCASE AND p.name < ? COLLATE NOCASE
+            ORDER BY p.name COLLATE NOCASE
+            LIMIT ?
+        """, (text, upper, limit))
+
+    def token_prefix(self, text, limit):
+        # Best bm25 match first: fewer other words in the name, rarer words
+        # matched. Ranking every match of a common surname takes ~100ms at 1M
+        # patients; ranking only the first RANK_CANDIDATES keeps it under 10ms.
+        query = " ".join(fts_quote(token) + "*" for token in text.split())
+        return self.db.fetch_all(f"""
+            SELECT {self.COLUMNS} FROM (
+                SELECT rowid, rank FROM patients_fts
+                WHERE patients_fts MATCH ?
+                LIMIT ?
+            ) f
+            JOIN patients p ON p.id = f.rowid
+            ORDER BY f.rank, p.id
+            LIMIT ?
+        """, (query, self.RANK_CANDIDATES, limit))
+
+    def contains(self, text, limit):
+        return self.db.fetch_all(f"""
+            SELECT {self.COLUMNS} FROM patients_trigram t
+            JOIN patients p ON p.id = t.rowid
+            WHERE patients_trigram MATCH ?
+            LIMIT ?
+        """, (fts_quote(text), limit))
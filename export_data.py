@@ -0,0 +1,79 @@
+# export_data.py
+#
+# Streams records out of the database as CSV or JSON Lines, without the GUI:
+#
+#   python export_data.py appointments --from 2026-10-01 --to 2026-10-31 --out october.csv
+#   python export_data.py bills --format jsonl --out bills.jsonl.gz
+#
+# Appointments include patient and doctor names; bills include their line
+# items. Output ending in .gz is gzip-compressed, and --out - writes to
+# standard output. Memory use stays the same however many rows are exported.
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+from database.connection import Database, get_database, set_database
+from database.migrations import migrate
+from services.exporter import CHUNK_SIZE, DATASETS, FORMATS, Exporter
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def progress_printer(interval=1.0):
+    # At most one progress line per interval
+    last = time.perf_counter()
+
+    def progress(dataset, rows):
+        nonlocal last
+        now = time.perf_counter()
+        if now - last >= interval:
+            last = now
+            print(f"  {dataset}: {rows} rows", file=sys.stderr)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export patients, doctors, appointments or bills")
+    parser.add_argument("dataset", choices=list(DATASETS))
+    parser.add_argument("--out", required=True, help="output file, .gz to compress, - for standard output")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file name, else csv")
+    parser.add_argument("--gzip", action="store_true", help="compress even without a .gz name")
+    parser.add_argument("--from", dest="start", type=parse_date, help="first date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=parse_date, help="last date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--db", help="database file (default: db/hospital.db)")
+    args = parser.parse_args(argv)
+
+    if (args.start or args.end) and DATASETS[args.dataset].date_column is None:
+        parser.error(f"{args.dataset} cannot be filtered by date")
+    fmt = args.format or ("jsonl" if ".jsonl" in os.path.basename(args.out) else "csv")
+
+    if args.db:
+        set_database(Database(os.path.abspath(args.db)))
+    migrate(get_database().connection)
+
+    exporter = Exporter(chunk_size=args.chunk_size, progress=progress_printer())
+    try:
+        result = exporter.run(
+            args.dataset, args.out, fmt,
+            start=args.start.isoformat() if args.start else None,
+            end=(args.end + datetime.timedelta(days=1)).isoformat() if args.end else None,
+            compress=args.gzip or None
+        )
+    except (OSError, ValueError) as e:
+        print(f"{args.dataset}: {e}", file=sys.stderr)
+        return 2
+
+    rate = result.rows / result.elapsed if result.elapsed else 0.0
+    records = f" ({result.records} {args.dataset})" if result.records != result.rows else ""
+    print(f"Exported {result.rows} rows{records} in {result.elapsed:.1f}s ({rate:,.0f} rows/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
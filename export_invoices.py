@@ -0,0 +1,116 @@
+# export_invoices.py
+#
+# Re-issues invoice PDFs without the GUI, e.g. for month-end statements:
+#
+#   python export_invoices.py --from 2026-10-01 --to 2026-10-31 --out statements/
+#   python export_invoices.py --patients 12 40 41 --out statements/
+#
+# Bills are streamed from the database and rendered in parallel by worker
+# processes on Qt's offscreen platform, so no display is needed.
+
+import argparse
+import csv
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from database.connection import Database, get_database, set_database
+from database.migrations import migrate
+from database.repository import BillRepository
+from services.invoice_templates import DEFAULT_TEMPLATE, TEMPLATES
+from services.invoices import default_render_workers, render_in_worker, render_pool
+
+
+def shard_dir(out_dir, bill):
+    # <out>/<YYYY-MM>/<bill id / 1000>/ keeps any one directory small
+    month = (bill.date or "unknown")[:7]
+    return os.path.join(out_dir, month, f"{bill.id // 1000:05d}")
+
+
+def export(bills, out_dir, workers=None, in_flight=None, template=DEFAULT_TEMPLATE):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, "manifest.csv")
+    workers = workers or default_render_workers()
+    executor = render_pool(get_database().path, workers)
+    # Only a bounded window of bills is queued at a time
+    in_flight = in_flight or workers * 4
+    pending = {}
+    done = failed = 0
+    start = time.perf_counter()
+
+    with open(manifest_path, "w", newline="", encoding="utf-8") as manifest_file:
+        manifest = csv.writer(manifest_file)
+        manifest.writerow(["bill_id", "patient_id", "date", "total", "status", "path"])
+
+        def collect(futures):
+            nonlocal done, failed
+            for future in futures:
+                bill = pending.pop(future)
+                try:
+                    path, status = future.result(), "ok"
+                    done += 1
+                except Exception as exc:
+                    path, status = "", f"error: {exc}"
+                    failed += 1
+                manifest.writerow([bill.id, bill.patient_id, bill.date, f"{bill.total:.2f}", status,
+                                   os.path.relpath(path, out_dir) if path else ""])
+            total = done + failed
+            if total and total % 500 == 0:
+                rate = total / (time.perf_counter() - start)
+                print(f"  {total} invoices, {rate:.1f}/s", file=sys.stderr)
+
+        with executor:
+            for bill in bills:
+                if len(pending) >= in_flight:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                future = executor.submit(render_in_worker, bill.id, shard_dir(out_dir, bill), f"Bill_{bill.id}.pdf", template)
+                pending[future] = bill
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+    elapsed = time.perf_counter() - start
+    return done, failed, elapsed, manifest_path
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch export invoice PDFs")
+    parser.add_argument("--from", dest="start", type=parse_date, help="first bill date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=parse_date, help="last bill date, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--patients", type=int, nargs="+", help="only bills for these patient ids")
+    parser.add_argument("--out", default="statements", help="output directory")
+    parser.add_argument("--template", choices=sorted(TEMPLATES), default=DEFAULT_TEMPLATE)
+    parser.add_argument("--workers", type=int, help="render processes (default: CPU count - 1)")
+    parser.add_argument("--db", help="database file (default: db/hospital.db)")
+    args = parser.parse_args(argv)
+
+    if not (args.start or args.end or args.patients):
+        parser.error("give a date range (--from/--to) and/or --patients")
+
+    if args.db:
+        set_database(Database(os.path.abspath(args.db)))
+    migrate(get_database().connection)
+
+    bills = BillRepository().iter_bills(
+        start=args.start.isoformat() if args.start else None,
+        end=(args.end + datetime.timedelta(days=1)).isoformat() if args.end else None,
+        patient_ids=args.patients
+    )
+    done, failed, elapsed, manifest_path = export(bills, os.path.abspath(args.out), args.workers,
+                                                  template=args.template)
+
+    rate = done / elapsed if elapsed else 0.0
+    print(f"Exported {done} invoices ({failed} failed) in {elapsed:.1f}s, {rate:.1f} invoices/s")
+    print(f"Manifest: {manifest_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
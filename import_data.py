@@ -0,0 +1,73 @@
+# import_data.py
+#
+# Bulk-loads CSV files without the GUI, e.g. when onboarding a branch:
+#
+#   python import_data.py --patients patients.csv --doctors doctors.csv --appointments appointments.csv
+#
+# Files are imported in the order patients, doctors, appointments, so
+# appointments can refer to patients and doctors from the same run by id or
+# by exact name. Rejected rows are written next to each input as
+# <name>.rejected.csv with their line number and reason.
+
+import argparse
+import os
+import sys
+import time
+
+from database.connection import Database, get_database, set_database
+from database.migrations import migrate
+from services.importer import BATCH_SIZE, ENTITIES, CsvImporter, CsvImportError
+
+
+def progress_printer(interval=1.0):
+    # At most one progress line per interval, plus the final one
+    last = 0.0
+
+    def progress(entity, read, imported, rejected, fraction):
+        nonlocal last
+        now = time.perf_counter()
+        if now - last >= interval or fraction >= 1.0:
+            last = now
+            print(f"  {entity}: {read} rows read, {imported} imported, {rejected} rejected ({fraction:.0%})",
+                  file=sys.stderr)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import patients, doctors and appointments from CSV")
+    for entity in ENTITIES:
+        parser.add_argument(f"--{entity}", metavar="CSV", help=f"{entity} file")
+    parser.add_argument("--allow-overlap", action="store_true",
+                        help="import appointments even when the doctor is already booked")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--db", help="database file (default: db/hospital.db)")
+    args = parser.parse_args(argv)
+
+    files = [(entity, getattr(args, entity)) for entity in ENTITIES if getattr(args, entity)]
+    if not files:
+        parser.error("give at least one of --patients, --doctors, --appointments")
+
+    if args.db:
+        set_database(Database(os.path.abspath(args.db)))
+    migrate(get_database().connection)
+
+    importer = CsvImporter(batch_size=args.batch_size, allow_overlap=args.allow_overlap,
+                           progress=progress_printer())
+    rejected = 0
+    for entity, path in files:
+        try:
+            result = importer.run(entity, path)
+        except (OSError, CsvImportError) as e:
+            print(f"{entity}: {e}", file=sys.stderr)
+            return 2
+        rate = result.read / result.elapsed if result.elapsed else 0.0
+        print(f"{entity}: imported {result.imported} of {result.read} rows in {result.elapsed:.1f}s "
+              f"({rate:,.0f} rows/s), {result.rejected} rejected")
+        if result.rejects_path:
+            print(f"  rejected rows: {result.rejects_path}")
+        rejected += result.rejected
+    return 1 if rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,31 @@
+import atexit
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
+from database.connection import INSTRUMENT_QUERIES, get_database
+from database.instrumentation import get_query_stats
+from database.migrations import migrate
+from services.api_client import SERVER_URL
+from services.watchdog import get_watchdog
 from ui.login import LoginWindow
 
 def main():
     app = QApplication(sys.argv)
+    if INSTRUMENT_QUERIES:
+        # logs/query_report.txt always holds the statistics of the last session
+        atexit.register(get_query_stats().dump)
+    if os.environ.get("HMS_WATCHDOG", "1") != "0":
+        get_watchdog().start()
+    if not SERVER_URL:
+        # In server mode the server owns the file and migrates it
+        migrate(get_database().connection)
     window = LoginWindow()
     window.show()
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        # Invoice rendering spawns worker processes from the frozen executable
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
@@ -0,0 +1,45 @@
+# rebuild_reports.py
+#
+# Recomputes the report summaries (daily revenue, revenue per patient,
+# appointments per doctor and day, the dashboard's patient count) from the
+# base tables:
+#
+#   python rebuild_reports.py [--db db/hospital.db]
+#
+# The summaries are kept current by triggers and back-filled when the schema
+# is upgraded, so this is only needed after rows were written with the
+# triggers dropped, or to check the summaries against the base tables.
+
+import argparse
+import os
+import sys
+import time
+
+from database.connection import Database, get_database, set_database
+from database.migrations import migrate
+from database.reports import SUMMARY_TABLES, ReportRepository
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the report summary tables")
+    parser.add_argument("--db", help="database file (default: db/hospital.db)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        set_database(Database(os.path.abspath(args.db)))
+    db = get_database()
+    migrate(db.connection)
+
+    start = time.perf_counter()
+    ReportRepository(db).rebuild()
+    elapsed = time.perf_counter() - start
+    for table in SUMMARY_TABLES:
+        print(f"  {table}: {db.fetch_one(f'SELECT COUNT(*) FROM {table}')[0]} rows")
+    for name, rows in db.fetch_all("SELECT name, rows FROM row_counts ORDER BY name"):
+        print(f"  row_counts: {name} = {rows}")
+    print(f"Rebuilt report summaries in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# serve_api.py
+#
+# Runs the optional server mode: this process owns the database and serves
+# patients, doctors, appointments and billing as JSON on localhost:
+#
+#   python serve_api.py [--db db/hospital.db] [--port 8765] [--readers 4]
+#
+# Desktop clients started with HMS_SERVER_URL=http://127.0.0.1:8765 then go
+# through it instead of opening the database file (services/api_client.py).
+
+import argparse
+import os
+import sys
+
+from database.connection import Database, get_database, set_database
+from database.migrations import migrate
+from services import api_server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the hospital database as a JSON API on localhost")
+    parser.add_argument("--db", help="database file (default: db/hospital.db)")
+    parser.add_argument("--port", type=int, default=api_server.PORT,
+                        help=f"port on {api_server.HOST} (default {api_server.PORT}; 0 picks a free one)")
+    parser.add_argument("--readers", type=int, default=api_server.READERS,
+                        help=f"read connections (default {api_server.READERS})")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        set_database(Database(os.path.abspath(args.db)))
+    db = get_database()
+    migrate(db.connection)
+
+    def ready(server):
+        print(f"Serving {db.path} on http://{api_server.HOST}:{server.port} ({args.readers} readers)", flush=True)
+
+    try:
+        api_server.run(db, args.port, args.readers, ready)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+# services/api_client.py
+#
+# Client side of the server mode (services/api_server.py). When
+# HMS_SERVER_URL is set, e.g. http://127.0.0.1:8765, the login box and the
+# patient, doctor, appointment and billing windows get these remote
+# repositories from open_repository() instead of ones reading the database
+# file. They have the same methods and return the same namedtuples, so the
+# windows do not know the difference. Writes made here are announced on the
+# local change bus as they return; a feed thread long-polls the server for
+# everyone else's.
+import datetime
+import json
+import os
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from database.events import APPOINTMENT, BILL, DELETE, DOCTOR, INSERT, PATIENT, UPDATE, ChangeEvent, get_change_bus
+from database.repository import (
+    DEFAULT_DURATION, SLOT_FORMAT, AppointmentConflict, AppointmentRepository, AppointmentRow, AppointmentSlot, Bill,
+    BillItem, BillRepository, Doctor, DoctorRepository, Patient, PatientRepository, User, UserRepository,
+    WorkingHours
+)
+from database.search import PatientSearch
+from services.availability import get_availability
+
+SERVER_URL = os.environ.get("HMS_SERVER_URL")
+TIMEOUT = 30
+# Below the server's limit, so a quiet feed returns before the socket times out
+LONG_POLL_SECONDS = 20
+FEED_RETRY_SECONDS = 1.0
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, payload=None):
+        super().__init__(message)
+        self.status = status
+        self.payload = payload
+
+
+class ApiClient:
+    # One keep-alive HTTP connection per thread, like Database's connections
+    def __init__(self, url, timeout=TIMEOUT):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        # Lets the server leave this client's own writes out of its feed
+        self.client_id = os.urandom(16).hex()
+        self._local = threading.local()
+        self._feed = None
+
+    def _connection(self):
+        import http.client
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def request(self, method, path, params=None, body=None):
+        # http.client is imported on first use: it and the email package it
+        # loads add ~40ms to the start-up of every client, server mode or not
+        import http.client
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        data = None if body is None else json.dumps(body).encode()
+        headers = {"X-Client-Id": self.client_id, "Content-Type": "application/json"}
+        # A kept-alive connection the server has dropped fails on first use;
+        # only reads are sent again, a write may already have happened
+        attempts = 2 if method == "GET" else 1
+        for attempt in range(attempts):
+            conn = self._connection()
+            try:
+                conn.request(method, path, data, headers)
+                response = conn.getresponse()
+                payload = response.read()
+                break
+            except (OSError, http.client.HTTPException) as error:
+                conn.close()
+                self._local.conn = None
+                if attempt == attempts - 1:
+                    raise ApiError(None, f"server unavailable: {error}") from error
+        result = json.loads(payload) if payload else None
+        if response.status >= 400:
+            message = result.get("error") if isinstance(result, dict) else response.reason
+            raise ApiError(response.status, message, result)
+        return result
+
+    def get(self, path, **params):
+        return self.request("GET", path, params)
+
+    def changed(self, entity, op, row_id):
+        get_change_bus().publish([ChangeEvent(entity, op, row_id)])
+
+    def start_feed(self):
+        if self._feed is None:
+            self._feed = threading.Thread(target=self.follow_changes, name="api-changes", daemon=True)
+            self._feed.start()
+
+    def follow_changes(self):
+        # Runs on its own thread with its own connection, forever
+        seq = None
+        while True:
+            try:
+                if seq is None:
+                    seq = self.get("/changes")["seq"]
+                    continue
+                result = self.get("/changes", after=seq, wait=LONG_POLL_SECONDS)
+            except ApiError:
+                time.sleep(FEED_RETRY_SECONDS)
+                continue
+            seq = result["seq"]
+            if result["events"]:
+                get_change_bus().publish([ChangeEvent(*event) for event in result["events"]])
+
+
+def to_row(cls, values):
+    return None if values is None else cls(*values)
+
+
+class RemoteUserRepository:
+    def __init__(self, client):
+        self.client = client
+
+    def authenticate(self, username, password):
+        return to_row(User, self.client.request("POST", "/login", body={
+            "username": username, "password": password
+        }))
+
+
+class RemotePatientRepository:
+    def __init__(self, client):
+        self.client = client
+
+    def page(self, after_id, limit):
+        return [Patient(*values) for values in self.client.get("/patients", after=after_id, limit=limit)]
+
+    def get(self, patient_id):
+        return to_row(Patient, self.client.get(f"/patients/{patient_id}"))
+
+    load = get
+
+    def find(self, text):
+        text = text.strip()
+        return to_row(Patient, self.client.get("/patients/find", q=text)) if text else None
+
+    find_by_name = find
+
+    def add(self, name, age, gender, contact):
+        patient = Patient(*self.client.request("POST", "/patients", body={
+            "name": name, "age": age, "gender": gender, "contact": contact
+        }))
+        self.client.changed(PATIENT, INSERT, patient.id)
+        return patient
+
+    def update(self, patient_id, name, age, gender, contact):
+        patient = to_row(Patient, self.client.request("PUT", f"/patients/{patient_id}", body={
+            "name": name, "age": age, "gender": gender, "contact": contact
+        }))
+        self.client.changed(PATIENT, UPDATE, patient_id)
+        return patient
+
+    def delete(self, patient_id):
+        self.client.request("DELETE", f"/patients/{patient_id}")
+        self.client.changed(PATIENT, DELETE, patient_id)
+
+
+class RemotePatientSearch:
+    def __init__(self, client):
+        self.client = client
+
+    def suggest(self, text, limit=10):
+        return [Patient(*values) for values in self.client.get("/patients/suggest", q=text, limit=limit)]
+
+
+class RemoteDoctorRepository:
+    def __init__(self, client):
+        self.client = client
+
+    def page(self, after_id, limit):
+        return [Doctor(*values) for values in self.client.get("/doctors", after=after_id, limit=limit)]
+
+    def list_names(self):
+        return [tuple(values) for values in self.client.get("/doctors/names")]
+
+    def get(self, doctor_id):
+        return to_row(Doctor, self.client.get(f"/doctors/{doctor_id}"))
+
+    load = get
+
+    def add(self, name, specialization, email, contact, hours=None):
+        doctor = Doctor(*self.client.request("POST", "/doctors", body={
+            "name": name, "specialization": specialization, "email": email, "contact": contact,
+            "hours": None if hours is None else [list(h) for h in hours]
+        }))
+        self.client.changed(DOCTOR, INSERT, doctor.id)
+        return doctor
+
+    def update(self, doctor_id, name, specialization, email, contact, hours=None):
+        doctor = to_row(Doctor, self.client.request("PUT", f"/doctors/{doctor_id}", body={
+            "name": name, "specialization": specialization, "email": email, "contact": contact,
+            "hours": None if hours is None else [list(h) for h in hours]
+        }))
+        self.client.changed(DOCTOR, UPDATE, doctor_id)
+        return doctor
+
+    def delete(self, doctor_id):
+        self.client.request("DELETE", f"/doctors/{doctor_id}")
+        self.client.changed(DOCTOR, DELETE, doctor_id)
+
+    def working_hours(self, doctor_ids):
+        hours = self.client.get("/doctors/hours", ids=",".join(str(doctor_id) for doctor_id in doctor_ids))
+        return {int(doctor_id): [WorkingHours(*h) for h in rows] for doctor_id, rows in hours.items()}
+
+    def set_working_hours(self, doctor_id, hours):
+        self.client.request("PUT", f"/doctors/{doctor_id}/hours", body={"hours": [list(h) for h in hours]})
+        self.client.changed(DOCTOR, UPDATE, doctor_id)
+
+
+class RemoteAppointmentRepository:
+    def __init__(self, client):
+        self.client = client
+
+    def page(self, after_id, limit):
+        return [AppointmentRow(*values) for values in self.client.get("/appointments", after=after_id, limit=limit)]
+
+    def row(self, appointment_id):
+        return to_row(AppointmentRow, self.client.get(f"/appointments/{appointment_id}"))
+
+    def add(self, patient_id, doctor_id, date, time, purpose, duration=DEFAULT_DURATION,
+            allow_overlap=False):
+        try:
+            values = self.client.request("POST", "/appointments", body={
+                "patient_id": patient_id, "doctor_id": doctor_id, "date": date, "time": time,
+                "purpose": purpose, "duration": duration, "allow_overlap": allow_overlap
+            })
+        except ApiError as error:
+            if error.status == 409:
+                raise AppointmentConflict(AppointmentSlot(*error.payload["conflict"])) from None
+            if error.status == 400:
+                raise ValueError(str(error)) from None
+            raise
+        appointment = AppointmentRow(*values)
+        self.client.changed(APPOINTMENT, INSERT, appointment.id)
+        return appointment
+
+    def delete(self, appointment_id):
+        removed = self.client.request("DELETE", f"/appointments/{appointment_id}")
+        if removed:
+            self.client.changed(APPOINTMENT, DELETE, appointment_id)
+        return None if removed is None else tuple(removed)
+
+
+class RemoteBillRepository:
+    def __init__(self, client):
+        self.client = client
+
+    def add(self, patient_id, items, date, tax=0.0):
+        bill_id = self.client.request("POST", "/bills", body={
+            "patient_id": patient_id, "items": [list(item) for item in items], "date": date, "tax": tax
+        })
+        self.client.changed(BILL, INSERT, bill_id)
+        return bill_id
+
+    def get(self, bill_id):
+        return to_row(Bill, self.client.get(f"/bills/{bill_id}"))
+
+    def items(self, bill_id):
+        return [BillItem(*values) for values in self.client.get(f"/bills/{bill_id}/items")]
+
+
+class RemoteAvailability:
+    # The server keeps the availability cache; bookings update it there
+    def __init__(self, client):
+        self.client = client
+
+    def free_slots(self, doctor_id, start, end_date, duration, limit=10):
+        slots = self.client.get(f"/doctors/{doctor_id}/free-slots", start=start.strftime(SLOT_FORMAT),
+                                end=end_date.isoformat(), duration=duration, limit=limit)
+        return [datetime.datetime.strptime(slot, SLOT_FORMAT) for slot in slots]
+
+    def first_free_by_specialization(self, specialization, start, end_date, duration):
+        found = self.client.get("/free-slot", specialization=specialization, start=start.strftime(SLOT_FORMAT),
+                                end=end_date.isoformat(), duration=duration)
+        return None if found is None else (datetime.datetime.strptime(found[0], SLOT_FORMAT), found[1])
+
+    def booked(self, doctor_id, start, end):
+        pass
+
+    def released(self, doctor_id, start, end):
+        pass
+
+
+REMOTE_REPOSITORIES = {
+    UserRepository: RemoteUserRepository,
+    PatientRepository: RemotePatientRepository,
+    DoctorRepository: RemoteDoctorRepository,
+    AppointmentRepository: RemoteAppointmentRepository,
+    BillRepository: RemoteBillRepository,
+}
+
+
+_api_client = None
+
+
+def get_api_client():
+    global _api_client
+    if _api_client is None:
+        _api_client = ApiClient(SERVER_URL)
+        _api_client.start_feed()
+    return _api_client
+
+
+def open_repository(cls):
+    # What the windows use in place of cls(): the repository class itself
+    # against the database file, or its remote twin in server mode
+    if SERVER_URL:
+        return REMOTE_REPOSITORIES[cls](get_api_client())
+    return cls()
+
+
+def open_patient_search():
+    if SERVER_URL:
+        return RemotePatientSearch(get_api_client())
+    return PatientSearch()
+
+
+def open_availability():
+    if SERVER_URL:
+        return RemoteAvailability(get_api_client())
+    return get_availability()
@@ -0,0 +1,534 @@
+# services/api_server.py
+#
+# Optional server mode: one process owns the database and serves patients,
+# doctors, appointments and billing to the desktop clients as JSON over HTTP
+# on localhost (services/api_client.py is the client side). asyncio and the
+# standard library only:
+#   - reads run on a small pool of threads, each with its own read-only
+#     connection, so a slow read never holds up the event loop;
+#   - writes go through one queue to a single writer thread, so clients never
+#     contend for SQLite's write lock;
+#   - GET responses are cached by URL until a write touches one of the
+#     entities they were read from, and a hit is answered on the event loop
+#     without touching the database.
+# Rows travel as JSON arrays in the field order of the repository's
+# namedtuples; a missing row is null. Logins and the dashboard counters are
+# served too, so a client needs no database file at all.
+import asyncio
+import datetime
+import json
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+from database.connection import get_database
+from database.events import APPOINTMENT, BILL, BULK, DOCTOR, INSERT, PATIENT, ChangeEvent, get_change_bus
+from database.reports import ReportRepository
+from database.repository import (
+    DEFAULT_DURATION, SLOT_FORMAT, AppointmentConflict, AppointmentRepository, BillItem, BillRepository,
+    DoctorRepository, PatientRepository, UserRepository, WorkingHours
+)
+from database.search import PatientSearch
+from services.availability import SLOT_MINUTES, AvailabilityEngine, parse_slot
+from services.live_counters import read_snapshot
+
+# Clients on other machines are not served: the API has no authentication
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("HMS_API_PORT", "8765"))
+READERS = int(os.environ.get("HMS_API_READERS", "4"))
+RESPONSE_CACHE_SIZE = int(os.environ.get("HMS_API_CACHE", "2000"))
+# Writers wait for a place in the queue beyond this, instead of piling up
+WRITE_QUEUE_SIZE = 256
+PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+MAX_BODY = 1 << 20
+# Events kept for clients catching up through /changes
+CHANGE_LOG_SIZE = 10000
+LONG_POLL_SECONDS = 25
+# How often the writer looks for commits made without the server
+EXTERNAL_CHECK_SECONDS = 0.5
+
+ENTITIES = (PATIENT, DOCTOR, APPOINTMENT, BILL)
+
+# Response cache tags: (entity, ROW) in a route stands for the row whose id
+# is in the URL; (entity, EXISTING) for rows joined in from another table
+ROW = "row"
+EXISTING = "existing"
+TAG_HISTORY = 10000
+
+READ = "read"
+WRITE = "write"
+# Answered on the event loop itself
+LOOP = "loop"
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def encode(value):
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+class ResponseCache:
+    # Encoded GET responses by URL, each tagged with what it was read from:
+    #   entity             any change to the entity (lists, searches)
+    #   (entity, id)       that one row
+    #   (entity, EXISTING) an update or delete of any row (joined columns)
+    # so adding a patient drops the patient lists but not every cached
+    # patient. Only the event loop touches it. A read that overlapped a write
+    # to one of its tags is not stored, like the record cache
+    # (database/cache.py).
+    def __init__(self, capacity=RESPONSE_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._urls = {}
+        # Tag -> version of its last invalidation. Forgotten when it grows
+        # past TAG_HISTORY; reads started before the floor are not stored.
+        self.version = 0
+        self._changed = {}
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url):
+        entry = self._entries.get(url)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(url)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, url, tags, body, version):
+        if version < self._floor or any(self._last_change(tag) > version for tag in tags):
+            return
+        self._entries[url] = (tags, body)
+        self._entries.move_to_end(url)
+        for tag in tags:
+            self._urls.setdefault(tag, set()).add(url)
+        while len(self._entries) > self.capacity:
+            self._remove(next(iter(self._entries)))
+
+    def _last_change(self, tag):
+        if isinstance(tag, tuple):
+            return max(self._changed.get(tag, 0), self._changed.get((tag[0], BULK), 0))
+        return self._changed.get(tag, 0)
+
+    def _remove(self, url):
+        tags, _ = self._entries.pop(url)
+        for tag in tags:
+            urls = self._urls.get(tag)
+            urls.discard(url)
+            if not urls:
+                del self._urls[tag]
+
+    def invalidate(self, events):
+        self.version += 1
+        if len(self._changed) > TAG_HISTORY:
+            self._changed = {}
+            self._floor = self.version
+        tags = set()
+        for event in events:
+            tags.add(event.entity)
+            if event.op == BULK:
+                tags.add((event.entity, BULK))
+                tags.update(tag for tag in self._urls if isinstance(tag, tuple) and tag[0] == event.entity)
+            else:
+                tags.add((event.entity, event.id))
+                if event.op != INSERT:
+                    tags.add((event.entity, EXISTING))
+        for tag in tags:
+            self._changed[tag] = self.version
+            for url in list(self._urls.get(tag, ())):
+                self._remove(url)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ApiServer:
+    def __init__(self, db=None, readers=READERS, cache_size=RESPONSE_CACHE_SIZE):
+        self.db = db or get_database()
+        self.patients = PatientRepository(self.db)
+        self.doctors = DoctorRepository(self.db)
+        self.appointments = AppointmentRepository(self.db)
+        self.bills = BillRepository(self.db)
+        self.users = UserRepository(self.db)
+        self.reports = ReportRepository(self.db)
+        self.search = PatientSearch(self.db)
+        self.availability = AvailabilityEngine(self.db)
+        self.reader_count = readers
+        self.cache = ResponseCache(cache_size)
+        self.changes = deque(maxlen=CHANGE_LOG_SIZE)
+        self.change_seq = 0
+        self.requests = 0
+        self.writes = 0
+        # Set on the writer thread while a client's write runs, so its events
+        # are not sent back to the client that made them
+        self._origin = None
+        self._data_version = None
+        self._server = None
+        self._tasks = []
+
+        patients = (PATIENT,)
+        doctors = (DOCTOR,)
+        # Appointment rows carry patient and doctor names
+        names = ((PATIENT, EXISTING), (DOCTOR, EXISTING))
+        routes = (
+            ("GET", r"/patients", self.patient_page, READ, patients),
+            ("GET", r"/patients/find", self.patient_find, READ, patients),
+            ("GET", r"/patients/suggest", self.patient_suggest, READ, patients),
+            ("GET", r"/patients/(\d+)", self.patient_get, READ, ((PATIENT, ROW),)),
+            ("POST", r"/patients", self.patient_add, WRITE, None),
+            ("PUT", r"/patients/(\d+)", self.patient_update, WRITE, None),
+            ("DELETE", r"/patients/(\d+)", self.patient_delete, WRITE, None),
+            ("GET", r"/doctors", self.doctor_page, READ, doctors),
+            ("GET", r"/doctors/names", self.doctor_names, READ, doctors),
+            ("GET", r"/doctors/hours", self.doctor_hours, READ, doctors),
+            ("GET", r"/doctors/(\d+)", self.doctor_get, READ, ((DOCTOR, ROW),)),
+            ("GET", r"/doctors/(\d+)/free-slots", self.free_slots, READ, ((DOCTOR, ROW), APPOINTMENT)),
+            ("GET", r"/free-slot", self.first_free_slot, READ, (DOCTOR, APPOINTMENT)),
+            ("POST", r"/doctors", self.doctor_add, WRITE, None),
+            ("PUT", r"/doctors/(\d+)", self.doctor_update, WRITE, None),
+            ("DELETE", r"/doctors/(\d+)", self.doctor_delete, WRITE, None),
+            ("PUT", r"/doctors/(\d+)/hours", self.doctor_set_hours, WRITE, None),
+            ("GET", r"/appointments", self.appointment_page, READ, (APPOINTMENT, *names)),
+            ("GET", r"/appointments/(\d+)", self.appointment_get, READ, ((APPOINTMENT, ROW), *names)),
+            ("POST", r"/appointments", self.appointment_add, WRITE, None),
+            ("DELETE", r"/appointments/(\d+)", self.appointment_delete, WRITE, None),
+            ("POST", r"/bills", self.bill_add, WRITE, None),
+            ("GET", r"/bills/(\d+)", self.bill_get, READ, ((BILL, ROW),)),
+            ("GET", r"/bills/(\d+)/items", self.bill_items, READ, ((BILL, ROW),)),
+            ("GET", r"/counters", self.counters, READ, (PATIENT, (DOCTOR, EXISTING), APPOINTMENT, BILL)),
+            # Queued like a write so the password travels in the body, never
+            # in a URL or the response cache
+            ("POST", r"/login", self.login, WRITE, None),
+            ("GET", r"/changes", self.changes_since, LOOP, None),
+            ("GET", r"/status", self.status, LOOP, None),
+        )
+        self.routes = [(method, re.compile(path), handler, kind, tags)
+                       for method, path, handler, kind, tags in routes]
+
+    # Reads, on the reader pool
+
+    def patient_page(self, params):
+        return self.patients.page(*page_bounds(params))
+
+    def patient_find(self, params):
+        return self.patients.find(params.get("q", ""))
+
+    def patient_suggest(self, params):
+        return self.search.suggest(params.get("q", ""), int(params.get("limit", 10)))
+
+    def patient_get(self, params, patient_id):
+        return self.patients.get(patient_id)
+
+    def doctor_page(self, params):
+        return self.doctors.page(*page_bounds(params))
+
+    def doctor_names(self, params):
+        return self.doctors.list_names()
+
+    def doctor_hours(self, params):
+        ids = [int(part) for part in params.get("ids", "").split(",") if part]
+        return self.doctors.working_hours(ids)
+
+    def doctor_get(self, params, doctor_id):
+        return self.doctors.get(doctor_id)
+
+    def free_slots(self, params, doctor_id):
+        start = parse_slot(params["start"])
+        end_date = datetime.date.fromisoformat(params["end"])
+        slots = self.availability.free_slots(
+            doctor_id, start, end_date, int(params.get("duration", SLOT_MINUTES)), int(params.get("limit", 10))
+        )
+        return [slot.strftime(SLOT_FORMAT) for slot in slots]
+
+    def first_free_slot(self, params):
+        start = parse_slot(params["start"])
+        end_date = datetime.date.fromisoformat(params["end"])
+        found = self.availability.first_free_by_specialization(
+            params["specialization"], start, end_date, int(params.get("duration", SLOT_MINUTES))
+        )
+        return None if found is None else [found[0].strftime(SLOT_FORMAT), found[1]]
+
+    def appointment_page(self, params):
+        return self.appointments.page(*page_bounds(params))
+
+    def appointment_get(self, params, appointment_id):
+        return self.appointments.row(appointment_id)
+
+    def bill_get(self, params, bill_id):
+        return self.bills.get(bill_id)
+
+    def bill_items(self, params, bill_id):
+        return self.bills.items(bill_id)
+
+    def counters(self, params):
+        return read_snapshot(self.reports, params["day"])
+
+    # Writes, on the writer thread
+
+    def patient_add(self, body):
+        return self.patients.add(body["name"], body["age"], body["gender"], body["contact"])
+
+    def patient_update(self, body, patient_id):
+        return self.patients.update(patient_id, body["name"], body["age"], body["gender"], body["contact"])
+
+    def patient_delete(self, body, patient_id):
+        self.patients.delete(patient_id)
+
+    def doctor_add(self, body):
+        return self.doctors.add(
+            body["name"], body["specialization"], body["email"], body["contact"], working_hours(body)
+        )
+
+    def doctor_update(self, body, doctor_id):
+        return self.doctors.update(
+            doctor_id, body["name"], body["specialization"], body["email"], body["contact"], working_hours(body)
+        )
+
+    def doctor_delete(self, body, doctor_id):
+        self.doctors.delete(doctor_id)
+
+    def doctor_set_hours(self, body, doctor_id):
+        self.doctors.set_working_hours(doctor_id, [WorkingHours(*hours) for hours in body["hours"]])
+
+    def appointment_add(self, body):
+        return self.appointments.add(
+            body["patient_id"], body["doctor_id"], body["date"], body["time"], body["purpose"],
+            body.get("duration", DEFAULT_DURATION), body.get("allow_overlap", False)
+        )
+
+    def appointment_delete(self, body, appointment_id):
+        return self.appointments.delete(appointment_id)
+
+    def login(self, body):
+        return self.users.authenticate(body["username"], body["password"])
+
+    def bill_add(self, body):
+        return self.bills.add(body["patient_id"], [BillItem(*item) for item in body["items"]], body["date"],
+                              body.get("tax", 0.0))
+
+    # Answered on the event loop
+
+    async def changes_since(self, params):
+        # Long poll: waits up to `wait` seconds for events from other clients.
+        # Without `after` it only reports where the log currently ends.
+        if "after" not in params:
+            return {"seq": self.change_seq, "events": []}
+        after = int(params["after"])
+        oldest = self.changes[0][0] if self.changes else self.change_seq + 1
+        if after < oldest - 1:
+            # The client fell behind the log; everything may have changed
+            return {"seq": self.change_seq, "events": [[entity, BULK, None] for entity in ENTITIES]}
+        client = params.get("client")
+        deadline = time.monotonic() + min(float(params.get("wait", 0)), LONG_POLL_SECONDS)
+        while True:
+            events = [list(event) for seq, origin, event in self.changes if seq > after and origin != client]
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return {"seq": self.change_seq, "events": events}
+            # Only wait for events logged from here on
+            after = self.change_seq
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def status(self, params):
+        return {
+            "requests": self.requests,
+            "writes": self.writes,
+            "write_queue": self.write_queue.qsize(),
+            "readers": self.reader_count,
+            "cache": {"entries": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses},
+            "change_seq": self.change_seq,
+        }
+
+    # Plumbing
+
+    async def start(self, host=HOST, port=PORT):
+        self.loop = asyncio.get_running_loop()
+        self.readers = ThreadPoolExecutor(self.reader_count, thread_name_prefix="api-read")
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="api-write")
+        self.write_queue = asyncio.Queue(WRITE_QUEUE_SIZE)
+        self._changed = asyncio.Event()
+        get_change_bus().subscribe(self.on_changes)
+        get_change_bus().subscribe(self.availability.on_changes)
+        await self.loop.run_in_executor(self.writer, self.check_external_writes)
+        self._tasks = [asyncio.create_task(self.write_loop()), asyncio.create_task(self.watch_external_writes())]
+        self._server = await asyncio.start_server(self.handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        get_change_bus().unsubscribe(self.on_changes)
+        get_change_bus().unsubscribe(self.availability.on_changes)
+        self.readers.shutdown()
+        self.writer.shutdown()
+
+    async def handle(self, reader, writer):
+        # HTTP/1.1 with keep-alive; requests on one connection are answered
+        # in order
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    self.respond(writer, 413, encode({"error": "request body too large"}), False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, target, headers.get("x-client-id"), body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self.respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, writer, status, payload, keep_alive):
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload
+        )
+
+    async def dispatch(self, method, target, client, body):
+        self.requests += 1
+        url = urlsplit(target)
+        allowed = False
+        for route_method, pattern, handler, kind, tags in self.routes:
+            match = pattern.fullmatch(url.path)
+            if match:
+                allowed = True
+                if route_method == method:
+                    break
+        else:
+            return (405, encode({"error": "method not allowed"})) if allowed else (404, encode({"error": "not found"}))
+
+        args = [int(group) for group in match.groups()]
+        try:
+            if kind == LOOP:
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                params["client"] = client
+                return 200, encode(await handler(params))
+            if kind == READ:
+                cached = self.cache.get(target)
+                if cached is not None:
+                    return 200, cached
+                version = self.cache.version
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                payload = encode(await self.loop.run_in_executor(self.readers, partial(handler, params, *args)))
+                tags = tuple((tag[0], args[0]) if isinstance(tag, tuple) and tag[1] == ROW else tag for tag in tags)
+                self.cache.put(target, tags, payload, version)
+                return 200, payload
+            job = partial(handler, json.loads(body) if body else {}, *args)
+            self.writes += 1
+            return 200, encode(await self.write(client, job))
+        except AppointmentConflict as error:
+            return 409, encode({"error": str(error), "conflict": list(error.conflict)})
+        except KeyError as error:
+            return 400, encode({"error": f"missing {error}"})
+        except (ValueError, TypeError) as error:
+            return 400, encode({"error": str(error)})
+        except Exception as error:
+            return 500, encode({"error": f"{type(error).__name__}: {error}"})
+
+    async def write(self, client, job):
+        future = self.loop.create_future()
+        await self.write_queue.put((client, job, future))
+        return await future
+
+    async def write_loop(self):
+        while True:
+            client, job, future = await self.write_queue.get()
+            try:
+                result = await self.loop.run_in_executor(self.writer, self.run_write, client, job)
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    def run_write(self, client, job):
+        self._origin = client
+        try:
+            return job()
+        finally:
+            self._origin = None
+
+    async def watch_external_writes(self):
+        # Queued like any write, so the check runs on the writer's connection
+        while True:
+            await asyncio.sleep(EXTERNAL_CHECK_SECONDS)
+            await self.write(None, self.check_external_writes)
+
+    def check_external_writes(self):
+        # The writer connection's data_version moves only when some other
+        # connection commits: an import, a rebuild, a desktop still opening
+        # the file directly. Nothing says what changed, so every entity is
+        # reported changed.
+        version = self.db.connection.execute("PRAGMA data_version").fetchone()[0]
+        if self._data_version is not None and version != self._data_version:
+            self.db.publish([ChangeEvent(entity, BULK, None) for entity in ENTITIES])
+        self._data_version = version
+
+    def on_changes(self, events):
+        # Called on the committing thread
+        self.loop.call_soon_threadsafe(self.log_changes, self._origin, events)
+
+    def log_changes(self, origin, events):
+        for event in events:
+            self.change_seq += 1
+            self.changes.append((self.change_seq, origin, event))
+        self.cache.invalidate(events)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+def working_hours(body):
+    # Optional on doctor saves; absent leaves the stored hours alone
+    hours = body.get("hours")
+    return None if hours is None else [WorkingHours(*h) for h in hours]
+
+
+def page_bounds(params):
+    return int(params.get("after", 0)), min(int(params.get("limit", PAGE_SIZE)), MAX_PAGE_SIZE)
+
+
+def run(db=None, port=PORT, readers=READERS, ready=None):
+    # Blocks until interrupted; ready(server) is called once it listens
+    async def main():
+        server = await ApiServer(db, readers).start(HOST, port)
+        if ready:
+            ready(server)
+        await server.serve_forever()
+
+    asyncio.run(main())
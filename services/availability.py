@@ -0,0 +1,265 @@
+# services/availability.py
+#
+# Free-slot search over doctors' working hours. Each doctor-day is an int
+# bitmap of 15-minute slots (bit i = minutes i*15 .. i*15+15); working hours
+# and bookings are combined with a few integer operations, so finding a run
+# of free slots never touches the appointment history outside the window
+# asked for. Day bitmaps are cached and kept current by booked()/released();
+# a change to PRAGMA data_version (another connection wrote) drops the cache,
+# and the change bus drops it for doctor edits and bulk appointment writes.
+# The bus calls in on whichever thread committed, so the cache is only ever
+# touched under the engine's lock.
+import datetime
+import re
+import threading
+
+from database.events import APPOINTMENT, BULK, DELETE, DOCTOR, get_change_bus
+from database.repository import AppointmentRepository, DoctorRepository, WorkingHours
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY = datetime.timedelta(days=1)
+
+# Monday to Saturday, 09:00-17:00
+DEFAULT_WORKING_HOURS = [WorkingHours(weekday, 9 * 60, 17 * 60) for weekday in range(6)]
+
+# Bound on cached doctor-days before the cache is dropped and rebuilt
+MAX_CACHED_DAYS = 200000
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+_HOURS_PART = re.compile(
+    r"^(?P<first>[A-Za-z]{3})(?:\s*-\s*(?P<last>[A-Za-z]{3}))?\s+"
+    r"(?P<start>\d{1,2}:\d{2})\s*-\s*(?P<end>\d{1,2}:\d{2})$"
+)
+
+
+def _minutes(text):
+    hours, minutes = text.split(":")
+    value = int(hours) * 60 + int(minutes)
+    if not 0 <= value <= 24 * 60 or int(minutes) >= 60:
+        raise ValueError(f"Invalid time {text}")
+    return value
+
+
+def parse_working_hours(text):
+    # "Mon-Fri 09:00-17:00, Sat 09:00-13:00" -> [WorkingHours, ...]
+    hours = []
+    for part in filter(None, (p.strip() for p in text.replace(";", ",").split(","))):
+        match = _HOURS_PART.match(part)
+        if not match:
+            raise ValueError(f"Cannot read working hours '{part}'; use e.g. Mon-Fri 09:00-17:00")
+        try:
+            first = WEEKDAYS.index(match["first"].title())
+            last = WEEKDAYS.index((match["last"] or match["first"]).title())
+        except ValueError:
+            raise ValueError(f"Unknown weekday in '{part}'") from None
+        start, end = _minutes(match["start"]), _minutes(match["end"])
+        if start >= end or first > last:
+            raise ValueError(f"Empty range in '{part}'")
+        hours += [WorkingHours(weekday, start, end) for weekday in range(first, last + 1)]
+    return hours
+
+
+def format_working_hours(hours):
+    # Inverse of parse_working_hours; consecutive days with equal hours merge
+    groups = []
+    for h in sorted(hours):
+        span = f"{h.start_minute // 60:02d}:{h.start_minute % 60:02d}-{h.end_minute // 60:02d}:{h.end_minute % 60:02d}"
+        if groups and groups[-1][2] == span and groups[-1][1] == h.weekday - 1:
+            groups[-1][1] = h.weekday
+        else:
+            groups.append([h.weekday, h.weekday, span])
+    return ", ".join(
+        f"{WEEKDAYS[first]}{'-' + WEEKDAYS[last] if last != first else ''} {span}" for first, last, span in groups
+    )
+
+
+def slot_mask(start_minute, end_minute):
+    # Every slot touched by [start_minute, end_minute)
+    first = start_minute // SLOT_MINUTES
+    last = min(SLOTS_PER_DAY, -(-end_minute // SLOT_MINUTES))
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+
+def runs(free, length):
+    # Bit i survives when slots i .. i+length-1 are all free
+    result = free
+    for shift in range(1, length):
+        result &= free >> shift
+    return result
+
+
+def parse_slot(text):
+    return datetime.datetime(int(text[:4]), int(text[5:7]), int(text[8:10]), int(text[11:13]), int(text[14:16]))
+
+
+class AvailabilityEngine:
+    def __init__(self, db=None):
+        self.appointments = AppointmentRepository(db)
+        self.doctors = DoctorRepository(db)
+        self.db = self.appointments.db
+        self._hours = {}
+        self._busy = {}
+        self._cached_days = 0
+        self._data_version = None
+        self._lock = threading.RLock()
+
+    def _check_data_version(self):
+        # Asked on this thread's write connection, whose own commits do not
+        # move it: bookings made here are already applied through booked()
+        version = self.db.connection.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._hours = {}
+            self._busy = {}
+            self._cached_days = 0
+
+    def hours_changed(self, doctor_id):
+        with self._lock:
+            self._hours.pop(doctor_id, None)
+
+    def on_changes(self, events):
+        with self._lock:
+            for event in events:
+                if event.op == BULK and event.entity in (DOCTOR, APPOINTMENT):
+                    self.clear()
+                elif event.entity == DOCTOR:
+                    self.hours_changed(event.id)
+                    if event.op == DELETE and self._busy.pop(event.id, None) is not None:
+                        self._cached_days = sum(len(days) for days in self._busy.values())
+
+    def _hour_masks(self, doctor_ids):
+        missing = [doctor_id for doctor_id in doctor_ids if doctor_id not in self._hours]
+        if missing:
+            templates = self.doctors.working_hours(missing)
+            for doctor_id in missing:
+                masks = [0] * 7
+                for h in templates.get(doctor_id) or DEFAULT_WORKING_HOURS:
+                    masks[h.weekday] |= slot_mask(h.start_minute, h.end_minute)
+                self._hours[doctor_id] = masks
+        return self._hours
+
+    def _busy_days(self, doctor_ids, first_day, last_day):
+        days = [first_day + i * DAY for i in range((last_day - first_day).days + 1)]
+        missing = [
+            doctor_id for doctor_id in doctor_ids
+            if any(day not in self._busy.get(doctor_id, ()) for day in days)
+        ]
+        if missing:
+            if self._cached_days + len(missing) * len(days) > MAX_CACHED_DAYS:
+                # Starting over drops the doctors that were fully cached too
+                self._busy = {}
+                self._cached_days = 0
+                missing = list(doctor_ids)
+            for doctor_id in missing:
+                cached = self._busy.setdefault(doctor_id, {})
+                for day in days:
+                    if day not in cached:
+                        self._cached_days += 1
+                    cached[day] = 0
+            start = datetime.datetime.combine(first_day, datetime.time())
+            intervals = self.appointments.busy_intervals(missing, start, start + len(days) * DAY)
+            for doctor_id, start_at, end_at in intervals:
+                self._mark(doctor_id, parse_slot(start_at), parse_slot(end_at))
+        return self._busy
+
+    def _mark(self, doctor_id, start, end):
+        cached = self._busy.get(doctor_id)
+        if not cached:
+            return
+        day = start.date()
+        while datetime.datetime.combine(day, datetime.time()) < end:
+            if day in cached:
+                first = start.hour * 60 + start.minute if day == start.date() else 0
+                last = end.hour * 60 + end.minute if day == end.date() else 24 * 60
+                cached[day] |= slot_mask(first, last)
+            day += DAY
+
+    def booked(self, doctor_id, start, end):
+        # Called after a booking made through this process
+        with self._lock:
+            self._mark(doctor_id, start, end)
+
+    def released(self, doctor_id, start, end):
+        # Another booking may still cover part of the slot, so the affected
+        # days are reloaded on the next query instead of having bits cleared
+        with self._lock:
+            cached = self._busy.get(doctor_id)
+            if not cached:
+                return
+            day = start.date()
+            while datetime.datetime.combine(day, datetime.time()) < end:
+                if cached.pop(day, None) is not None:
+                    self._cached_days -= 1
+                day += DAY
+
+    def _candidates(self, doctor_id, day, length, not_before):
+        free = self._hours[doctor_id][day.weekday()] & ~self._busy[doctor_id][day]
+        candidates = runs(free, length)
+        if day == not_before.date():
+            minutes = not_before.hour * 60 + not_before.minute
+            candidates &= ~((1 << -(-minutes // SLOT_MINUTES)) - 1)
+        return candidates
+
+    def free_slots(self, doctor_id, start, end_date, duration=SLOT_MINUTES, limit=10):
+        # Start times of the first `limit` free slots from `start` through end_date
+        length = -(-duration // SLOT_MINUTES)
+        with self._lock:
+            self._check_data_version()
+            self._hour_masks([doctor_id])
+            self._busy_days([doctor_id], start.date(), end_date)
+            slots = []
+            day = start.date()
+            while day <= end_date and len(slots) < limit:
+                candidates = self._candidates(doctor_id, day, length, start)
+                midnight = datetime.datetime.combine(day, datetime.time())
+                while candidates and len(slots) < limit:
+                    lowest = candidates & -candidates
+                    slots.append(midnight + datetime.timedelta(minutes=(lowest.bit_length() - 1) * SLOT_MINUTES))
+                    candidates ^= lowest
+                day += DAY
+            return slots
+
+    def first_free(self, doctor_ids, start, end_date, duration=SLOT_MINUTES):
+        # Earliest (start time, doctor_id) any of the doctors can take, or None
+        doctor_ids = list(doctor_ids)
+        if not doctor_ids:
+            return None
+        length = -(-duration // SLOT_MINUTES)
+        with self._lock:
+            self._check_data_version()
+            self._hour_masks(doctor_ids)
+            self._busy_days(doctor_ids, start.date(), end_date)
+            day = start.date()
+            while day <= end_date:
+                best = None
+                for doctor_id in doctor_ids:
+                    candidates = self._candidates(doctor_id, day, length, start)
+                    if candidates:
+                        slot = (candidates & -candidates).bit_length() - 1
+                        if best is None or slot < best[0]:
+                            best = (slot, doctor_id)
+                if best:
+                    midnight = datetime.datetime.combine(day, datetime.time())
+                    return midnight + datetime.timedelta(minutes=best[0] * SLOT_MINUTES), best[1]
+                day += DAY
+            return None
+
+    def first_free_by_specialization(self, specialization, start, end_date, duration=SLOT_MINUTES):
+        return self.first_free(self.doctors.ids_by_specialization(specialization), start, end_date, duration)
+
+
+_availability = None
+
+
+def get_availability():
+    # Shared so the appointment and doctor windows see the same cache
+    global _availability
+    if _availability is None:
+        _availability = AvailabilityEngine()
+        get_change_bus().subscribe(_availability.on_changes)
+    return _availability
@@ -0,0 +1,207 @@
+# services/exporter.py
+#
+# Streams patients, doctors, appointments and bills out of the database as
+# CSV or JSON Lines, optionally gzip-compressed. Each export is one query
+# read with fetchmany, so only a chunk of rows is in memory at a time however
+# large the table is, and the whole file comes from a single read snapshot.
+# Appointments carry their patient and doctor names; bills carry their line
+# items, one CSV row per item or one JSON object per bill with an item list.
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+from database.connection import get_database
+
+FORMATS = ["csv", "jsonl"]
+CHUNK_SIZE = 5000
+# gzip's default level 9 costs several times more CPU for a few % smaller files
+GZIP_LEVEL = 6
+
+# header: CSV columns and JSON keys of each row, in select order
+# date_column: what --from/--to filter on, or None when it cannot be filtered
+# nested: JSON objects group rows on the leading columns, the rest become a list
+Dataset = namedtuple("Dataset", "header sql date_column nested")
+
+DATASETS = {
+    "patients": Dataset(
+        ["id", "name", "age", "gender", "contact", "address", "date_of_admission"],
+        "SELECT id, name, age, gender, contact, address, date_of_admission FROM patients p",
+        "p.date_of_admission", None
+    ),
+    "doctors": Dataset(
+        ["id", "name", "specialization", "email", "contact"],
+        "SELECT id, name, specialization, email, contact FROM doctors d",
+        None, None
+    ),
+    "appointments": Dataset(
+        ["id", "date", "time", "duration", "patient_id", "patient", "doctor_id", "doctor",
+         "specialization", "purpose"],
+        """
+        SELECT a.id, a.date, a.time, a.duration, a.patient_id, p.name, a.doctor_id, d.name,
+               d.specialization, a.purpose
+        FROM appointments a
+        LEFT JOIN patients p ON p.id = a.patient_id
+        LEFT JOIN doctors d ON d.id = a.doctor_id
+        """,
+        "a.date", None
+    ),
+    "bills": Dataset(
+        ["bill_id", "date", "patient_id", "patient", "total", "tax", "service", "qty", "unit_price", "line_total"],
+        """
+        SELECT b.id, b.date, b.patient_id, p.name, b.total, b.tax, i.service, i.qty, i.unit_price, i.line_total
+        FROM bills b
+        LEFT JOIN patients p ON p.id = b.patient_id
+        LEFT JOIN bill_items i ON i.bill_id = b.id
+        """,
+        "b.date", (6, "items")
+    ),
+}
+
+# Every order is one an index or the table itself already provides, so rows
+# stream straight out of the query with no sort held in memory first
+# (tests/test_query_plans.py checks this). Appointments follow
+# idx_appointments_date and bills idx_bills_date, whose trailing rowid gives
+# the id order within a day, so a --from/--to range is a seek on the same
+# index; idx_bill_items_bill then keeps each bill's items together in order.
+ORDER_BY = {
+    "patients": "p.id",
+    "doctors": "d.id",
+    "appointments": "a.date, a.id",
+    "bills": "b.date, b.id, i.id",
+}
+
+ExportResult = namedtuple("ExportResult", "dataset rows records elapsed path")
+
+
+def output_path_is_gzip(path):
+    return path.endswith(".gz")
+
+
+def open_output(path, compress):
+    # newline="" leaves line endings to the csv module
+    if compress:
+        return gzip.open(path, "wt", compresslevel=GZIP_LEVEL, encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_query(name, start=None, end=None):
+    # start inclusive, end exclusive, both "YYYY-MM-DD"
+    dataset = DATASETS[name]
+    conditions, params = [], []
+    if (start or end) and dataset.date_column is None:
+        raise ValueError(f"{name} cannot be filtered by date")
+    if start:
+        conditions.append(f"{dataset.date_column} >= ?")
+        params.append(start)
+    if end:
+        conditions.append(f"{dataset.date_column} < ?")
+        params.append(end)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"{dataset.sql}{where} ORDER BY {ORDER_BY[name]}", params
+
+
+class Exporter:
+    def __init__(self, db=None, chunk_size=CHUNK_SIZE, progress=None):
+        self.db = db or get_database()
+        self.chunk_size = chunk_size
+        # progress(dataset, rows) after each chunk, on the exporting thread
+        self.progress = progress
+
+    def chunks(self, name, start=None, end=None):
+        sql, params = export_query(name, start, end)
+        cursor = self.db.reader.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+    def run(self, name, path, fmt="csv", start=None, end=None, compress=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format {fmt!r}")
+        if compress is None:
+            compress = output_path_is_gzip(path)
+        if compress and path == "-":
+            raise ValueError("gzip output needs a file")
+        began = time.perf_counter()
+        # Written under a temporary name, so a failed export never leaves a
+        # truncated file where a complete one is expected
+        partial = None if path == "-" else f"{path}.part"
+        out = open_output(partial, compress) if partial else sys.stdout
+        try:
+            write = getattr(self, f"write_{fmt}")
+            rows, records = write(name, out, self.chunks(name, start, end))
+        except BaseException:
+            if partial:
+                out.close()
+                os.remove(partial)
+            raise
+        if partial:
+            out.close()
+            os.replace(partial, path)
+        else:
+            out.flush()
+        return ExportResult(name, rows, records, time.perf_counter() - began, path)
+
+    def report(self, name, rows):
+        if self.progress:
+            self.progress(name, rows)
+
+    def write_csv(self, name, out, chunks):
+        writer = csv.writer(out)
+        writer.writerow(DATASETS[name].header)
+        rows = 0
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+            self.report(name, rows)
+        return rows, rows
+
+    def write_jsonl(self, name, out, chunks):
+        dataset = DATASETS[name]
+        if dataset.nested:
+            return self.write_nested_jsonl(name, out, chunks)
+        header = dataset.header
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        rows = 0
+        for chunk in chunks:
+            out.write("".join([dumps(dict(zip(header, row))) + "\n" for row in chunk]))
+            rows += len(chunk)
+            self.report(name, rows)
+        return rows, rows
+
+    def write_nested_jsonl(self, name, out, chunks):
+        # Rows of one parent are adjacent (ordered on its own columns first), so a
+        # parent is written as soon as a row of the next one arrives. LEFT
+        # JOIN gives a parent without children one row of NULLs.
+        dataset = DATASETS[name]
+        split, key = dataset.nested
+        parent_keys, child_keys = dataset.header[:split], dataset.header[split:]
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        current = None
+        rows = records = 0
+        for chunk in chunks:
+            lines = []
+            for row in chunk:
+                if current is None or row[0] != current[parent_keys[0]]:
+                    if current is not None:
+                        lines.append(dumps(current) + "\n")
+                        records += 1
+                    current = dict(zip(parent_keys, row[:split]))
+                    current[key] = []
+                if row[split] is not None:
+                    current[key].append(dict(zip(child_keys, row[split:])))
+            out.write("".join(lines))
+            rows += len(chunk)
+            self.report(name, rows)
+        if current is not None:
+            out.write(dumps(current) + "\n")
+            records += 1
+        return rows, records
@@ -0,0 +1,339 @@
+# services/importer.py
+#
+# Streams CSV files of patients, doctors or appointments into the database.
+# Each file passes through a validating generator; the rows it accepts are
+# written with executemany in batches, many batches per transaction, and
+# patient/doctor references are resolved from maps loaded once per import
+# instead of a query per row. Rows that fail validation are reported with
+# their line number and reason and never stop the import.
+import csv
+import datetime
+import os
+import time
+from collections import namedtuple
+from itertools import islice
+
+from database.cache import normalize_name
+from database.connection import get_database
+from database.events import APPOINTMENT, BULK, DOCTOR, PATIENT
+from database.reports import bulk_appointment_summaries, bulk_row_counts
+from database.repository import DEFAULT_DURATION, MAX_DURATION
+from database.search import bulk_patient_indexing
+
+ENTITIES = ["patients", "doctors", "appointments"]
+ENTITY_EVENTS = {"patients": PATIENT, "doctors": DOCTOR, "appointments": APPOINTMENT}
+
+# Header names accepted for each column, in the order the rows are built
+COLUMNS = {
+    "patients": [("name",), ("age",), ("gender",), ("contact",)],
+    "doctors": [("name",), ("specialization",), ("email",), ("contact",)],
+    "appointments": [("patient", "patient_id"), ("doctor", "doctor_id"), ("date",), ("time",),
+                     ("duration",), ("purpose",)],
+}
+REQUIRED = {
+    "patients": {"name"},
+    "doctors": {"name", "specialization"},
+    "appointments": {"patient", "doctor", "date", "time"},
+}
+
+BATCH_SIZE = 5000
+TRANSACTION_ROWS = 100000
+# Rejections kept in memory for display; all of them go to the rejects file
+MAX_KEPT_REJECTS = 1000
+
+ImportResult = namedtuple("ImportResult", "entity read imported rejected elapsed rejects_path")
+Rejection = namedtuple("Rejection", "line reason row")
+
+
+class CsvImportError(Exception):
+    pass
+
+
+def default_rejects_path(path):
+    root, _ = os.path.splitext(path)
+    return root + ".rejected.csv"
+
+
+def column_indexes(entity, header):
+    # Position of each column in the file; absent optional columns point
+    # one past the end, where every row gets an empty value appended
+    header = [name.strip().lower() for name in header]
+    indexes = []
+    for aliases in COLUMNS[entity]:
+        found = next((header.index(alias) for alias in aliases if alias in header), None)
+        if found is None and aliases[0] in REQUIRED[entity]:
+            raise CsvImportError(f"The {entity} file needs a '{aliases[0]}' column")
+        indexes.append(len(header) if found is None else found)
+    return indexes, len(header)
+
+
+class References:
+    # Resolves "12" or "Jane Doe" to an id the way PatientRepository.find
+    # does (exact NOCASE name, lowest id first), from one scan of the table
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.ids = None
+        self.names = None
+
+    def resolve(self, text):
+        if text.isdigit():
+            if self.ids is None:
+                self.ids = {row[0] for row in self.db.fetch_all(f"SELECT id FROM {self.table}")}
+            value = int(text)
+            return value if value in self.ids else None
+        if self.names is None:
+            # Highest id first, so the lowest id of a shared name wins
+            rows = self.db.fetch_all(f"SELECT id, name FROM {self.table} ORDER BY id DESC")
+            self.names = {normalize_name(name): row_id for row_id, name in rows}
+        return self.names.get(normalize_name(text))
+
+
+class _CountingLines:
+    # Wraps a text file for csv.reader and counts characters consumed, which
+    # gives the progress fraction without a separate pass over the file
+    def __init__(self, f):
+        self.f = f
+        self.consumed = 0
+
+    def __iter__(self):
+        for line in self.f:
+            self.consumed += len(line)
+            yield line
+
+
+class CsvImporter:
+    def __init__(self, db=None, batch_size=BATCH_SIZE, transaction_rows=TRANSACTION_ROWS,
+                 allow_overlap=False, progress=None):
+        self.db = db or get_database()
+        self.batch_size = batch_size
+        self.transaction_rows = transaction_rows
+        self.allow_overlap = allow_overlap
+        # progress(entity, read, imported, rejected, fraction) after each batch
+        self.progress = progress
+        self.cancelled = False
+        self.rejections = []
+
+    def cancel(self):
+        # Stops after the current batch; what was already written is kept
+        self.cancelled = True
+
+    def run(self, entity, path, rejects_path=None):
+        if entity not in ENTITIES:
+            raise CsvImportError(f"Unknown import type '{entity}'; use one of {', '.join(ENTITIES)}")
+        rejects_path = rejects_path or default_rejects_path(path)
+        self.rejections = []
+        self.read = self.imported = self.rejected = 0
+        self._rejects_path = rejects_path
+        self._rejects_file = self._rejects = None
+        start = time.perf_counter()
+        size = os.path.getsize(path) or 1
+
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                lines = _CountingLines(f)
+                reader = csv.reader(lines)
+                header = next(reader, None)
+                if header is None:
+                    raise CsvImportError(f"{path} is empty")
+                indexes, width = column_indexes(entity, header)
+                self._header, self._width = header, width
+                rows = getattr(self, f"validate_{entity}")(reader, indexes, width)
+                writer = getattr(self, f"write_{entity}")
+                batches = iter(lambda: list(islice(rows, self.batch_size)), [])
+
+                batch = next(batches, None)
+                while batch and not self.cancelled:
+                    with self.db.transaction() as conn:
+                        written = 0
+                        while batch and written < self.transaction_rows:
+                            self.imported += writer(conn, batch)
+                            written += len(batch)
+                            if self.progress:
+                                self.progress(entity, self.read, self.imported, self.rejected,
+                                              min(1.0, lines.consumed / size))
+                            batch = None if self.cancelled else next(batches, None)
+                        self.db.changed(ENTITY_EVENTS[entity], BULK)
+        finally:
+            if self._rejects_file:
+                self._rejects_file.close()
+
+        return ImportResult(entity, self.read, self.imported, self.rejected,
+                            time.perf_counter() - start, rejects_path if self.rejected else None)
+
+    def reject(self, line, reason, row):
+        row = row[:self._width]
+        self.rejected += 1
+        if len(self.rejections) < MAX_KEPT_REJECTS:
+            self.rejections.append(Rejection(line, reason, row))
+        if self._rejects is None:
+            self._rejects_file = open(self._rejects_path, "w", newline="", encoding="utf-8")
+            self._rejects = csv.writer(self._rejects_file)
+            self._rejects.writerow(["line", "reason", *self._header])
+        self._rejects.writerow([line, reason, *row])
+
+    # Validators: generators over csv rows yielding write-ready tuples, and
+    # counting and rejecting as they go. Lines are numbered as in the file,
+    # with the header on line 1; reader.line_num is only read for rejects.
+
+    def _rows(self, reader, width, pad):
+        for row in reader:
+            self.read += 1
+            if len(row) != width:
+                if not any(row):
+                    self.read -= 1
+                    continue
+                self.reject(reader.line_num, f"expected {width} columns, found {len(row)}", row)
+                continue
+            if pad:
+                row.append("")
+            yield row
+
+    def validate_patients(self, reader, indexes, width):
+        name_i, age_i, gender_i, contact_i = indexes
+        for row in self._rows(reader, width, width in indexes):
+            name = row[name_i].strip()
+            if not name:
+                self.reject(reader.line_num, "name is required", row)
+                continue
+            age = row[age_i].strip()
+            if age:
+                if not age.isdigit() or int(age) > 150:
+                    self.reject(reader.line_num, f"age '{age}' is not a whole number from 0 to 150", row)
+                    continue
+                age = int(age)
+            else:
+                age = None
+            yield name, age, row[gender_i].strip(), row[contact_i].strip()
+
+    def validate_doctors(self, reader, indexes, width):
+        name_i, specialization_i, email_i, contact_i = indexes
+        for row in self._rows(reader, width, width in indexes):
+            name = row[name_i].strip()
+            specialization = row[specialization_i].strip()
+            if not name or not specialization:
+                self.reject(reader.line_num, "name and specialization are required", row)
+                continue
+            email = row[email_i].strip()
+            if email and "@" not in email:
+                self.reject(reader.line_num, f"email '{email}' is not an address", row)
+                continue
+            yield name, specialization, email, row[contact_i].strip()
+
+    def validate_appointments(self, reader, indexes, width):
+        patient_i, doctor_i, date_i, time_i, duration_i, purpose_i = indexes
+        find_patient = References(self.db, "patients").resolve
+        find_doctor = References(self.db, "doctors").resolve
+        fromisoformat = datetime.datetime.fromisoformat
+        minutes = datetime.timedelta(minutes=1)
+        for row in self._rows(reader, width, width in indexes):
+            patient_id = find_patient(row[patient_i].strip())
+            if patient_id is None:
+                self.reject(reader.line_num, f"no patient '{row[patient_i].strip()}'", row)
+                continue
+            doctor_id = find_doctor(row[doctor_i].strip())
+            if doctor_id is None:
+                self.reject(reader.line_num, f"no doctor '{row[doctor_i].strip()}'", row)
+                continue
+            date, time_text = row[date_i].strip(), row[time_i].strip()
+            start_at = f"{date} {time_text}"
+            try:
+                # fromisoformat alone would also take week dates and "0900"
+                if len(start_at) != 16 or start_at[4] != "-" or start_at[7] != "-" or start_at[13] != ":":
+                    raise ValueError
+                start = fromisoformat(start_at)
+            except ValueError:
+                self.reject(reader.line_num, "date must be YYYY-MM-DD and time HH:MM", row)
+                continue
+            duration = row[duration_i].strip()
+            if duration:
+                if not duration.isdigit() or not 0 < int(duration) <= MAX_DURATION:
+                    self.reject(reader.line_num, f"duration must be 1 to {MAX_DURATION} minutes", row)
+                    continue
+                duration = int(duration)
+            else:
+                duration = DEFAULT_DURATION
+            # The line, the appointment's columns, then the file's row for rejections
+            yield (reader.line_num, patient_id, doctor_id, date, time_text, row[purpose_i].strip(), duration,
+                   start_at, (start + duration * minutes).isoformat(" ", "minutes"), row)
+
+    # Writers return how many rows of the batch were stored
+
+    def write_patients(self, conn, batch):
+        with bulk_patient_indexing(conn) as index_since, bulk_row_counts(conn, "patients") as count_since:
+            # AUTOINCREMENT ids: everything inserted now sorts after this
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM patients").fetchone()[0]
+            conn.executemany("INSERT INTO patients (name, age, gender, contact) VALUES (?, ?, ?, ?)", batch)
+            index_since(last_id)
+            count_since(last_id)
+        return len(batch)
+
+    def write_doctors(self, conn, batch):
+        conn.executemany("INSERT INTO doctors (name, specialization, email, contact) VALUES (?, ?, ?, ?)", batch)
+        return len(batch)
+
+    def write_appointments(self, conn, batch):
+        # The doctor/day report summaries are updated once for the batch
+        with bulk_appointment_summaries(conn) as summarize_since:
+            if self.allow_overlap:
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM appointments").fetchone()[0]
+                conn.executemany("""
+                    INSERT INTO appointments (patient_id, doctor_id, date, time, purpose, duration, start_at, end_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [row[1:9] for row in batch])
+                summarize_since(last_id)
+                return len(batch)
+            return self.write_checked_appointments(conn, batch, summarize_since)
+
+    def write_checked_appointments(self, conn, batch, summarize_since):
+        # The batch is written sorted by doctor and start, which keeps the
+        # doctor indexes' inserts close together and is the order the sweep
+        # below needs
+        rows = sorted(batch, key=lambda row: (row[2], row[7]))
+
+        # Overlaps with stored appointments, earlier batches included, are
+        # checked first: the batch is inserted, then each new row is checked
+        # with one indexed range seek against the older rows. No appointment
+        # is longer than MAX_DURATION, which bounds the seek.
+        conn.executemany("""
+            INSERT INTO appointments (patient_id, doctor_id, date, time, purpose, duration, start_at, end_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [row[1:9] for row in rows])
+        # The write lock is held, so the batch got consecutive AUTOINCREMENT ids
+        last_id = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'appointments'").fetchone()[0]
+        first_id = last_id - len(rows) + 1
+        # Before the rejected rows are deleted, so their delete trigger has
+        # something to subtract from
+        summarize_since(first_id - 1)
+        clashes = conn.execute(f"""
+            SELECT n.id, MIN(a.start_at), MIN(a.end_at)
+            FROM appointments n
+            JOIN appointments a
+              ON a.doctor_id = n.doctor_id
+             AND a.start_at > strftime('%Y-%m-%d %H:%M', n.start_at, '-{MAX_DURATION} minutes')
+             AND a.start_at < n.end_at AND a.end_at > n.start_at AND a.id < ?
+            WHERE n.id >= ?
+            GROUP BY n.id
+        """, (first_id, first_id)).fetchall()
+        rejected = set()
+        for appointment_id, start_at, end_at in clashes:
+            row = rows[appointment_id - first_id]
+            self.reject(row[0], f"doctor already booked from {start_at} to {end_at}", row[9])
+            rejected.add(appointment_id)
+
+        # Then overlaps within the batch, among the rows that survived: a
+        # sweep over each doctor's rows by start. A row that clashed with a
+        # stored appointment is already gone and cannot push out another.
+        doctor_id = latest_end = latest_line = None
+        for appointment_id, row in enumerate(rows, first_id):
+            if appointment_id in rejected:
+                continue
+            if row[2] == doctor_id and row[7] < latest_end:
+                self.reject(row[0], f"overlaps the appointment on line {latest_line}", row[9])
+                rejected.add(appointment_id)
+                continue
+            if row[2] != doctor_id or row[8] > latest_end:
+                doctor_id, latest_end, latest_line = row[2], row[8], row[0]
+        if rejected:
+            conn.executemany("DELETE FROM appointments WHERE id = ?", [(row_id,) for row_id in sorted(rejected)])
+        return len(rows) - len(rejected)
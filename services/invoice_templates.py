@@ -0,0 +1,147 @@
+# services/invoice_templates.py
+#
+# Invoice templates are format strings with the fixed parts (logo, banner)
+# filled in once, and the stylesheet and logo are attached to a reusable
+# document, so rendering an invoice only fills in data and prints.
+
+import functools
+import html
+import os
+
+from PyQt5.QtCore import QSizeF
+from PyQt5.QtGui import QImage, QTextDocument
+from PyQt5.QtPrintSupport import QPrinter
+
+
+LOGO_URL = "invoice://logo.png"
+
+STYLESHEET = """
+body { color: black; font-family: Arial, sans-serif; }
+table { border-collapse: collapse; width: 100%; color: black; }
+th, td { border: 1px solid #000; padding: 8px; text-align: left; color: black; }
+h2, h3, p { color: black; }
+.copy { color: #c0392b; font-size: 18px; font-weight: bold; }
+"""
+
+TAX_LINE = "<p><strong>Tax:</strong> ₹{0:.2f}</p>"
+
+DETAILED = """
+<html><body>
+    <img src="{logo}" height="80" />
+    {banner}
+    <h2>Hospital Bill</h2>
+    <p><strong>Bill No:</strong> {bill_id}</p>
+    <p><strong>Patient Info:</strong> {patient_info}</p>
+    <p><strong>Date:</strong> {date}</p>
+    <h3>Services</h3>
+    <table>
+        <tr><th>Service</th><th>Quantity</th><th>Price</th><th>Total</th></tr>
+        {items}
+    </table>
+    {tax}
+    <h3>Total Amount: ₹{total:.2f}</h3>
+</body></html>
+"""
+
+SUMMARY = """
+<html><body>
+    <img src="{logo}" height="80" />
+    <h2>Hospital Bill - Summary</h2>
+    <p><strong>Bill No:</strong> {bill_id}</p>
+    <p><strong>Patient Info:</strong> {patient_info}</p>
+    <p><strong>Date:</strong> {date}</p>
+    <p><strong>Services billed:</strong> {item_count}</p>
+    {tax}
+    <h3>Total Amount: ₹{total:.2f}</h3>
+</body></html>
+"""
+
+
+@functools.lru_cache(maxsize=4096)
+def escape_service(name):
+    # Service names repeat from bill to bill, so each is escaped only once.
+    # Text only ever lands inside elements, never attributes, so quotes need
+    # no escaping.
+    return html.escape(str(name), False)
+
+
+def get_logo_path():
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'assets', 'logo.png'))
+
+
+class InvoiceTemplate:
+    def __init__(self, name, body, banner=""):
+        self.name = name
+        # The banner and logo never change, so they are filled in once here
+        self.body = body.replace("{banner}", banner).replace("{logo}", LOGO_URL)
+
+    def render(self, bill_id, patient_info, items, total, date, tax=0.0):
+        rows = "".join([
+            f"<tr><td>{escape_service(service)}</td><td>{qty}</td><td>₹{unit_price:.2f}</td>"
+            f"<td>₹{line_total:.2f}</td></tr>"
+            for service, qty, unit_price, line_total in items
+        ])
+        return self.body.format_map({
+            "bill_id": bill_id,
+            "patient_info": html.escape(patient_info, False),
+            "date": html.escape(str(date), False),
+            "items": rows,
+            "item_count": len(items),
+            "tax": TAX_LINE.format(tax) if tax else "",
+            "total": total,
+        })
+
+TEMPLATES = {
+    "detailed": InvoiceTemplate("detailed", DETAILED),
+    "summary": InvoiceTemplate("summary", SUMMARY),
+    "duplicate": InvoiceTemplate("duplicate", DETAILED, banner='<p class="copy">DUPLICATE COPY</p>'),
+}
+
+DEFAULT_TEMPLATE = "detailed"
+
+
+def get_template(name):
+    try:
+        return TEMPLATES[name]
+    except KeyError:
+        raise ValueError(f"Unknown invoice template {name!r}; choose from {', '.join(TEMPLATES)}") from None
+
+
+class InvoiceDocument(QTextDocument):
+    # Serves the logo from memory instead of reading it from disk for
+    # every invoice; the stylesheet is parsed once when the document is made.
+    logo = None
+
+    def __init__(self):
+        super().__init__()
+        self.setDefaultStyleSheet(STYLESHEET)
+
+    def loadResource(self, resource_type, name):
+        if name.toString() == LOGO_URL:
+            if InvoiceDocument.logo is None:
+                InvoiceDocument.logo = QImage(get_logo_path())
+            return InvoiceDocument.logo
+        return super().loadResource(resource_type, name)
+
+
+class InvoiceRenderer:
+    # One per process: keeps a single prepared document and printer alive.
+    # The document is laid out directly against the printer with the same
+    # 2 cm margins QTextDocument.print_() would apply, which spares print_()
+    # from cloning and re-laying out the whole document for every invoice.
+    def __init__(self):
+        self.printer = QPrinter()
+        self.printer.setOutputFormat(QPrinter.PdfFormat)
+        self.document = InvoiceDocument()
+        self.document.documentLayout().setPaintDevice(self.printer)
+        self.document.setPageSize(QSizeF(self.printer.width(), self.printer.height()))
+        self.margin = (2 / 2.54) * self.printer.logicalDpiY()
+
+    def write_pdf(self, html_text, output_path):
+        self.document.setHtml(html_text)
+        frame_format = self.document.rootFrame().frameFormat()
+        frame_format.setMargin(self.margin)
+        self.document.rootFrame().setFrameFormat(frame_format)
+        self.printer.setOutputFileName(output_path)
+        self.document.print_(self.printer)
+        return output_path
@@ -0,0 +1,160 @@
+# services/invoices.py
+import datetime
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from database.connection import Database, get_database
+from database.repository import BillRepository, PatientRepository
+from services.api_client import SERVER_URL, ApiClient, RemoteBillRepository, RemotePatientRepository
+from services.invoice_templates import DEFAULT_TEMPLATE, InvoiceRenderer, get_template
+
+
+def get_output_dir():
+    return os.path.join(os.path.expanduser("~"), "Documents")
+
+
+def patient_summary(patient):
+    return f"ID: {patient.id}, Name: {patient.name}, Age: {patient.age}, Contact: {patient.contact}"
+
+
+_renderer = None
+
+
+def get_renderer():
+    # Created on first use, after the process has its Qt application
+    global _renderer
+    if _renderer is None:
+        _renderer = InvoiceRenderer()
+    return _renderer
+
+
+def invoice_filename(bill_id):
+    # The bill id keeps names unique when many invoices render in one second
+    return f"Bill_{bill_id}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+
+
+def render_invoice(bill_id, output_dir=None, bills=None, patients=None, filename=None,
+                   template=DEFAULT_TEMPLATE):
+    template = get_template(template)
+    bills = bills or BillRepository()
+    patients = patients or PatientRepository()
+
+    bill = bills.get(bill_id)
+    if bill is None:
+        raise LookupError(f"Bill {bill_id} does not exist")
+    patient = patients.get(bill.patient_id)
+    patient_info = patient_summary(patient) if patient else f"ID: {bill.patient_id}"
+
+    output_dir = output_dir or get_output_dir()
+    os.makedirs(output_dir, exist_ok=True)
+    html = template.render(bill_id, patient_info, bills.items(bill_id), bill.total, bill.date, bill.tax)
+    return get_renderer().write_pdf(html, os.path.join(output_dir, filename or invoice_filename(bill_id)))
+
+
+_worker_state = {}
+
+
+def init_render_worker(db_path, server_url=None):
+    # Runs once in every render process. PDF output needs a Qt GUI
+    # application for fonts, but never a display. In server mode the bill
+    # and patient are read from the server, not from db_path.
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt5.QtGui import QGuiApplication
+    _worker_state["app"] = QGuiApplication.instance() or QGuiApplication([])
+    if server_url:
+        client = ApiClient(server_url)
+        _worker_state["bills"] = RemoteBillRepository(client)
+        _worker_state["patients"] = RemotePatientRepository(client)
+    else:
+        _worker_state["bills"] = BillRepository(Database(db_path))
+        _worker_state["patients"] = PatientRepository(_worker_state["bills"].db)
+
+
+def render_in_worker(bill_id, output_dir, filename=None, template=DEFAULT_TEMPLATE):
+    return render_invoice(bill_id, output_dir, _worker_state["bills"], _worker_state["patients"], filename, template)
+
+
+def default_render_workers():
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def render_pool(db_path, max_workers=None, server_url=None):
+    # Separate processes rather than threads: PyQt keeps the GIL while Qt
+    # lays out and prints a document, which would stall the GUI thread.
+    return ProcessPoolExecutor(
+        max_workers=max_workers or default_render_workers(),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_render_worker,
+        initargs=(db_path, server_url)
+    )
+
+
+class InvoiceRenderQueue(QObject):
+    # Renders invoice PDFs for bill ids in a pool of worker processes. The
+    # GUI thread only enqueues ids and receives completion signals.
+    rendered = pyqtSignal(int, str)     # bill id, pdf path
+    failed = pyqtSignal(int, str)       # bill id, error message
+    pending_changed = pyqtSignal(int)
+    task_done = pyqtSignal(int, str, str)
+
+    def __init__(self, output_dir=None, max_workers=None, db_path=None, parent=None):
+        super().__init__(parent)
+        self.output_dir = output_dir or get_output_dir()
+        self.max_workers = max_workers
+        self.db_path = db_path
+        self.executor = None
+        self.pending = 0
+        self.task_done.connect(self.on_task_done)
+
+    def submit(self, bill_id, template=DEFAULT_TEMPLATE):
+        if self.executor is None:
+            # Started on first use so that opening billing costs nothing
+            if SERVER_URL:
+                self.executor = render_pool(None, self.max_workers, SERVER_URL)
+            else:
+                self.executor = render_pool(self.db_path or get_database().path, self.max_workers)
+        self.pending += 1
+        self.pending_changed.emit(self.pending)
+        future = self.executor.submit(render_in_worker, bill_id, self.output_dir, None, template)
+        future.add_done_callback(lambda f, bill_id=bill_id: self.on_future_done(bill_id, f))
+
+    def on_future_done(self, bill_id, future):
+        # Called on an executor helper thread; the signal hops to the GUI thread
+        try:
+            path = future.result()
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+            path = ""
+        else:
+            error = ""
+        try:
+            self.task_done.emit(bill_id, path, error)
+        except RuntimeError:
+            pass
+
+    def on_task_done(self, bill_id, path, error):
+        self.pending -= 1
+        self.pending_changed.emit(self.pending)
+        if error:
+            self.failed.emit(bill_id, error)
+        else:
+            self.rendered.emit(bill_id, path)
+
+    def shutdown(self, wait=True):
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
+
+
+_render_queue = None
+
+
+def get_render_queue():
+    # Shared by every billing window so closing one does not drop its jobs
+    global _render_queue
+    if _render_queue is None:
+        _render_queue = InvoiceRenderQueue()
+    return _render_queue
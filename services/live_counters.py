@@ -0,0 +1,148 @@
+# services/live_counters.py
+#
+# Live operational numbers for the dashboard: total patients, today's
+# appointments per doctor, and bills and revenue today. Every number comes
+# from a maintained summary row (database/reports.py), so a snapshot costs a
+# few index lookups however large the tables are. A background thread keeps
+# the snapshot current: it re-reads only when PRAGMA data_version says
+# another connection committed (any thread, process or workstation) or the
+# day rolls over, and is woken early by this process's own change events.
+# In server mode the snapshot is read from the server instead, whenever a
+# change event arrives (the change feed brings other clients' saves too).
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from database.connection import get_database
+from database.events import get_change_bus
+from database.reports import DoctorLoad, ReportRepository
+from services.api_client import SERVER_URL, ApiError, get_api_client
+
+POLL_MS = int(os.environ.get("HMS_COUNTERS_POLL_MS", "500"))
+
+CounterSnapshot = namedtuple(
+    "CounterSnapshot", "day patients appointments_today doctors_today bills_today revenue_today read_ms"
+)
+
+
+def read_snapshot(reports, day):
+    started = time.perf_counter()
+    doctors = reports.doctors_on_day(day)
+    revenue = reports.day_revenue(day)
+    patients = reports.row_count("patients")
+    return CounterSnapshot(
+        day, patients, sum(doctor.appointments for doctor in doctors), doctors,
+        revenue.bills, revenue.revenue, (time.perf_counter() - started) * 1000
+    )
+
+
+class LiveCounters(QObject):
+    # updated and failed are emitted from the polling thread; Qt queues them
+    # to receivers living on the GUI thread
+    updated = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+    def __init__(self, db=None, poll_ms=POLL_MS, client=None, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.db = None if client else db or get_database()
+        self.poll_interval = poll_ms / 1000
+        self.snapshot = None
+        self.reads = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        get_change_bus().subscribe(self.on_changes)
+        self._thread = threading.Thread(target=self.poll, name="live-counters", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        get_change_bus().unsubscribe(self.on_changes)
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def on_changes(self, events):
+        # Runs on the committing thread; only wakes the poller
+        self._wake.set()
+
+    def poll(self):
+        if self.client is not None:
+            self.poll_server()
+            return
+        # The thread has its own connection, so every commit made elsewhere,
+        # this process's GUI thread included, bumps its data_version
+        conn = self.db.reader
+        reports = ReportRepository(self.db)
+        version = day = error = None
+        while not self._stop.is_set():
+            # Cleared before looking, so a commit from now on wakes the wait
+            self._wake.clear()
+            try:
+                current_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                today = datetime.date.today().isoformat()
+                if current_version != version or today != day:
+                    # One read transaction, so the numbers agree with each other
+                    conn.execute("BEGIN")
+                    try:
+                        snapshot = read_snapshot(reports, today)
+                    finally:
+                        conn.execute("COMMIT")
+                    version, day, error = current_version, today, None
+                    self.snapshot = snapshot
+                    self.reads += 1
+                    self.updated.emit(snapshot)
+            except sqlite3.Error as failure:
+                # The database is locked, busy or gone: the thread keeps
+                # running and reads again on the next wake. A failure is
+                # reported once, not again on every retry.
+                if conn.in_transaction:
+                    conn.rollback()
+                if error is None:
+                    self.failed.emit(failure)
+                error = failure
+            self._wake.wait(self.poll_interval)
+
+    def poll_server(self):
+        # Re-reads after a change event, when the day rolls over, and every
+        # interval while the server cannot be reached
+        day = None
+        stale = True
+        while not self._stop.is_set():
+            today = datetime.date.today().isoformat()
+            if stale or today != day:
+                self._wake.clear()
+                try:
+                    values = self.client.get("/counters", day=today)
+                except ApiError:
+                    pass
+                else:
+                    day, stale = today, False
+                    values[3] = [DoctorLoad(*doctor) for doctor in values[3]]
+                    self.snapshot = CounterSnapshot(*values)
+                    self.reads += 1
+                    self.updated.emit(self.snapshot)
+            if self._wake.wait(self.poll_interval):
+                stale = True
+
+
+_live_counters = None
+
+
+def get_live_counters():
+    global _live_counters
+    if _live_counters is None:
+        _live_counters = LiveCounters(client=get_api_client() if SERVER_URL else None)
+    return _live_counters
@@ -0,0 +1,175 @@
+# services/watchdog.py
+#
+# Detects event-loop stalls. A QTimer heartbeat on the GUI thread notes when
+# the loop last ran; a monitor thread notices when the heartbeat is overdue
+# and captures the GUI thread's Python stack with sys._current_frames().
+# When the loop comes back the heartbeat records the stall with its length.
+import collections
+import datetime
+import os
+import sys
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+HEARTBEAT_MS = 50
+STALL_THRESHOLD_MS = float(os.environ.get("HMS_STALL_MS", "250"))
+MAX_STALLS = 200
+STACK_LIMIT = 40
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Frames that only wrap the real work and would hide it as the location
+IGNORED_FILES = (
+    os.path.join(PROJECT_ROOT, "database", "instrumentation.py"),
+    os.path.abspath(__file__),
+)
+
+UNKNOWN_LOCATION = "(native code, stack not captured)"
+
+Stall = collections.namedtuple("Stall", "started duration_ms location stack")
+
+
+class Offender:
+    __slots__ = ("location", "count", "total_ms", "worst_ms", "worst_stack")
+
+    def __init__(self, location):
+        self.location = location
+        self.count = 0
+        self.total_ms = 0.0
+        self.worst_ms = 0.0
+        self.worst_stack = []
+
+    def add(self, stall):
+        self.count += 1
+        self.total_ms += stall.duration_ms
+        if stall.duration_ms >= self.worst_ms:
+            self.worst_ms = stall.duration_ms
+            self.worst_stack = stall.stack
+
+
+def capture_stack(thread_id):
+    import traceback
+
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return []
+    return traceback.extract_stack(frame, limit=STACK_LIMIT)
+
+
+def stall_location(stack):
+    # The innermost frame in our own code names the handler that blocked
+    for frame in reversed(stack):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(PROJECT_ROOT) and filename not in IGNORED_FILES:
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.lineno} in {frame.name}"
+    return UNKNOWN_LOCATION
+
+
+def format_stack(stack):
+    lines = []
+    for frame in stack:
+        lines.append(f'File "{frame.filename}", line {frame.lineno}, in {frame.name}')
+        if frame.line:
+            lines.append(f"    {frame.line}")
+    return lines
+
+
+class StallWatchdog(QObject):
+    def __init__(self, threshold_ms=STALL_THRESHOLD_MS, heartbeat_ms=HEARTBEAT_MS, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_interval = heartbeat_ms / 1000
+        self.stalls = collections.deque(maxlen=MAX_STALLS)
+        self.offenders = {}
+        self.stall_count = 0
+        self.started = None
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._pending_stack = None
+        self._stop = threading.Event()
+        self._monitor = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(heartbeat_ms)
+        self._timer.timeout.connect(self.heartbeat)
+
+    def start(self):
+        # Must be called from the GUI thread: that is the thread it watches
+        if self._monitor is not None:
+            return
+        self.started = datetime.datetime.now()
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._timer.start()
+        self._stop.clear()
+        self._monitor = threading.Thread(target=self.monitor, name="stall-watchdog", daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+
+    def heartbeat(self):
+        now = time.monotonic()
+        overdue = now - self._last_beat - self.heartbeat_interval
+        self._last_beat = now
+        with self._lock:
+            stack, self._pending_stack = self._pending_stack, None
+        if overdue >= self.threshold:
+            self.record(overdue * 1000, stack or [])
+
+    def monitor(self):
+        # Checks twice per threshold; captures one stack per stall
+        while not self._stop.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            if time.monotonic() - last_beat - self.heartbeat_interval < self.threshold:
+                continue
+            with self._lock:
+                if self._pending_stack is not None:
+                    continue
+            stack = capture_stack(self._gui_thread_id)
+            with self._lock:
+                # The loop may have recovered while the stack was captured
+                if self._last_beat == last_beat:
+                    self._pending_stack = stack
+
+    def record(self, duration_ms, stack):
+        stall = Stall(datetime.datetime.now(), duration_ms, stall_location(stack), format_stack(stack))
+        with self._lock:
+            self.stall_count += 1
+            self.stalls.append(stall)
+            offender = self.offenders.get(stall.location)
+            if offender is None:
+                offender = self.offenders[stall.location] = Offender(stall.location)
+            offender.add(stall)
+        return stall
+
+    def worst_offenders(self, limit=20):
+        with self._lock:
+            offenders = sorted(self.offenders.values(), key=lambda o: o.total_ms, reverse=True)
+        return offenders[:limit]
+
+    def recent_stalls(self):
+        with self._lock:
+            return list(self.stalls)
+
+    def reset(self):
+        with self._lock:
+            self.stalls.clear()
+            self.offenders = {}
+            self.stall_count = 0
+            self.started = datetime.datetime.now()
+
+
+_watchdog = None
+
+
+def get_watchdog():
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = StallWatchdog()
+    return _watchdog
@@ -0,0 +1,15 @@
+# tests/conftest.py
+import pytest
+
+from database.connection import Database, set_database
+from database.migrations import migrate
+
+
+@pytest.fixture
+def db(tmp_path):
+    # A migrated scratch database that every repository in the test uses
+    database = set_database(Database(str(tmp_path / "hospital.db")))
+    migrate(database.connection)
+    yield database
+    set_database(None)
+    database.close()
@@ -0,0 +1,86 @@
+# tests/test_availability.py
+import datetime
+import sys
+import threading
+
+from database.events import APPOINTMENT, BULK, DELETE, DOCTOR, ChangeEvent
+from database.repository import AppointmentRepository, DoctorRepository, WorkingHours
+from services import availability
+from services.availability import AvailabilityEngine, runs, slot_mask
+
+MONDAY = datetime.date(2030, 1, 7)
+NINE = datetime.datetime.combine(MONDAY, datetime.time(9))
+
+
+def add_doctors(count):
+    doctors = DoctorRepository()
+    return [doctors.add(f"Dr. {i}", "Cardiology", "", "").id for i in range(count)]
+
+
+def test_slot_mask_covers_every_touched_slot():
+    assert slot_mask(0, 15) == 0b1
+    assert slot_mask(10, 20) == 0b11
+    assert slot_mask(9 * 60, 10 * 60) == 0b1111 << 36
+    assert slot_mask(60, 60) == 0
+
+
+def test_runs_keeps_starts_of_long_enough_gaps():
+    free = 0b1110111
+    assert runs(free, 1) == free
+    assert runs(free, 3) == 0b0010001
+    assert runs(free, 4) == 0
+
+
+def test_free_slots_skip_bookings_and_working_hours(db):
+    doctor_id, = add_doctors(1)
+    DoctorRepository().set_working_hours(doctor_id, [WorkingHours(0, 9 * 60, 11 * 60)])
+    AppointmentRepository().add(1, doctor_id, "2030-01-07", "09:30", "Checkup", 30)
+    engine = AvailabilityEngine(db)
+    slots = engine.free_slots(doctor_id, NINE, MONDAY + datetime.timedelta(days=6), duration=30)
+    assert [slot.strftime("%a %H:%M") for slot in slots] == ["Mon 09:00", "Mon 10:00", "Mon 10:15", "Mon 10:30"]
+
+
+def test_booked_and_released_keep_the_cache_current(db):
+    doctor_id, = add_doctors(1)
+    engine = AvailabilityEngine(db)
+    assert engine.first_free([doctor_id], NINE, MONDAY) == (NINE, doctor_id)
+    engine.booked(doctor_id, NINE, NINE + datetime.timedelta(minutes=30))
+    assert engine.first_free([doctor_id], NINE, MONDAY)[0] == NINE + datetime.timedelta(minutes=30)
+    engine.released(doctor_id, NINE, NINE + datetime.timedelta(minutes=30))
+    assert engine.first_free([doctor_id], NINE, MONDAY) == (NINE, doctor_id)
+
+
+def test_cache_reset_refills_doctors_that_were_already_cached(db, monkeypatch):
+    doctor_ids = add_doctors(3)
+    AppointmentRepository().add(1, doctor_ids[0], "2030-01-07", "09:00", "Checkup", 480)
+    engine = AvailabilityEngine(db)
+    end_date = MONDAY + datetime.timedelta(days=6)
+    engine.first_free(doctor_ids[:1], NINE, end_date)
+    # Room for fewer doctor-days than the next query needs forces a reset
+    monkeypatch.setattr(availability, "MAX_CACHED_DAYS", 10)
+    assert engine.first_free(doctor_ids, NINE, end_date) == (NINE, doctor_ids[1])
+    assert engine.first_free(doctor_ids[:1], NINE, end_date)[0] == NINE + datetime.timedelta(days=1)
+
+
+def test_change_events_from_another_thread_do_not_break_a_search(db):
+    doctor_ids = add_doctors(20)
+    engine = AvailabilityEngine(db)
+    stop = threading.Event()
+
+    def commit_elsewhere():
+        # What the import pool or the API writer does through the change bus
+        while not stop.is_set():
+            engine.on_changes([ChangeEvent(DOCTOR, DELETE, doctor_ids[0]), ChangeEvent(APPOINTMENT, BULK, None)])
+
+    # Switching threads very often makes a clear() land mid-search
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    thread = threading.Thread(target=commit_elsewhere)
+    thread.start()
+    try:
+        for _ in range(200):
+            assert engine.first_free(doctor_ids, NINE, MONDAY + datetime.timedelta(days=6)) == (NINE, doctor_ids[0])
+    finally:
+        stop.set()
+        thread.join()
+        sys.setswitchinterval(interval)
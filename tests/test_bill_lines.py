@@ -0,0 +1,74 @@
+# tests/test_bill_lines.py
+from decimal import Decimal
+
+import pytest
+from PyQt5.QtCore import Qt
+
+from database.reports import ReportRepository
+from database.repository import BillItem, BillRepository, PatientRepository
+from ui.bill_lines import AMOUNT, PRICE, QUANTITY, SERVICE, BillLineModel
+
+
+def make_model(tax_rate="18", lines=()):
+    model = BillLineModel(Decimal(tax_rate))
+    emitted = []
+    model.totals_changed.connect(lambda *totals: emitted.append(totals))
+    for line in lines:
+        model.add_line(*line)
+    return model, emitted
+
+
+def edit(model, row, column, value):
+    return model.setData(model.index(row, column), value, Qt.EditRole)
+
+
+def test_totals_follow_each_edit():
+    model, emitted = make_model(lines=[("Consultation", 1, "500"), ("X-ray", 2, "350.50")])
+    assert model.totals() == (Decimal("1201.00"), Decimal("216.18"), Decimal("1417.18"))
+    assert edit(model, 1, QUANTITY, 3)
+    assert edit(model, 0, PRICE, "0.10")
+    assert model.totals() == (Decimal("1051.60"), Decimal("189.29"), Decimal("1240.89"))
+    assert emitted[-1] == model.totals()
+    assert model.data(model.index(1, AMOUNT)) == "1051.50"
+    model.clear()
+    assert model.totals() == (Decimal("0.00"), Decimal("0.00"), Decimal("0.00"))
+
+
+def test_prices_add_up_exactly():
+    # 0.1 + 0.2 in floats is 0.30000000000000004
+    model, _ = make_model("0", lines=[("A", 1, "0.10"), ("B", 1, "0.20")] * 500)
+    assert model.subtotal == Decimal("150.00")
+
+
+@pytest.mark.parametrize("column, value", [
+    (QUANTITY, 0), (QUANTITY, "two"), (PRICE, "-1"), (PRICE, "1e12"), (PRICE, "NaN"), (PRICE, "abc"),
+    (AMOUNT, "10"),
+])
+def test_invalid_edits_are_rejected(column, value):
+    model, emitted = make_model(lines=[("Consultation", 2, "500")])
+    before = model.totals()
+    assert not edit(model, 0, column, value)
+    assert model.lines[0] == ("Consultation", 2, Decimal("500.00"))
+    assert model.totals() == before and len(emitted) == 1
+
+
+def test_bill_items_leave_out_blank_lines_and_tax():
+    model, _ = make_model(lines=[("Consultation", 1, "500"), ("", 1, "0")])
+    assert model.bill_items() == [BillItem("Consultation", 1, 500.0, 500.0)]
+    edit(model, 1, PRICE, "20")
+    with pytest.raises(ValueError, match="Line 2"):
+        model.bill_items()
+    edit(model, 1, SERVICE, "Dressing")
+    assert [item.service for item in model.bill_items()] == ["Consultation", "Dressing"]
+
+
+def test_tax_is_stored_on_the_bill_not_as_a_service(db):
+    patient = PatientRepository().add("Asha Rao", 30, "F", "9800000000")
+    model, _ = make_model(lines=[("Consultation", 1, "500")])
+    bills = BillRepository()
+    bill_id = bills.add(patient.id, model.bill_items(), "2025-01-06 10:00:00", float(model.totals()[1]))
+    bill = bills.get(bill_id)
+    assert (bill.total, bill.tax) == (590.0, 90.0)
+    assert bills.items(bill_id) == [BillItem("Consultation", 1, 500.0, 500.0)]
+    assert bills.revenue_by_service("2025-01-01", "2025-02-01") == [("Consultation", 1, 500.0)]
+    assert ReportRepository().daily_revenue("2025-01-01", "2025-02-01")[0].revenue == 590.0
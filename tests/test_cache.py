@@ -0,0 +1,64 @@
+# tests/test_cache.py
+import sqlite3
+
+from database.cache import RecordCache
+from database.events import BULK, DELETE, DOCTOR, PATIENT, UPDATE, ChangeEvent
+from database.repository import Doctor, Patient, PatientRepository
+
+
+def patient(patient_id, name="Asha Rao"):
+    return Patient(patient_id, name, 30, "F", "")
+
+
+def test_least_recently_used_record_is_evicted_with_its_name_key():
+    cache = RecordCache(capacity=3)
+    cache.put(PATIENT, patient(1), cache.generation, name="Asha Rao")
+    cache.put(PATIENT, patient(2, "Ravi"), cache.generation)
+    assert cache.get((PATIENT, 1)) is not None
+    assert cache.get((PATIENT, "asha rao")) is not None
+    cache.put(PATIENT, patient(3, "Meera"), cache.generation)
+    # Patient 2 was used longest ago
+    assert cache.get((PATIENT, 2)) is None
+    assert cache.get((PATIENT, "asha rao")) == patient(1)
+    assert cache.stats().evictions == 1
+    # Evicting either key of a record takes the other one with it
+    cache.put(PATIENT, patient(4, "Kavya"), cache.generation)
+    assert cache.get((PATIENT, 1)) is None
+    assert cache.get((PATIENT, "asha rao")) is None
+
+
+def test_writes_drop_what_they_change():
+    cache = RecordCache()
+    cache.put(PATIENT, patient(1), cache.generation, name="Asha Rao")
+    cache.put(PATIENT, patient(2, "Ravi"), cache.generation, name="Ravi")
+    cache.put(DOCTOR, Doctor(1, "Dr. Rao", "ENT", "", ""), cache.generation)
+    cache.invalidate([ChangeEvent(PATIENT, UPDATE, 2)])
+    assert cache.get((PATIENT, 2)) is None
+    # A rename can move any name to another record, so names all go
+    assert cache.get((PATIENT, "asha rao")) is None
+    assert cache.get((PATIENT, 1)) == patient(1)
+    cache.invalidate([ChangeEvent(PATIENT, DELETE, 1)])
+    assert cache.get((PATIENT, 1)) is None
+    cache.invalidate([ChangeEvent(DOCTOR, BULK, None)])
+    assert cache.get((DOCTOR, 1)) is None
+
+
+def test_a_read_that_overlapped_a_write_is_not_cached():
+    cache = RecordCache()
+    generation = cache.generation
+    cache.invalidate([ChangeEvent(PATIENT, UPDATE, 1)])
+    cache.put(PATIENT, patient(1), generation)
+    assert cache.get((PATIENT, 1)) is None
+
+
+def test_cache_starts_over_when_another_connection_commits(db):
+    patients = PatientRepository()
+    patient_id = patients.add("Asha Rao", 30, "F", "").id
+    assert patients.get(patient_id).name == "Asha Rao"
+    # Another workstation, which publishes no events here
+    other = sqlite3.connect(db.path)
+    other.execute("UPDATE patients SET name = 'Asha Iyer' WHERE id = ?", (patient_id,))
+    other.commit()
+    other.close()
+    db.records.check_interval = 0
+    assert patients.get(patient_id).name == "Asha Iyer"
@@ -0,0 +1,37 @@
+# tests/test_concurrent_writes.py
+#
+# Several workstation processes saving into one file at once, through the
+# same repositories the windows use.
+import datetime
+import multiprocessing
+
+from benchmarks.bench_concurrent_writes import missing_rows, workstation
+from database.repository import DoctorRepository
+
+WORKSTATIONS = 4
+WRITES = 40
+
+
+def test_concurrent_saves_are_neither_lost_nor_locked_out(db):
+    doctors = DoctorRepository()
+    doctor_ids = [doctors.add(f"Dr. {i}", "General Medicine", "", "").id for i in range(WORKSTATIONS)]
+    day = datetime.date(2030, 1, 7).isoformat()
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=workstation, args=(db.path, doctor_id, WRITES, day, results))
+               for doctor_id in doctor_ids]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=120) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    saved = {"patients": [], "appointments": [], "bills": []}
+    for worker_saved, _latencies, errors, _retries, _settings in outcomes:
+        assert errors == []
+        for table, ids in worker_saved.items():
+            saved[table].extend(ids)
+    for table, ids in saved.items():
+        assert len(ids) == WORKSTATIONS * WRITES
+        assert missing_rows(db, table, ids) == 0
+        assert db.fetch_one(f"SELECT COUNT(*) FROM {table}")[0] == len(ids)
@@ -0,0 +1,57 @@
+# tests/test_events.py
+import pytest
+
+from database.events import BULK, DELETE, INSERT, PATIENT, UPDATE, ChangeEvent, get_change_bus, merge
+from database.repository import PatientRepository
+
+
+def merged(*ops):
+    pending = {}
+    for op in ops:
+        merge(pending, ChangeEvent(PATIENT, op, 1))
+    return [event.op for event in pending.values()]
+
+
+@pytest.mark.parametrize("ops, result", [
+    ((INSERT, UPDATE, UPDATE), [INSERT]),
+    ((INSERT, DELETE), []),
+    ((DELETE, INSERT), [UPDATE]),
+    ((UPDATE, DELETE), [DELETE]),
+    ((UPDATE, UPDATE), [UPDATE]),
+])
+def test_merge_folds_a_burst_into_its_net_change(ops, result):
+    assert merged(*ops) == result
+
+
+def test_merge_keeps_rows_and_bulk_changes_apart():
+    pending = {}
+    for event in (ChangeEvent(PATIENT, UPDATE, 1), ChangeEvent(PATIENT, UPDATE, 2),
+                  ChangeEvent(PATIENT, BULK, None), ChangeEvent(PATIENT, BULK, None)):
+        merge(pending, event)
+    assert sorted(pending, key=str) == [(PATIENT, 1), (PATIENT, 2), (PATIENT, None)]
+
+
+@pytest.fixture
+def published():
+    events = []
+    bus = get_change_bus()
+    bus.subscribe(events.extend)
+    yield events
+    bus.unsubscribe(events.extend)
+
+
+def test_events_are_published_after_commit_only(db, published):
+    patients = PatientRepository()
+    with db.transaction():
+        patient = patients.add("Asha", 30, "F", "")
+        patients.update(patient.id, "Asha Rao", 30, "F", "")
+        assert published == []
+    assert published == [ChangeEvent(PATIENT, INSERT, patient.id), ChangeEvent(PATIENT, UPDATE, patient.id)]
+
+    published.clear()
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            patients.delete(patient.id)
+            raise RuntimeError("cancelled")
+    assert published == []
+    assert patients.get(patient.id).name == "Asha Rao"
@@ -0,0 +1,104 @@
+# tests/test_importer.py
+import pytest
+
+from database.repository import AppointmentRepository, DoctorRepository, PatientRepository
+from services.importer import CsvImporter
+
+HEADER = "patient,doctor,date,time,duration,purpose\n"
+
+
+@pytest.fixture
+def people(db):
+    patient = PatientRepository().add("Asha Rao", 30, "F", "9800000000")
+    doctors = DoctorRepository()
+    return patient.id, doctors.add("Dr. Iyer", "Cardiology", "", "").id, doctors.add("Dr. Das", "ENT", "", "").id
+
+
+def write_csv(tmp_path, *rows):
+    path = tmp_path / "appointments.csv"
+    path.write_text(HEADER + "".join(row + "\n" for row in rows))
+    return str(path)
+
+
+def stored(db):
+    return db.fetch_all("SELECT doctor_id, start_at FROM appointments ORDER BY doctor_id, start_at")
+
+
+def day_load(db):
+    return db.fetch_all("SELECT doctor_id, day, appointments FROM doctor_day_load WHERE appointments > 0 "
+                        "ORDER BY doctor_id, day")
+
+
+def test_overlaps_within_the_file_are_rejected(db, people, tmp_path):
+    _, iyer, das = people
+    path = write_csv(tmp_path,
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:00,30,",
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:15,30,",
+                     "Asha Rao,Dr. Das,2025-01-06,09:15,30,",
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:30,30,")
+    importer = CsvImporter(db)
+    result = importer.run("appointments", path)
+    assert (result.read, result.imported, result.rejected) == (4, 3, 1)
+    assert [(r.line, r.reason) for r in importer.rejections] == [(3, "overlaps the appointment on line 2")]
+    assert stored(db) == [(iyer, "2025-01-06 09:00"), (iyer, "2025-01-06 09:30"), (das, "2025-01-06 09:15")]
+    assert day_load(db) == [(iyer, "2025-01-06", 2), (das, "2025-01-06", 1)]
+
+
+def test_overlaps_with_stored_appointments_are_rejected(db, people, tmp_path):
+    patient, iyer, _ = people
+    AppointmentRepository().add(patient, iyer, "2025-01-06", "09:00", "", 60)
+    # One row per batch, so the second row also meets the first one in the table
+    path = write_csv(tmp_path,
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:45,30,",
+                     "Asha Rao,Dr. Iyer,2025-01-06,10:00,30,",
+                     "Asha Rao,Dr. Iyer,2025-01-06,10:15,30,")
+    importer = CsvImporter(db, batch_size=1)
+    result = importer.run("appointments", path)
+    assert (result.imported, result.rejected) == (1, 2)
+    assert [(r.line, r.reason) for r in importer.rejections] == [
+        (2, "doctor already booked from 2025-01-06 09:00 to 2025-01-06 10:00"),
+        (4, "doctor already booked from 2025-01-06 10:00 to 2025-01-06 10:30"),
+    ]
+    assert stored(db) == [(iyer, "2025-01-06 09:00"), (iyer, "2025-01-06 10:00")]
+    assert day_load(db) == [(iyer, "2025-01-06", 2)]
+
+
+def test_a_row_that_clashes_with_a_stored_one_does_not_push_out_its_neighbour(db, people, tmp_path):
+    patient, iyer, _ = people
+    AppointmentRepository().add(patient, iyer, "2025-01-06", "08:30", "", 60)
+    # A clashes with the stored 08:30-09:30, B overlaps only A
+    path = write_csv(tmp_path,
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:00,60,",
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:45,30,")
+    importer = CsvImporter(db)
+    result = importer.run("appointments", path)
+    assert (result.imported, result.rejected) == (1, 1)
+    assert [(r.line, r.reason) for r in importer.rejections] == [
+        (2, "doctor already booked from 2025-01-06 08:30 to 2025-01-06 09:30"),
+    ]
+    assert stored(db) == [(iyer, "2025-01-06 08:30"), (iyer, "2025-01-06 09:45")]
+    assert day_load(db) == [(iyer, "2025-01-06", 2)]
+
+
+def test_allow_overlap_imports_every_row(db, people, tmp_path):
+    patient, iyer, _ = people
+    AppointmentRepository().add(patient, iyer, "2025-01-06", "09:00", "", 60)
+    path = write_csv(tmp_path,
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:00,30,",
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:15,30,")
+    result = CsvImporter(db, allow_overlap=True).run("appointments", path)
+    assert (result.imported, result.rejected, result.rejects_path) == (2, 0, None)
+    assert len(stored(db)) == 3
+    assert day_load(db) == [(iyer, "2025-01-06", 3)]
+
+
+def test_rejected_rows_are_written_to_the_rejects_file(db, people, tmp_path):
+    path = write_csv(tmp_path,
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:00,30,",
+                     "Asha Rao,Dr. Iyer,2025-01-06,09:15,30,checkup")
+    result = CsvImporter(db).run("appointments", path)
+    with open(result.rejects_path) as f:
+        assert f.read().splitlines() == [
+            "line,reason,patient,doctor,date,time,duration,purpose",
+            "3,overlaps the appointment on line 2,Asha Rao,Dr. Iyer,2025-01-06,09:15,30,checkup",
+        ]
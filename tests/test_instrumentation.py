@@ -0,0 +1,73 @@
+# tests/test_instrumentation.py
+import sqlite3
+
+import pytest
+
+from database.instrumentation import BUCKETS_MS, QueryStats, StatementStats, normalize_sql
+
+
+class CapturedLog:
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, message):
+        self.messages.append(message)
+
+
+def test_samples_land_in_the_first_bucket_that_holds_them():
+    stats = StatementStats("SELECT 1", "()")
+    for duration_ms in (0.05, 0.06, 1, 3000):
+        stats.add(duration_ms, 1)
+    counts = dict(zip(BUCKETS_MS, stats.buckets))
+    assert counts[0.05] == 1 and counts[0.1] == 1 and counts[1] == 1 and counts[float("inf")] == 1
+    assert sum(stats.buckets) == stats.calls == 4
+    assert stats.max_ms == 3000
+
+
+def test_percentiles_are_bucket_bounds_capped_at_the_max():
+    stats = StatementStats("SELECT 1", "()")
+    for _ in range(90):
+        stats.add(0.2, 1)
+    for _ in range(9):
+        stats.add(4, 1)
+    stats.add(70, 1)
+    assert stats.percentile(0.5) == 0.25
+    assert stats.percentile(0.9) == 0.25
+    assert stats.percentile(0.95) == 5
+    assert stats.percentile(0.99) == 5
+    assert stats.percentile(1.0) == 70
+    # One sample: every percentile is that sample, not its bucket's bound
+    single = StatementStats("SELECT 1", "()")
+    single.add(3, 1)
+    assert single.percentile(0.5) == single.percentile(0.99) == 3
+
+
+def test_in_lists_of_any_length_share_one_statement():
+    stats = QueryStats(slow_ms=float("inf"))
+    stats.record("SELECT * FROM t WHERE id IN (?, ?)", "(int, int)", 2, 1.0)
+    stats.record("SELECT *  FROM t\n WHERE id IN (?,?,?)", "(int, int, int)", 3, 2.0)
+    [statement] = stats.snapshot()
+    assert statement.sql == normalize_sql("SELECT * FROM t WHERE id IN (?)") == "SELECT * FROM t WHERE id IN (?, ...)"
+    assert (statement.calls, statement.rows, statement.total_ms) == (2, 5, 3.0)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE appointments (id INTEGER PRIMARY KEY, doctor_id INTEGER, start_at TEXT)")
+    conn.execute("CREATE INDEX idx_doctor ON appointments(doctor_id, start_at)")
+    yield conn
+    conn.close()
+
+
+def test_a_slow_in_list_query_is_logged_with_its_plan(conn):
+    stats = QueryStats(slow_ms=10)
+    stats._slow_log = log = CapturedLog()
+    sql = "SELECT id FROM appointments WHERE doctor_id IN (?, ?, ?) AND start_at > ?"
+    stats.record(sql, "(int, int, int, str)", 0, 25.0, conn, (1, 2, 3, "2025-01-01"))
+    stats.record(sql, "(int, int, int, str)", 0, 5.0, conn, (1, 2, 3, "2025-01-01"))
+    assert stats.slow_count == 1
+    [message] = log.messages
+    assert "doctor_id IN (?, ...)" in message
+    plan = [line for line in message.splitlines() if line.startswith("  plan: ")]
+    assert plan and "idx_doctor" in plan[0]
@@ -0,0 +1,37 @@
+# tests/test_live_counters.py
+import sqlite3
+import threading
+
+from PyQt5.QtCore import Qt
+
+from database.repository import PatientRepository
+from services import live_counters
+from services.live_counters import LiveCounters
+
+
+def test_a_failed_read_is_reported_once_and_retried(db, monkeypatch):
+    PatientRepository().add("Asha Rao", 30, "F", "9800000000")
+    attempts = []
+
+    def read_snapshot(reports, day):
+        attempts.append(day)
+        if len(attempts) <= 3:
+            raise sqlite3.OperationalError("database is locked")
+        return real_read_snapshot(reports, day)
+
+    real_read_snapshot = live_counters.read_snapshot
+    monkeypatch.setattr(live_counters, "read_snapshot", read_snapshot)
+    counters = LiveCounters(db, poll_ms=5)
+    errors, snapshots, updated = [], [], threading.Event()
+    # Direct, so the slots run on the polling thread without an event loop here
+    counters.failed.connect(lambda error: errors.append(str(error)), Qt.DirectConnection)
+    counters.updated.connect(lambda snapshot: (snapshots.append(snapshot), updated.set()), Qt.DirectConnection)
+    counters.start()
+    try:
+        assert updated.wait(5)
+    finally:
+        counters.stop()
+    assert errors == ["database is locked"]
+    assert len(attempts) == 4
+    assert [snapshot.patients for snapshot in snapshots] == [1]
+    assert not db.reader.in_transaction
@@ -0,0 +1,38 @@
+# tests/test_repository.py
+import sqlite3
+
+import pytest
+
+from database.repository import BillItem, BillRepository, DoctorRepository, PatientRepository, WorkingHours
+
+HOURS = [WorkingHours(0, 8 * 60, 12 * 60)]
+
+
+def test_doctor_is_saved_with_its_working_hours(db):
+    doctors = DoctorRepository()
+    doctor = doctors.add("Dr. Rao", "Cardiology", "", "", HOURS)
+    assert doctors.working_hours([doctor.id]) == {doctor.id: HOURS}
+    doctors.update(doctor.id, "Dr. Rao", "Cardiology", "", "", [])
+    assert doctors.working_hours([doctor.id]) == {}
+
+
+def test_failed_working_hours_roll_back_the_doctor(db):
+    doctors = DoctorRepository()
+    with pytest.raises(sqlite3.ProgrammingError):
+        doctors.add("Dr. Rao", "Cardiology", "", "", [(0, 8 * 60)])
+    assert doctors.page(0, 10) == []
+    doctor = doctors.add("Dr. Rao", "Cardiology", "", "", HOURS)
+    with pytest.raises(sqlite3.ProgrammingError):
+        doctors.update(doctor.id, "Dr. Iyer", "Cardiology", "", "", [(0, 8 * 60)])
+    assert doctors.get(doctor.id).name == "Dr. Rao"
+    assert doctors.working_hours([doctor.id]) == {doctor.id: HOURS}
+
+
+def test_bill_total_is_stored_to_the_paisa(db):
+    patient = PatientRepository().add("Asha Rao", 30, "F", "9800000000")
+    bills = BillRepository()
+    items = [BillItem("Dressing", 1, 0.10, 0.10), BillItem("Syringe", 1, 0.20, 0.20)]
+    bill = bills.get(bills.add(patient.id, items, "2025-01-06 10:00:00", 0.05))
+    # In floats 0.10 + 0.20 + 0.05 is 0.35000000000000003
+    assert bill.total == 0.35
+    assert bills.get(bills.add(patient.id, items, "2025-01-06 11:00:00")).total == 0.3
@@ -0,0 +1,43 @@
+# tests/test_search.py
+import sqlite3
+
+from database.repository import PatientRepository
+from database.search import PatientSearch
+
+
+def add_patients(*names):
+    patients = PatientRepository()
+    return [patients.add(name, 30, "F", "9800000000").id for name in names]
+
+
+def names(results):
+    return [row[1] for row in results]
+
+
+def test_name_prefix_ignores_case_at_the_end_of_the_alphabet(db):
+    add_patients("Liz Baker", "Lizzie Moss", "Lia Stone", "Zara Khan")
+    search = PatientSearch(db)
+    for text in ("LIZ", "liz", "Liz"):
+        assert names(search.name_prefix(text, 10)) == ["Liz Baker", "Lizzie Moss"]
+    assert names(search.name_prefix("Z", 10)) == ["Zara Khan"]
+
+
+def test_first_suggestion_does_not_wait_for_the_write_lock(db):
+    add_patients("Liz Baker")
+    # Another workstation in the middle of a save
+    other = sqlite3.connect(db.path)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        assert names(PatientSearch(db).suggest("liz")) == ["Liz Baker"]
+    finally:
+        other.rollback()
+        other.close()
+
+
+def test_token_prefix_ranks_the_closest_match_first(db):
+    add_patients("Anand Raj Kumar Sharma", "Meera Sharmila Devi Rao", "Ravi Sharma")
+    search = PatientSearch(db)
+    search.check_index()
+    assert search.has_fts
+    assert names(search.token_prefix("sharma", 10))[0] == "Ravi Sharma"
+    assert names(search.token_prefix("sharma", 1)) == ["Ravi Sharma"]
@@ -0,0 +1,54 @@
+# tests/test_table_models.py
+from database.events import BULK, DELETE, INSERT, PATIENT, UPDATE, ChangeEvent
+from services.api_client import ApiError
+from ui.table_models import KeysetTableModel
+
+
+def make_model(rows):
+    model = KeysetTableModel(lambda after_id, limit: [row for row in rows if row[0] > after_id][:limit], ["id", "name"])
+    model.reload()
+    return model
+
+
+def test_own_saves_are_patched_without_reading_them_back():
+    model = make_model([(1, "Asha"), (2, "Ravi")])
+    fetched = []
+
+    def fetch_row(row_id):
+        fetched.append(row_id)
+        return (row_id, "From the database")
+
+    model.patch_saved((2, "Ravi Kumar"))
+    model.patch_saved((3, "Meera"))
+    model.apply_changes([ChangeEvent(PATIENT, UPDATE, 2), ChangeEvent(PATIENT, INSERT, 3)], fetch_row)
+    assert fetched == []
+    assert model.rows == [(1, "Asha"), (2, "Ravi Kumar"), (3, "Meera")]
+    # Later changes to the same rows come from elsewhere and are read again
+    model.apply_changes([ChangeEvent(PATIENT, UPDATE, 2)], fetch_row)
+    assert fetched == [2]
+    assert model.row_at(1) == (2, "From the database")
+
+
+def test_row_changes_are_patched_in_id_order():
+    model = make_model([(1, "Asha"), (3, "Ravi")])
+    events = [ChangeEvent(PATIENT, INSERT, 2), ChangeEvent(PATIENT, DELETE, 3)]
+    model.apply_changes(events, lambda row_id: (row_id, "New"))
+    assert model.rows == [(1, "Asha"), (2, "New")]
+    model.apply_changes([ChangeEvent(PATIENT, BULK, None)], None)
+    assert model.rows == [(1, "Asha"), (3, "Ravi")]
+
+
+def test_a_page_the_server_cannot_deliver_is_reported_once():
+    calls = []
+
+    def fetch_page(after_id, limit):
+        calls.append(after_id)
+        raise ApiError(None, "server unavailable")
+
+    model = KeysetTableModel(fetch_page, ["id", "name"])
+    errors = []
+    model.fetch_failed.connect(lambda error: errors.append(str(error)))
+    model.reload()
+    assert not model.canFetchMore()
+    model.fetchMore()
+    assert calls == [0] and errors == ["server unavailable"]
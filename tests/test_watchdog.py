@@ -0,0 +1,47 @@
+# tests/test_watchdog.py
+import time
+
+import pytest
+from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+
+from services.watchdog import StallWatchdog
+
+THRESHOLD_MS = 150
+
+
+@pytest.fixture
+def app():
+    # The heartbeat is a QTimer, so the test thread needs an event loop
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def run_event_loop(ms, call=None):
+    loop = QEventLoop()
+    if call is not None:
+        QTimer.singleShot(0, call)
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec_()
+
+
+def block_event_loop():
+    time.sleep(THRESHOLD_MS * 3 / 1000)
+
+
+def test_a_blocked_event_loop_is_recorded_once_with_the_blocking_frame(app):
+    watchdog = StallWatchdog(threshold_ms=THRESHOLD_MS, heartbeat_ms=10)
+    watchdog.start()
+    try:
+        run_event_loop(100)
+        assert watchdog.stall_count == 0
+        run_event_loop(100, block_event_loop)
+        # The heartbeat has resumed: the loop keeps running without more stalls
+        run_event_loop(300)
+    finally:
+        watchdog.stop()
+    assert watchdog.stall_count == 1
+    [stall] = watchdog.recent_stalls()
+    assert stall.duration_ms >= THRESHOLD_MS
+    assert stall.location.startswith("tests/test_watchdog.py:") and stall.location.endswith(" in block_event_loop")
+    assert any("time.sleep" in line for line in stall.stack)
+    [offender] = watchdog.worst_offenders()
+    assert (offender.location, offender.count) == (stall.location, 1)
@@ -1,11 +1,26 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QMessageBox, QLabel, QHBoxLayout, QComboBox
+    QPushButton, QTableView, QHeaderView, QMessageBox, QLabel, QHBoxLayout, QComboBox
 )
-from PyQt5.QtGui import QColor, QPalette, QFont
-from PyQt5.QtCore import Qt
-import sqlite3
-import os
+from PyQt5.QtGui import QPalette, QFont
+
+import datetime
+
+from database.events import APPOINTMENT, BULK, DELETE, DOCTOR, INSERT, PATIENT, UPDATE, ChangeEvent
+from database.repository import (
+    AppointmentConflict, AppointmentRepository, DoctorRepository, PatientRepository, DEFAULT_DURATION,
+    appointment_interval
+)
+from services.api_client import open_availability, open_repository
+from services.availability import parse_slot
+from ui.change_events import get_change_dispatcher
+from ui.patient_lookup import PatientCompleter, PatientLookup
+from ui.server_errors import show_server_error, shows_server_errors
+from ui.table_models import KeysetTableModel, ActionButtonDelegate
+
+DURATIONS = [15, 30, 45, 60, 90, 120]
+NEXT_FREE_SLOTS = 8
+SLOT_SEARCH_DAYS = 14
 
 
 class AppointmentWindow(QWidget):
@@ -14,19 +29,29 @@ class AppointmentWindow(QWidget):
         self.setWindowTitle("Manage Appointments")
         self.setGeometry(200, 200, 800, 550)  # slightly wider for buttons
         self.selected_appointment_id = None
+        # The patient the lookup resolved for the current text, if any
+        self.resolved_patient = None
+        self.appointments = open_repository(AppointmentRepository)
+        self.patients = open_repository(PatientRepository)
+        self.doctor_repo = open_repository(DoctorRepository)
+        self.availability = open_availability()
         self.setup_ui()
         self.load_appointments()
-
-    def get_db_path(self):
-        return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'db', 'hospital.db'))
+        get_change_dispatcher().changed.connect(self.on_data_changed)
 
     def setup_ui(self):
         layout = QVBoxLayout()
 
         form_layout = QFormLayout()
 
+        self.patient_lookup = PatientLookup(repository=self.patients, parent=self)
+        self.patient_lookup.found.connect(self.show_patient_details)
+        self.patient_lookup.cleared.connect(self.clear_patient_details)
+
         self.patient_input = QLineEdit()
-        self.patient_input.textChanged.connect(self.show_patient_details)
+        self.patient_input.setPlaceholderText("Type an ID or part of a name")
+        self.patient_input.textChanged.connect(self.on_patient_text_changed)
+        self.patient_completer = PatientCompleter(self.patient_input)
         form_layout.addRow("Patient ID:", self.patient_input)
 
         self.patient_details_label = QLabel("")
@@ -38,16 +63,35 @@ class AppointmentWindow(QWidget):
 
         self.date_input = QLineEdit()
         self.date_input.setPlaceholderText("YYYY-MM-DD")
+        self.date_input.editingFinished.connect(self.load_free_slots)
         form_layout.addRow("Date:", self.date_input)
 
         self.time_input = QLineEdit()
         self.time_input.setPlaceholderText("HH:MM (24h)")
         form_layout.addRow("Time:", self.time_input)
 
+        self.duration_combo = QComboBox()
+        for minutes in DURATIONS:
+            self.duration_combo.addItem(f"{minutes} min", minutes)
+        self.duration_combo.setCurrentIndex(DURATIONS.index(DEFAULT_DURATION))
+        self.duration_combo.currentIndexChanged.connect(self.load_free_slots)
+        form_layout.addRow("Duration:", self.duration_combo)
+
+        self.slot_combo = QComboBox()
+        self.slot_combo.activated.connect(self.use_free_slot)
+        self.any_doctor_btn = QPushButton("Earliest, same specialization")
+        self.any_doctor_btn.clicked.connect(self.find_earliest_same_specialization)
+        slot_layout = QHBoxLayout()
+        slot_layout.addWidget(self.slot_combo, 1)
+        slot_layout.addWidget(self.any_doctor_btn)
+        form_layout.addRow("Free slots:", slot_layout)
+
         self.purpose_input = QLineEdit()
         form_layout.addRow("Purpose:", self.purpose_input)
 
         self.load_doctor_list()
+        self.doctor_combo.currentIndexChanged.connect(self.load_free_slots)
+        self.load_free_slots()
 
         self.add_btn = QPushButton("Add Appointment")
         self.add_btn.setStyleSheet(
@@ -69,22 +113,43 @@ class AppointmentWindow(QWidget):
         layout.addLayout(form_layout)
         layout.addWidget(self.add_btn)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels(["ID", "Patient", "Contact", "Doctor", "Date of Appointment", "Time", "Purpose", "Actions"])
+        self.model = KeysetTableModel(
+            self.appointments.page,
+            ["ID", "Patient", "Contact", "Doctor", "Date of Appointment", "Time", "Purpose", "Actions"],
+            action_column=7
+        )
+        self.model.fetch_failed.connect(lambda error: show_server_error(self, error))
+        self.actions_delegate = ActionButtonDelegate([
+            ("reschedule", "Reschedule", "#ffc107", "black"),
+            ("delete", "Delete", "#dc3545", "white"),
+            ("done", "Done", "#28a745", "white"),
+        ])
+        self.actions_delegate.clicked.connect(self.on_row_action)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(7, self.actions_delegate)
 
         # Header styling: blue background with white bold text
         header = self.table.horizontalHeader()
         header.setStyleSheet("QHeaderView::section { background-color: #007bff; color: white; font-weight: bold; }")
+        header.setSectionResizeMode(QHeaderView.Stretch)
+        header.setSectionResizeMode(7, QHeaderView.Fixed)
+        header.resizeSection(7, 270)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(34)
+        self.table.verticalHeader().hide()
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         # Alternate row colors
         self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #f9f9f9;
                 alternate-background-color: #e8f0fe;
+                color: black;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #a3c1ff;
                 color: black;
             }
@@ -98,128 +163,142 @@ class AppointmentWindow(QWidget):
 
         self.setLayout(layout)
 
+    @shows_server_errors
     def load_doctor_list(self):
-        db = sqlite3.connect(self.get_db_path())
-        cursor = db.cursor()
-
+        # Refilling the combo changes its index, which reloads the free slots
+        selected = self.doctor_combo.currentData()
         self.doctor_combo.clear()
-        cursor.execute("SELECT id, name FROM doctors")
-        self.doctors = cursor.fetchall()
-        for d in self.doctors:
-            self.doctor_combo.addItem(d[1], d[0])
+        for doctor_id, name in self.doctor_repo.list_names():
+            self.doctor_combo.addItem(name, doctor_id)
+        if selected is not None and self.doctor_combo.findData(selected) >= 0:
+            self.doctor_combo.setCurrentIndex(self.doctor_combo.findData(selected))
 
-        db.close()
+    def refresh(self):
+        self.load_doctor_list()
+        self.load_appointments()
 
-    def load_appointments(self):
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT a.id, p.name, p.contact, d.name, a.date, a.time, a.purpose
-            FROM appointments a
-            JOIN patients p ON a.patient_id = p.id
-            JOIN doctors d ON a.doctor_id = d.id
-        """)
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.table.setRowCount(0)
-
-        for row_idx, row in enumerate(rows):
-            self.table.insertRow(row_idx)
-            for col_idx, val in enumerate(row):
-                item = QTableWidgetItem(str(val))
-                item.setTextAlignment(Qt.AlignCenter)
-                item.setForeground(QColor("black"))
-                self.table.setItem(row_idx, col_idx, item)
-
-            # Create action buttons with colors
-            reschedule_btn = QPushButton("Reschedule")
-            reschedule_btn.setStyleSheet(
-                """
-                QPushButton {
-                    background-color: #ffc107;  /* amber */
-                    color: black;
-                    border-radius: 5px;
-                    padding: 4px 8px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #e0a800;
-                }
-                """
-            )
-            reschedule_btn.clicked.connect(lambda _, r=row: self.reschedule_appointment(r))
-
-            delete_btn = QPushButton("Delete")
-            delete_btn.setStyleSheet(
-                """
-                QPushButton {
-                    background-color: #dc3545;  /* red */
-                    color: white;
-                    border-radius: 5px;
-                    padding: 4px 8px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #c82333;
-                }
-                """
-            )
-            delete_btn.clicked.connect(lambda _, id=row[0]: self.delete_appointment(id))
-
-            done_btn = QPushButton("Done")
-            done_btn.setStyleSheet(
-                """
-                QPushButton {
-                    background-color: #28a745;  /* green */
-                    color: white;
-                    border-radius: 5px;
-                    padding: 4px 8px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #218838;
-                }
-                """
+    @shows_server_errors
+    def on_data_changed(self, events):
+        appointment_events = [event for event in events if event.entity == APPOINTMENT]
+        doctor_events = [event for event in events if event.entity == DOCTOR]
+        # Renamed or deleted patients and doctors change the names shown in
+        # loaded rows; those rows are re-read like edited appointments
+        people = {(event.entity, event.id) for event in events
+                  if event.entity in (PATIENT, DOCTOR) and event.op != INSERT}
+        if self.resolved_patient and ((PATIENT, self.resolved_patient.id) in people or (PATIENT, None) in people):
+            self.resolved_patient = None
+        if any(entity_id is None for _, entity_id in people):
+            appointment_events.append(ChangeEvent(APPOINTMENT, BULK, None))
+        elif people:
+            appointment_events += [
+                ChangeEvent(APPOINTMENT, UPDATE, row.id) for row in self.model.rows
+                if (PATIENT, row.patient_id) in people or (DOCTOR, row.doctor_id) in people
+            ]
+        if appointment_events:
+            self.model.apply_changes(appointment_events, self.appointments.row)
+        if doctor_events:
+            self.apply_doctor_changes(doctor_events)
+
+    def apply_doctor_changes(self, events):
+        # Patches the doctor combo in place; removing the selected doctor or
+        # changing their hours reloads the free slots
+        if any(event.op == BULK for event in events):
+            self.load_doctor_list()
+            return
+        selected = self.doctor_combo.currentData()
+        for event in events:
+            index = self.doctor_combo.findData(event.id)
+            doctor = None if event.op == DELETE else self.doctor_repo.get(event.id)
+            if doctor is None:
+                if index >= 0:
+                    self.doctor_combo.removeItem(index)
+            elif index >= 0:
+                self.doctor_combo.setItemText(index, doctor.name)
+            else:
+                self.doctor_combo.addItem(doctor.name, doctor.id)
+        if any(event.id == selected for event in events) and self.doctor_combo.currentData() == selected:
+            self.load_free_slots()
+
+    def slot_search_start(self):
+        # From the date typed in the form, but never offering past slots
+        now = datetime.datetime.now()
+        try:
+            typed = datetime.datetime.strptime(self.date_input.text().strip(), "%Y-%m-%d")
+        except ValueError:
+            return now
+        return max(typed, now)
+
+    @shows_server_errors
+    def load_free_slots(self):
+        self.slot_combo.clear()
+        doctor_id = self.doctor_combo.currentData()
+        if doctor_id is None:
+            return
+        start = self.slot_search_start()
+        slots = self.availability.free_slots(
+            doctor_id, start, start.date() + datetime.timedelta(days=SLOT_SEARCH_DAYS),
+            self.duration_combo.currentData(), NEXT_FREE_SLOTS
+        )
+        for slot in slots:
+            self.slot_combo.addItem(slot.strftime("%a %d %b %Y, %H:%M"), slot)
+        if not slots:
+            self.slot_combo.addItem(f"No free slot in the next {SLOT_SEARCH_DAYS} days")
+
+    def use_free_slot(self, index):
+        slot = self.slot_combo.itemData(index)
+        if slot is not None:
+            self.date_input.setText(slot.strftime("%Y-%m-%d"))
+            self.time_input.setText(slot.strftime("%H:%M"))
+
+    @shows_server_errors
+    def find_earliest_same_specialization(self):
+        doctor = self.doctor_repo.get(self.doctor_combo.currentData()) if self.doctor_combo.count() else None
+        if doctor is None:
+            return
+        start = self.slot_search_start()
+        found = self.availability.first_free_by_specialization(
+            doctor.specialization, start, start.date() + datetime.timedelta(days=6),
+            self.duration_combo.currentData()
+        )
+        if found is None:
+            QMessageBox.information(
+                self, "No Free Slot", f"No {doctor.specialization} doctor is free in the next 7 days."
             )
-            done_btn.clicked.connect(lambda _, id=row[0]: self.mark_done_appointment(id))
-
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(5, 2, 5, 2)
-            action_layout.setSpacing(8)
-            action_layout.addWidget(reschedule_btn)
-            action_layout.addWidget(delete_btn)
-            action_layout.addWidget(done_btn)
-
-            self.table.setCellWidget(row_idx, 7, action_widget)
-
-        self.table.resizeColumnsToContents()
-        self.table.resizeRowsToContents()
-
-    def show_patient_details(self):
-        input_text = self.patient_input.text().strip()
-        if not input_text:
-            self.patient_details_label.setText("")
             return
+        slot, doctor_id = found
+        self.doctor_combo.setCurrentIndex(self.doctor_combo.findData(doctor_id))
+        self.date_input.setText(slot.strftime("%Y-%m-%d"))
+        self.time_input.setText(slot.strftime("%H:%M"))
 
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
-
-        if input_text.isdigit():
-            cursor.execute("SELECT id, name, age, contact FROM patients WHERE id=?", (int(input_text),))
-        else:
-            cursor.execute("SELECT id, name, age, contact FROM patients WHERE LOWER(name)=?", (input_text.lower(),))
-
-        patient = cursor.fetchone()
-        conn.close()
-
+    def load_appointments(self):
+        self.model.reload()
+
+    @shows_server_errors
+    def on_row_action(self, row_idx, action):
+        row = self.model.row_at(row_idx)
+        if action == "reschedule":
+            self.reschedule_appointment(row)
+        elif action == "delete":
+            self.delete_appointment(row.id)
+        elif action == "done":
+            self.mark_done_appointment(row.id)
+
+    def on_patient_text_changed(self, text):
+        self.resolved_patient = None
+        self.patient_lookup.request(text)
+
+    def clear_patient_details(self):
+        self.patient_details_label.setText("")
+
+    def show_patient_details(self, patient):
+        self.resolved_patient = patient
         if patient:
-            details = f"ID: {patient[0]}, Name: {patient[1]}, Age: {patient[2]}, Contact: {patient[3]}"
+            details = f"ID: {patient.id}, Name: {patient.name}, Age: {patient.age}, Contact: {patient.contact}"
             self.patient_details_label.setText(details)
         else:
             self.patient_details_label.setText("No patient found.")
 
+    @shows_server_errors
     def add_or_update_appointment(self):
         patient_text = self.patient_input.text().strip()
         doctor_id = self.doctor_combo.currentData()
@@ -231,55 +310,46 @@ class AppointmentWindow(QWidget):
             QMessageBox.warning(self, "Missing Fields", "Please fill in all details.")
             return
 
-        patient_id = self.get_patient_id_from_input(patient_text)
-        if not patient_id:
+        # Reuse what the lookup already resolved rather than asking again
+        patient = self.resolved_patient or self.patients.find(patient_text)
+        if not patient:
             QMessageBox.warning(self, "Invalid Patient", "Patient not found with given ID or name.")
             return
-
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO appointments (patient_id, doctor_id, date, time, purpose)
-            VALUES (?, ?, ?, ?, ?)
-        """, (patient_id, doctor_id, date, time, purpose))
-
-        conn.commit()
-        conn.close()
+        patient_id = patient.id
+
+        duration = self.duration_combo.currentData()
+        try:
+            appointment = self.appointments.add(patient_id, doctor_id, date, time, purpose, duration)
+        except AppointmentConflict as e:
+            confirm = QMessageBox.question(
+                self, "Doctor Already Booked",
+                f"{e}.\nBook this appointment anyway?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if confirm != QMessageBox.Yes:
+                return
+            appointment = self.appointments.add(
+                patient_id, doctor_id, date, time, purpose, duration, allow_overlap=True
+            )
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Appointment", str(e))
+            return
+        self.model.patch_saved(appointment)
+        self.availability.booked(doctor_id, *appointment_interval(date, time, duration))
 
         self.clear_form()
-        self.load_appointments()
         QMessageBox.information(self, "Success", "Appointment added successfully.")
 
-    def get_patient_id_from_input(self, input_text):
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
-
-        if input_text.isdigit():
-            cursor.execute("SELECT id FROM patients WHERE id=?", (int(input_text),))
-            result = cursor.fetchone()
-            conn.close()
-            if result:
-                return result[0]
-            else:
-                return None
-        else:
-            cursor.execute("SELECT id FROM patients WHERE LOWER(name)=?", (input_text.lower(),))
-            result = cursor.fetchone()
-            conn.close()
-            if result:
-                return result[0]
-            else:
-                return None
-
     def clear_form(self):
         self.patient_input.clear()
         self.patient_details_label.clear()
         self.date_input.clear()
         self.time_input.clear()
         self.purpose_input.clear()
+        self.duration_combo.setCurrentIndex(DURATIONS.index(DEFAULT_DURATION))
         self.add_btn.setText("Add Appointment")
         self.selected_appointment_id = None
+        self.load_free_slots()
 
     def reschedule_appointment(self, appointment_row):
         appointment_id = appointment_row[0]
@@ -292,12 +362,14 @@ class AppointmentWindow(QWidget):
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            conn = sqlite3.connect(self.get_db_path())
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM appointments WHERE id=?", (appointment_id,))
-            conn.commit()
-            conn.close()
-            self.load_appointments()
+            self.remove_appointment(appointment_id)
+
+    def remove_appointment(self, appointment_id):
+        removed = self.appointments.delete(appointment_id)
+        if removed and removed[1] and removed[2]:
+            doctor_id, start_at, end_at = removed
+            self.availability.released(doctor_id, parse_slot(start_at), parse_slot(end_at))
+        self.load_free_slots()
 
     def mark_done_appointment(self, appointment_id):
         confirm = QMessageBox.question(
@@ -306,9 +378,4 @@ class AppointmentWindow(QWidget):
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            conn = sqlite3.connect(self.get_db_path())
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM appointments WHERE id=?", (appointment_id,))
-            conn.commit()
-            conn.close()
-            self.load_appointments()
+            self.remove_appointment(appointment_id)
@@ -0,0 +1,190 @@
+# ui/bill_lines.py
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+import os
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QRegExp, pyqtSignal
+from PyQt5.QtGui import QRegExpValidator
+from PyQt5.QtWidgets import QLineEdit, QSpinBox, QStyledItemDelegate
+
+from database.repository import BillItem
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+# Percent added on top of the subtotal, e.g. HMS_BILL_TAX_RATE=18
+TAX_RATE = Decimal(os.environ.get("HMS_BILL_TAX_RATE", "0"))
+MAX_QUANTITY = 100000
+MAX_PRICE = Decimal("999999999.99")
+
+SERVICE, QUANTITY, PRICE, AMOUNT = range(4)
+HEADERS = ["Service", "Quantity", "Price", "Amount"]
+
+BillLine = namedtuple("BillLine", "service qty unit_price")
+
+
+def money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def parse_quantity(value):
+    qty = int(value)
+    if not 1 <= qty <= MAX_QUANTITY:
+        raise ValueError(f"quantity must be between 1 and {MAX_QUANTITY}")
+    return qty
+
+
+def parse_price(value):
+    try:
+        price = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"invalid price: {value!r}") from None
+    if not price.is_finite() or not ZERO <= price <= MAX_PRICE:
+        raise ValueError(f"price must be between 0 and {MAX_PRICE}")
+    return money(price)
+
+
+def line_total(line):
+    return line.qty * line.unit_price
+
+
+class BillLineModel(QAbstractTableModel):
+    # Service lines of the bill being written, with quantities as ints and
+    # prices as Decimal. The subtotal is adjusted by the difference each edit
+    # makes to its line, so keeping it current costs the same on a bill with
+    # hundreds of lines as on one with a single line.
+    totals_changed = pyqtSignal(object, object, object)
+
+    def __init__(self, tax_rate=TAX_RATE, parent=None):
+        super().__init__(parent)
+        self.tax_rate = tax_rate
+        self.lines = []
+        self.subtotal = ZERO
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        line = self.lines[index.row()]
+        column = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == SERVICE:
+                return line.service
+            if column == QUANTITY:
+                return line.qty if role == Qt.EditRole else str(line.qty)
+            if column == PRICE:
+                return f"{line.unit_price:.2f}"
+            return f"{line_total(line):.2f}"
+        if role == Qt.TextAlignmentRole and column != SERVICE:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if index.column() != AMOUNT:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        # Rejects what does not parse, so every stored line is valid
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        old = self.lines[index.row()]
+        try:
+            if index.column() == SERVICE:
+                line = old._replace(service=str(value).strip())
+            elif index.column() == QUANTITY:
+                line = old._replace(qty=parse_quantity(value))
+            elif index.column() == PRICE:
+                line = old._replace(unit_price=parse_price(value))
+            else:
+                return False
+        except (TypeError, ValueError):
+            return False
+        self.lines[index.row()] = line
+        self.dataChanged.emit(index, self.index(index.row(), AMOUNT))
+        if index.column() != SERVICE:
+            self.subtotal += line_total(line) - line_total(old)
+            self.emit_totals()
+        return True
+
+    def add_line(self, service="", qty=1, unit_price=ZERO):
+        line = BillLine(service, parse_quantity(qty), parse_price(unit_price))
+        row = len(self.lines)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.lines.append(line)
+        self.endInsertRows()
+        self.subtotal += line_total(line)
+        self.emit_totals()
+        return row
+
+    def clear(self):
+        self.beginResetModel()
+        self.lines = []
+        self.endResetModel()
+        self.subtotal = ZERO
+        self.emit_totals()
+
+    def totals(self):
+        # Tax is worked out on the subtotal once, not per line
+        tax = money(self.subtotal * self.tax_rate / 100)
+        return self.subtotal, tax, self.subtotal + tax
+
+    def emit_totals(self):
+        self.totals_changed.emit(*self.totals())
+
+    def bill_items(self):
+        # Lines as the repository stores them; amounts become floats here.
+        # Tax is not a line: it is saved on the bill header.
+        # Untouched blank lines are left out, a priced line without a
+        # service name is an error.
+        items = []
+        for number, line in enumerate(self.lines, 1):
+            if not line.service:
+                if line.unit_price:
+                    raise ValueError(f"Line {number} has a price but no service name.")
+                continue
+            amount = line_total(line)
+            items.append(BillItem(line.service, line.qty, float(line.unit_price), float(amount)))
+        return items
+
+
+class QuantityDelegate(QStyledItemDelegate):
+    def createEditor(self, parent, option, index):
+        editor = QSpinBox(parent)
+        editor.setRange(1, MAX_QUANTITY)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setValue(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value())
+
+
+class PriceDelegate(QStyledItemDelegate):
+    # A text editor held to at most two decimal places, so the typed price
+    # reaches the model as a string and never goes through a float
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setValidator(QRegExpValidator(QRegExp(r"\d{1,9}(\.\d{0,2})?"), editor))
+        editor.setAlignment(Qt.AlignRight)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setText(index.data(Qt.EditRole))
+        editor.selectAll()
+
+    def setModelData(self, editor, model, index):
+        if editor.hasAcceptableInput():
+            model.setData(index, editor.text())
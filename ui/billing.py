@@ -1,29 +1,37 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLineEdit,
-    QPushButton, QTableWidget, QTableWidgetItem, QMessageBox,
-    QLabel
+    QPushButton, QTableView, QMessageBox,
+    QLabel, QListWidget, QListWidgetItem, QComboBox
 )
-from PyQt5.QtPrintSupport import QPrinter
-from PyQt5.QtGui import QTextDocument
-from PyQt5.QtCore import Qt
-import sqlite3
-import os
+from PyQt5.QtGui import QColor
 import datetime
 
+from database.events import PATIENT
+from database.repository import BillRepository, PatientRepository
+from services.api_client import open_repository
+from services.invoice_templates import DEFAULT_TEMPLATE, TEMPLATES
+from services.invoices import get_render_queue
+from ui.bill_lines import PRICE, QUANTITY, SERVICE, BillLineModel, PriceDelegate, QuantityDelegate
+from ui.change_events import get_change_dispatcher
+from ui.patient_lookup import PatientCompleter, PatientLookup
+from ui.server_errors import shows_server_errors
+
 
 class BillingWindow(QWidget):
+    MAX_NOTIFICATIONS = 50
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Billing")
         self.setGeometry(250, 250, 700, 500)
-        self.services = []
+        self.bills = open_repository(BillRepository)
+        self.patients = open_repository(PatientRepository)
+        self.render_queue = get_render_queue()
         self.setup_ui()
-
-    def get_db_path(self):
-        return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'db', 'hospital.db'))
-
-    def get_logo_path(self):
-        return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'assets', 'logo.png'))
+        self.render_queue.rendered.connect(self.on_invoice_rendered)
+        self.render_queue.failed.connect(self.on_invoice_failed)
+        self.render_queue.pending_changed.connect(self.on_render_pending)
+        get_change_dispatcher().changed.connect(self.on_data_changed)
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -32,7 +40,11 @@ class BillingWindow(QWidget):
         self.patient_input = QLineEdit()
         self.patient_input.setPlaceholderText("Enter Patient ID or Name")
         self.patient_input.setStyleSheet("color: white;")
-        self.patient_input.textChanged.connect(self.load_patient_info)
+        self.patient_lookup = PatientLookup(repository=self.patients, parent=self)
+        self.patient_lookup.found.connect(self.load_patient_info)
+        self.patient_lookup.cleared.connect(self.clear_patient_info)
+        self.patient_input.textChanged.connect(self.on_patient_text_changed)
+        self.patient_completer = PatientCompleter(self.patient_input)
         form_layout.addRow("Patient ID or Name:", self.patient_input)
 
         self.patient_details_label = QLabel("")
@@ -41,13 +53,17 @@ class BillingWindow(QWidget):
 
         layout.addLayout(form_layout)
 
-        self.services_table = QTableWidget()
-        self.services_table.setColumnCount(3)
-        self.services_table.setHorizontalHeaderLabels(["Service", "Quantity", "Price"])
+        self.service_lines = BillLineModel(parent=self)
+        self.service_lines.totals_changed.connect(self.show_totals)
+        self.services_table = QTableView()
+        self.services_table.setModel(self.service_lines)
+        self.services_table.setItemDelegateForColumn(QUANTITY, QuantityDelegate(self.services_table))
+        self.services_table.setItemDelegateForColumn(PRICE, PriceDelegate(self.services_table))
+        self.services_table.horizontalHeader().setStretchLastSection(True)
         self.services_table.setStyleSheet("""
             QHeaderView::section { background-color: #2c3e50; color: white; font-weight: bold; }
-            QTableWidget { background-color: #ecf0f1; color: black; }
-            QTableWidget::item:selected { background-color: #3498db; color: white; }
+            QTableView { background-color: #ecf0f1; color: black; }
+            QTableView::item:selected { background-color: #3498db; color: white; }
         """)
         layout.addWidget(self.services_table)
 
@@ -67,9 +83,18 @@ class BillingWindow(QWidget):
         add_service_btn.clicked.connect(self.add_service_row)
         layout.addWidget(add_service_btn)
 
-        self.total_label = QLabel("Total: ₹0.00")
+        self.total_label = QLabel()
         self.total_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #27ae60;")
         layout.addWidget(self.total_label)
+        self.show_totals(*self.service_lines.totals())
+
+        self.template_combo = QComboBox()
+        for name in TEMPLATES:
+            self.template_combo.addItem(name.capitalize(), name)
+        self.template_combo.setCurrentIndex(self.template_combo.findData(DEFAULT_TEMPLATE))
+        template_form = QFormLayout()
+        template_form.addRow("Invoice Template:", self.template_combo)
+        layout.addLayout(template_form)
 
         generate_btn = QPushButton("Generate Bill")
         generate_btn.setStyleSheet("""
@@ -87,140 +112,93 @@ class BillingWindow(QWidget):
         generate_btn.clicked.connect(self.generate_bill)
         layout.addWidget(generate_btn)
 
-        self.setLayout(layout)
+        # PDFs are rendered in the background; results show up here
+        self.queue_label = QLabel("")
+        self.queue_label.setStyleSheet("color: #7f8c8d; font-style: italic;")
+        layout.addWidget(self.queue_label)
 
-    def load_patient_info(self):
-        input_text = self.patient_input.text().strip()
-        if not input_text:
-            self.patient_details_label.setText("")
-            return
+        self.notifications = QListWidget()
+        self.notifications.setMaximumHeight(90)
+        layout.addWidget(self.notifications)
 
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
+        self.setLayout(layout)
 
-        if input_text.isdigit():
-            cursor.execute("SELECT id, name, age, contact FROM patients WHERE id=?", (int(input_text),))
-        else:
-            cursor.execute("SELECT id, name, age, contact FROM patients WHERE LOWER(name)=?", (input_text.lower(),))
+    def on_patient_text_changed(self, text):
+        # Never bill the previous patient while the new lookup is in flight
+        self.patient_id = None
+        self.patient_lookup.request(text)
 
-        patient = cursor.fetchone()
-        conn.close()
+    def clear_patient_info(self):
+        self.patient_id = None
+        self.patient_details_label.setText("")
 
+    def load_patient_info(self, patient):
         if patient:
-            self.patient_id = patient[0]
-            self.patient_details_label.setText(f"ID: {patient[0]}, Name: {patient[1]}, Age: {patient[2]}, Contact: {patient[3]}")
+            self.patient_id = patient.id
+            self.patient_details_label.setText(f"ID: {patient.id}, Name: {patient.name}, Age: {patient.age}, Contact: {patient.contact}")
         else:
             self.patient_id = None
             self.patient_details_label.setText("No patient found.")
 
+    @shows_server_errors
+    def on_data_changed(self, events):
+        # Keeps the shown patient current when it is edited or deleted elsewhere
+        patient_id = getattr(self, "patient_id", None)
+        if patient_id and any(event.entity == PATIENT and event.id in (patient_id, None) for event in events):
+            self.load_patient_info(self.patients.get(patient_id))
+
     def add_service_row(self):
-        row = self.services_table.rowCount()
-        self.services_table.insertRow(row)
+        row = self.service_lines.add_line()
+        self.services_table.edit(self.service_lines.index(row, SERVICE))
 
-        for col, value in enumerate(["", "1", "0.00"]):
-            item = QTableWidgetItem(value)
-            item.setForeground(Qt.black)
-            self.services_table.setItem(row, col, item)
+    def show_totals(self, subtotal, tax, total):
+        self.total_label.setText(
+            f"Subtotal: ₹{subtotal:.2f}   Tax ({self.service_lines.tax_rate.normalize()}%): ₹{tax:.2f}   "
+            f"Total: ₹{total:.2f}"
+        )
 
+    @shows_server_errors
     def generate_bill(self):
         if not hasattr(self, 'patient_id') or not self.patient_id:
             QMessageBox.warning(self, "Invalid Patient", "Please select a valid patient.")
             return
 
-        total = 0.0
-        services = []
-
-        for row in range(self.services_table.rowCount()):
-            service_item = self.services_table.item(row, 0)
-            qty_item = self.services_table.item(row, 1)
-            price_item = self.services_table.item(row, 2)
-
-            if not service_item or not qty_item or not price_item:
-                continue
-
-            try:
-                service = service_item.text()
-                qty = int(qty_item.text())
-                price = float(price_item.text())
-                line_total = qty * price
-                total += line_total
-                services.append((service, qty, price, line_total))
-            except ValueError:
-                continue
+        try:
+            services = self.service_lines.bill_items()
+        except ValueError as error:
+            QMessageBox.warning(self, "Invalid Service", str(error))
+            return
 
         if not services:
             QMessageBox.warning(self, "No Services", "Please add at least one valid service.")
             return
 
-        services_text = " | ".join([f"{s} x{q} @₹{p:.2f}" for s, q, p, l in services])
         date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS bills (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                patient_id INTEGER,
-                services TEXT,
-                total REAL,
-                date TEXT,
-                FOREIGN KEY(patient_id) REFERENCES patients(id)
-            )
-        """)
-        cursor.execute("""
-            INSERT INTO bills (patient_id, services, total, date)
-            VALUES (?, ?, ?, ?)
-        """, (self.patient_id, services_text, total, date))
-        conn.commit()
-        conn.close()
-
-        self.total_label.setText(f"Total: ₹{total:.2f}")
+        tax = self.service_lines.totals()[1]
+        bill_id = self.bills.add(self.patient_id, services, date, float(tax))
+
+        self.service_lines.clear()
+
+        self.generate_pdf_bill(bill_id)
         QMessageBox.information(self, "Success", "Bill generated successfully!")
-        self.services_table.setRowCount(0)
 
-        self.generate_pdf_bill(services, total)
+    def generate_pdf_bill(self, bill_id):
+        self.render_queue.submit(bill_id, self.template_combo.currentData())
+        self.notify(f"Invoice for bill #{bill_id} queued.")
 
-    def generate_pdf_bill(self, services, total):
-        logo_path = self.get_logo_path()
-        patient_info = self.patient_details_label.text()
-        date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def on_invoice_rendered(self, bill_id, path):
+        self.notify(f"Bill #{bill_id} saved to {path}")
+
+    def on_invoice_failed(self, bill_id, error):
+        self.notify(f"Bill #{bill_id} PDF failed: {error}", error=True)
+
+    def on_render_pending(self, pending):
+        self.queue_label.setText(f"Invoices rendering: {pending}" if pending else "")
 
-        services_html = "".join([f"<tr><td>{s}</td><td>{q}</td><td>₹{p:.2f}</td><td>₹{l:.2f}</td></tr>" for s, q, p, l in services])
-
-        html = f"""
-        <html>
-        <head><style>
-        body {{ color: black; font-family: Arial, sans-serif; }}
-        table {{ border-collapse: collapse; width: 100%; color: black; }}
-        th, td {{ border: 1px solid #000; padding: 8px; text-align: left; color: black; }}
-        h2, h3, p {{ color: black; }}
-        </style></head>
-        <body>
-            <img src="{logo_path}" height="80" />
-            <h2>Hospital Bill</h2>
-            <p><strong>Patient Info:</strong> {patient_info}</p>
-            <p><strong>Date:</strong> {date}</p>
-            <h3>Services</h3>
-            <table>
-                <tr><th>Service</th><th>Quantity</th><th>Price</th><th>Total</th></tr>
-                {services_html}
-            </table>
-            <h3>Total Amount: ₹{total:.2f}</h3>
-        </body>
-        </html>
-        """
-
-        document = QTextDocument()
-        document.setHtml(html)
-
-        printer = QPrinter()
-        printer.setOutputFormat(QPrinter.PdfFormat)
-        output_dir = os.path.join(os.path.expanduser("~"), "Documents")
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        filename = f"Bill_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        output_path = os.path.join(output_dir, filename)
-        printer.setOutputFileName(output_path)
-
-        document.print_(printer)
-        QMessageBox.information(self, "PDF Saved", f"Bill saved to {output_path}")
+    def notify(self, message, error=False):
+        item = QListWidgetItem(message)
+        item.setForeground(QColor("#e74c3c" if error else "#27ae60"))
+        self.notifications.insertItem(0, item)
+        while self.notifications.count() > self.MAX_NOTIFICATIONS:
+            self.notifications.takeItem(self.notifications.count() - 1)
@@ -0,0 +1,50 @@
+# ui/change_events.py
+import threading
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal
+
+from database.events import get_change_bus, merge
+
+
+class ChangeDispatcher(QObject):
+    # Hands change-bus events to the GUI thread. Whatever is published
+    # before the event loop next runs is merged per (entity, id) and emitted
+    # as one `changed` list, so a burst of writes costs the windows one
+    # update pass instead of one per row.
+    changed = pyqtSignal(object)
+    _wake = pyqtSignal()
+
+    def __init__(self, bus=None, parent=None):
+        super().__init__(parent)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake.connect(self.flush, Qt.QueuedConnection)
+        self.bus = bus or get_change_bus()
+        self.bus.subscribe(self.post)
+
+    def post(self, events):
+        # Called on the committing thread, which may not be the GUI thread
+        with self._lock:
+            was_empty = not self._pending
+            for event in events:
+                merge(self._pending, event)
+        if was_empty:
+            self._wake.emit()
+
+    def flush(self):
+        with self._lock:
+            events = list(self._pending.values())
+            self._pending = {}
+        if events:
+            self.changed.emit(events)
+
+
+_dispatcher = None
+
+
+def get_change_dispatcher():
+    # Created on first use, which is always from a window on the GUI thread
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = ChangeDispatcher()
+    return _dispatcher
@@ -1,20 +1,60 @@
 # ui/dashboard.py
-from ui.billing import BillingWindow
-from ui.patients import PatientWindow
-from ui.doctors import DoctorWindow
-from ui.appointments import AppointmentWindow
+import importlib
+import os
 
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QPushButton, QMessageBox, QSizePolicy, QSpacerItem
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QMessageBox, QSizePolicy, QSpacerItem, QShortcut
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QKeySequence
+
+from database.instrumentation import get_query_stats
+from services.api_client import SERVER_URL
+from services.live_counters import get_live_counters
+
+# Feature windows are imported and built on first use, not at startup
+WINDOWS = {
+    "patients": ("ui.patients", "PatientWindow"),
+    "doctors": ("ui.doctors", "DoctorWindow"),
+    "appointments": ("ui.appointments", "AppointmentWindow"),
+    "billing": ("ui.billing", "BillingWindow"),
+    "reports": ("ui.reports", "ReportsWindow"),
+    "import": ("ui.data_import", "ImportWindow"),
+    "diagnostics": ("ui.diagnostics", "DiagnosticsWindow"),
+}
+
+# Writes the query statistics report from any window of the application
+QUERY_REPORT_SHORTCUT = "Ctrl+Shift+Q"
+
+# Doctors listed by name under the counters; the rest are summed up
+DOCTORS_SHOWN = 5
+
+# Imported one per event-loop turn after the dashboard is shown, so the first
+# click on a button does not pay for them. Set HMS_PREWARM=0 to disable.
+PREWARM_MODULES = [
+    "ui.patients", "ui.doctors", "ui.appointments", "ui.billing",
+    "services.invoices", "services.invoice_templates",
+]
+
 
 class DashboardWindow(QWidget):
-    def __init__(self):
+    def __init__(self, prewarm=None):
         super().__init__()
         self.setWindowTitle("Hospital Management - Dashboard")
-        self.setGeometry(100, 100, 450, 400)
+        self.setGeometry(100, 100, 520, 720)
+        self.windows = {}
         self.setup_ui()
+        self.counters = get_live_counters()
+        self.counters.updated.connect(self.show_counters)
+        self.counters.failed.connect(self.show_counters_error)
+        if self.counters.snapshot is not None:
+            self.show_counters(self.counters.snapshot)
+        self.counters.start()
+        if prewarm is None:
+            prewarm = os.environ.get("HMS_PREWARM", "1") != "0"
+        self.prewarm_queue = list(PREWARM_MODULES) if prewarm else []
+        if self.prewarm_queue:
+            QTimer.singleShot(0, self.prewarm_next)
 
     def setup_ui(self):
         self.setStyleSheet("background-color: white;")
@@ -33,6 +73,32 @@ class DashboardWindow(QWidget):
             margin-bottom: 30px;
         """)
 
+        # Live numbers, filled in by the counters thread
+        tile_style = """
+            QLabel {
+                background-color: #ecf0f1;
+                color: #2c3e50;
+                border-radius: 8px;
+                padding: 10px;
+                font-size: 13px;
+            }
+        """
+        self.patients_tile = QLabel()
+        self.appointments_tile = QLabel()
+        self.bills_tile = QLabel()
+        tiles_layout = QHBoxLayout()
+        for tile in (self.patients_tile, self.appointments_tile, self.bills_tile):
+            tile.setStyleSheet(tile_style)
+            tile.setAlignment(Qt.AlignCenter)
+            tile.setTextFormat(Qt.RichText)
+            tile.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+            tiles_layout.addWidget(tile)
+        self.doctors_today_label = QLabel()
+        self.doctors_today_label.setAlignment(Qt.AlignCenter)
+        self.doctors_today_label.setWordWrap(True)
+        self.doctors_today_label.setStyleSheet("color: #7f8c8d; font-size: 12px;")
+        self.show_counters(None)
+
         # Create buttons with consistent styling
         btn_style = """
             QPushButton {
@@ -67,6 +133,21 @@ class DashboardWindow(QWidget):
         billing_btn.clicked.connect(self.open_billing)
         billing_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
+        reports_btn = QPushButton("Reports")
+        reports_btn.setStyleSheet(btn_style)
+        reports_btn.clicked.connect(self.open_reports)
+        reports_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+        import_btn = QPushButton("Import Data")
+        import_btn.setStyleSheet(btn_style)
+        import_btn.clicked.connect(self.open_import)
+        import_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+        diagnostics_btn = QPushButton("Diagnostics")
+        diagnostics_btn.setStyleSheet(btn_style)
+        diagnostics_btn.clicked.connect(self.open_diagnostics)
+        diagnostics_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
         logout_btn = QPushButton("Logout")
         logout_btn.setStyleSheet("""
             QPushButton {
@@ -83,31 +164,115 @@ class DashboardWindow(QWidget):
         logout_btn.clicked.connect(self.logout)
         logout_btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
+        if SERVER_URL:
+            # Reports and imports work on the database file itself; in server
+            # mode they run on the server machine, started without HMS_SERVER_URL
+            for button in (reports_btn, import_btn):
+                button.setEnabled(False)
+                button.setToolTip("Not available in server mode: open it on the server machine.")
+
         # Add widgets to layout in order
         layout.addWidget(label)
+        layout.addLayout(tiles_layout)
+        layout.addWidget(self.doctors_today_label)
         layout.addWidget(patients_btn)
         layout.addWidget(doctors_btn)
         layout.addWidget(appointments_btn)
         layout.addWidget(billing_btn)
+        layout.addWidget(reports_btn)
+        layout.addWidget(import_btn)
+        layout.addWidget(diagnostics_btn)
         layout.addWidget(logout_btn)
 
         self.setLayout(layout)
 
+        report_shortcut = QShortcut(QKeySequence(QUERY_REPORT_SHORTCUT), self)
+        report_shortcut.setContext(Qt.ApplicationShortcut)
+        report_shortcut.activated.connect(self.dump_query_report)
+
+    @staticmethod
+    def tile_text(value, caption):
+        return f"<span style='font-size: 20px; font-weight: bold;'>{value}</span><br>{caption}"
+
+    def show_counters(self, snapshot):
+        if snapshot is None:
+            for tile, caption in ((self.patients_tile, "patients"), (self.appointments_tile, "appointments today"),
+                                  (self.bills_tile, "bills today")):
+                tile.setText(self.tile_text("…", caption))
+            self.doctors_today_label.setText("")
+            return
+        self.patients_tile.setText(self.tile_text(f"{snapshot.patients:,}", "patients"))
+        self.appointments_tile.setText(self.tile_text(f"{snapshot.appointments_today:,}", "appointments today"))
+        self.bills_tile.setText(self.tile_text(
+            f"{snapshot.bills_today:,}", f"bills today<br>₹{snapshot.revenue_today:,.2f}"
+        ))
+        doctors = snapshot.doctors_today
+        parts = [f"{doctor.name or f'#{doctor.doctor_id}'}: {doctor.appointments}" for doctor in doctors[:DOCTORS_SHOWN]]
+        if len(doctors) > DOCTORS_SHOWN:
+            rest = sum(doctor.appointments for doctor in doctors[DOCTORS_SHOWN:])
+            parts.append(f"{len(doctors) - DOCTORS_SHOWN} more doctors: {rest}")
+        self.doctors_today_label.setText(" · ".join(parts) if parts else "No appointments booked for today")
+
+    def show_counters_error(self, error):
+        # The tiles keep the last numbers read; the next good read replaces
+        # this message
+        self.doctors_today_label.setText(f"Live counters could not be read: {error}")
+
+    def dump_query_report(self):
+        stats = get_query_stats()
+        path = stats.dump()
+        QMessageBox.information(
+            self, "Query Report",
+            f"{stats.slow_count} slow queries this session.\nReport written to:\n{path}"
+        )
+
+    def prewarm_next(self):
+        if not self.prewarm_queue:
+            return
+        importlib.import_module(self.prewarm_queue.pop(0))
+        if self.prewarm_queue:
+            QTimer.singleShot(0, self.prewarm_next)
+
+    def open_window(self, key):
+        window = self.windows.get(key)
+        if window is None:
+            module_name, class_name = WINDOWS[key]
+            window_class = getattr(importlib.import_module(module_name), class_name)
+            window = self.windows[key] = window_class()
+        elif not window.isVisible() and hasattr(window, "refresh"):
+            # Reopening a closed window: bring its data up to date
+            window.refresh()
+        window.show()
+        window.raise_()
+        window.activateWindow()
+        return window
+
     def open_patients(self):
-        self.patients_window = PatientWindow()
-        self.patients_window.show()
+        self.open_window("patients")
 
     def open_doctors(self):
-        self.doctors_window = DoctorWindow()
-        self.doctors_window.show()
+        self.open_window("doctors")
 
     def open_appointments(self):
-        self.appointments_window = AppointmentWindow()
-        self.appointments_window.show()
+        self.open_window("appointments")
 
     def open_billing(self):
-        self.billing_window = BillingWindow()
-        self.billing_window.show()
+        self.open_window("billing")
+
+    def open_reports(self):
+        self.open_window("reports")
+
+    def open_import(self):
+        self.open_window("import")
+
+    def open_diagnostics(self):
+        self.open_window("diagnostics")
+
+    def closeEvent(self, event):
+        self.counters.updated.disconnect(self.show_counters)
+        self.counters.failed.disconnect(self.show_counters_error)
+        self.counters.stop()
+        super().closeEvent(event)
 
     def logout(self):
         QMessageBox.information(self, "Logout", "You have been logged out.")
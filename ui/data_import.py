@@ -0,0 +1,175 @@
+import os
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QFormLayout, QLabel, QComboBox, QLineEdit, QPushButton,
+    QHBoxLayout, QCheckBox, QProgressBar, QTableWidget, QTableWidgetItem, QHeaderView,
+    QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import QRunnable, QThreadPool, pyqtSignal
+
+from services.importer import ENTITIES, CsvImporter, CsvImportError
+
+
+class _ImportTask(QRunnable):
+    # Runs the import on a pool thread with its own database connection; the
+    # window only receives progress and the result through signals
+    def __init__(self, window, importer, entity, path):
+        super().__init__()
+        self.window = window
+        self.importer = importer
+        self.entity = entity
+        self.path = path
+
+    def run(self):
+        try:
+            result = self.importer.run(self.entity, self.path)
+        except (OSError, CsvImportError) as e:
+            self.emit(self.window.failed, str(e))
+        except Exception as e:
+            self.emit(self.window.failed, f"{type(e).__name__}: {e}")
+        else:
+            self.emit(self.window.finished, result)
+
+    def emit(self, signal, value):
+        try:
+            signal.emit(value)
+        except RuntimeError:
+            # The window was closed while the import was running
+            pass
+
+
+class ImportWindow(QWidget):
+    progressed = pyqtSignal(str, int, int, int, float)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Import Data")
+        self.setGeometry(200, 200, 700, 500)
+        self.importer = None
+        self.setup_ui()
+        self.progressed.connect(self.on_progress)
+        self.finished.connect(self.on_finished)
+        self.failed.connect(self.on_failed)
+
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        form_layout = QFormLayout()
+
+        self.entity_combo = QComboBox()
+        for entity in ENTITIES:
+            self.entity_combo.addItem(entity.title(), entity)
+        form_layout.addRow("Import:", self.entity_combo)
+
+        self.path_input = QLineEdit()
+        self.path_input.setPlaceholderText("CSV file with a header row")
+        browse_btn = QPushButton("Browse...")
+        browse_btn.clicked.connect(self.browse)
+        path_layout = QHBoxLayout()
+        path_layout.addWidget(self.path_input, 1)
+        path_layout.addWidget(browse_btn)
+        form_layout.addRow("File:", path_layout)
+
+        self.overlap_check = QCheckBox("Import appointments even when the doctor is already booked")
+        form_layout.addRow("", self.overlap_check)
+
+        self.columns_label = QLabel(
+            "Patients: name, age, gender, contact. Doctors: name, specialization, email, contact.\n"
+            "Appointments: patient, doctor (id or exact name), date, time, duration, purpose."
+        )
+        self.columns_label.setStyleSheet("color: #555; font-style: italic;")
+        layout.addLayout(form_layout)
+        layout.addWidget(self.columns_label)
+
+        btn_layout = QHBoxLayout()
+        self.import_btn = QPushButton("Import")
+        self.import_btn.setStyleSheet(
+            "QPushButton { background-color: #28a745; color: white; font-weight: bold; "
+            "padding: 8px 15px; border-radius: 6px; }"
+        )
+        self.import_btn.clicked.connect(self.start_import)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_import)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.import_btn)
+        btn_layout.addWidget(self.cancel_btn)
+        layout.addLayout(btn_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setTextVisible(False)
+        layout.addWidget(self.progress_bar)
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.rejects_table = QTableWidget(0, 3)
+        self.rejects_table.setHorizontalHeaderLabels(["Line", "Reason", "Row"])
+        self.rejects_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.rejects_table.verticalHeader().hide()
+        self.rejects_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.rejects_table)
+
+        self.setLayout(layout)
+
+    def browse(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Choose CSV file", self.path_input.text(),
+                                              "CSV files (*.csv);;All files (*)")
+        if path:
+            self.path_input.setText(path)
+
+    def start_import(self):
+        path = self.path_input.text().strip()
+        if not os.path.isfile(path):
+            QMessageBox.warning(self, "Import", "Choose an existing CSV file.")
+            return
+        self.importer = CsvImporter(allow_overlap=self.overlap_check.isChecked(), progress=self.report_progress)
+        self.import_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.rejects_table.setRowCount(0)
+        self.status_label.setText("Importing...")
+        QThreadPool.globalInstance().start(_ImportTask(self, self.importer, self.entity_combo.currentData(), path))
+
+    def report_progress(self, entity, read, imported, rejected, fraction):
+        # Called on the import thread
+        try:
+            self.progressed.emit(entity, read, imported, rejected, fraction)
+        except RuntimeError:
+            pass
+
+    def cancel_import(self):
+        if self.importer:
+            self.importer.cancel()
+            self.status_label.setText("Cancelling after the current batch...")
+
+    def on_progress(self, entity, read, imported, rejected, fraction):
+        self.progress_bar.setValue(int(fraction * 1000))
+        self.status_label.setText(f"{read} rows read, {imported} imported, {rejected} rejected")
+
+    def on_finished(self, result):
+        self.import_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        rate = result.read / result.elapsed if result.elapsed else 0.0
+        stopped = " (cancelled)" if self.importer.cancelled else ""
+        text = (f"Imported {result.imported} of {result.read} {result.entity} rows in {result.elapsed:.1f}s "
+                f"({rate:,.0f} rows/s){stopped}, {result.rejected} rejected.")
+        if result.rejects_path:
+            text += f"\nAll rejected rows: {result.rejects_path}"
+        self.status_label.setText(text)
+        self.show_rejections(self.importer.rejections)
+
+    def on_failed(self, error):
+        self.import_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        self.status_label.setText("")
+        QMessageBox.warning(self, "Import Failed", error)
+
+    def show_rejections(self, rejections):
+        self.rejects_table.setRowCount(len(rejections))
+        for row, rejection in enumerate(rejections):
+            values = [str(rejection.line), rejection.reason, ", ".join(rejection.row)]
+            for col, value in enumerate(values):
+                self.rejects_table.setItem(row, col, QTableWidgetItem(value))
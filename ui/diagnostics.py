@@ -0,0 +1,173 @@
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHBoxLayout, QHeaderView, QPlainTextEdit, QMessageBox
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from database.connection import get_database
+from database.instrumentation import get_query_stats
+from services.api_client import SERVER_URL, ApiError, get_api_client
+from services.watchdog import get_watchdog
+
+REFRESH_MS = 1000
+
+
+class DiagnosticsWindow(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Diagnostics")
+        self.setGeometry(200, 200, 900, 600)
+        self.watchdog = get_watchdog()
+        self.offenders = []
+        self.setup_ui()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def setup_ui(self):
+        self.setStyleSheet("""
+            QWidget {
+                background-color: #1e272e;
+                color: #f5f6fa;
+                font-family: 'Segoe UI', sans-serif;
+            }
+            QLabel#title {
+                font-size: 20px;
+                font-weight: bold;
+            }
+            QPushButton {
+                padding: 8px 14px;
+                font-size: 14px;
+                font-weight: bold;
+                border: none;
+                border-radius: 5px;
+                background-color: #3498db;
+                color: white;
+            }
+            QTableWidget, QPlainTextEdit {
+                background-color: #2f3640;
+                color: #f5f6fa;
+                font-size: 13px;
+            }
+            QHeaderView::section {
+                background-color: #273c75;
+                color: white;
+                padding: 6px;
+                border: 1px solid #192a56;
+            }
+        """)
+
+        layout = QVBoxLayout()
+
+        title = QLabel("GUI Stalls")
+        title.setObjectName("title")
+        layout.addWidget(title, alignment=Qt.AlignCenter)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["Location", "Stalls", "Total ms", "Worst ms"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.itemSelectionChanged.connect(self.show_worst_stack)
+        layout.addWidget(self.table)
+
+        layout.addWidget(QLabel("Stack of the worst stall at the selected location:"))
+        self.stack_view = QPlainTextEdit()
+        self.stack_view.setReadOnly(True)
+        layout.addWidget(self.stack_view)
+
+        btn_layout = QHBoxLayout()
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        report_btn = QPushButton("Write Query Report")
+        report_btn.clicked.connect(self.write_query_report)
+        btn_layout.addStretch()
+        btn_layout.addWidget(reset_btn)
+        btn_layout.addWidget(report_btn)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        watchdog = self.watchdog
+        stats = get_query_stats()
+        running = "since " + watchdog.started.strftime("%H:%M:%S") if watchdog.started else "not running"
+        self.summary_label.setText(
+            f"Watchdog {running}, threshold {watchdog.threshold * 1000:g} ms: "
+            f"{watchdog.stall_count} stalls. Slow queries: {stats.slow_count}. "
+            + (self.server_summary() if SERVER_URL else self.database_summary())
+        )
+
+        selected = self.selected_location()
+        self.offenders = watchdog.worst_offenders()
+        self.table.setRowCount(len(self.offenders))
+        for row, offender in enumerate(self.offenders):
+            values = [offender.location, str(offender.count),
+                      f"{offender.total_ms:.0f}", f"{offender.worst_ms:.0f}"]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+            if offender.location == selected:
+                self.table.selectRow(row)
+
+    def database_summary(self):
+        db = get_database()
+        cache = db.records.stats()
+        return (
+            f"Record cache: {cache.size}/{cache.capacity} entries, {cache.hits} hits, "
+            f"{cache.misses} misses, {cache.evictions} evictions. "
+            f"Write lock: {db.write_retries} retries, {db.write_failures} gave up."
+        )
+
+    def server_summary(self):
+        # In server mode the database, its caches and its write lock are the
+        # server's, so its /status is shown instead
+        try:
+            status = get_api_client().get("/status")
+        except ApiError as error:
+            return f"Server: {error}."
+        cache = status["cache"]
+        return (
+            f"Server: {status['requests']} requests, {status['writes']} writes, "
+            f"{status['write_queue']} queued; response cache {cache['entries']} entries, "
+            f"{cache['hits']} hits, {cache['misses']} misses."
+        )
+
+    def selected_location(self):
+        rows = self.table.selectionModel().selectedRows()
+        if rows and rows[0].row() < len(self.offenders):
+            return self.offenders[rows[0].row()].location
+        return None
+
+    def show_worst_stack(self):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows or rows[0].row() >= len(self.offenders):
+            self.stack_view.clear()
+            return
+        offender = self.offenders[rows[0].row()]
+        self.stack_view.setPlainText("\n".join(offender.worst_stack) or "No Python stack was captured.")
+
+    def reset(self):
+        self.watchdog.reset()
+        self.stack_view.clear()
+        self.refresh()
+
+    def write_query_report(self):
+        path = get_query_stats().dump()
+        QMessageBox.information(self, "Query Report", f"Report written to:\n{path}")
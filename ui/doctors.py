@@ -1,11 +1,17 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLabel,
-    QLineEdit, QPushButton, QMessageBox, QTableWidget,
-    QTableWidgetItem, QHBoxLayout, QHeaderView
+    QLineEdit, QPushButton, QMessageBox, QTableView,
+    QHBoxLayout, QHeaderView
 )
 from PyQt5.QtCore import Qt
-import sqlite3
-import os
+
+from database.events import DOCTOR
+from database.repository import DoctorRepository
+from services.api_client import open_repository
+from services.availability import DEFAULT_WORKING_HOURS, format_working_hours, parse_working_hours
+from ui.change_events import get_change_dispatcher
+from ui.server_errors import show_server_error, shows_server_errors
+from ui.table_models import KeysetTableModel, ActionButtonDelegate
 
 class DoctorWindow(QWidget):
     def __init__(self):
@@ -13,8 +19,10 @@ class DoctorWindow(QWidget):
         self.setWindowTitle("Manage Doctors")
         self.setGeometry(150, 150, 600, 500)
         self.selected_doctor_id = None
+        self.doctors = open_repository(DoctorRepository)
         self.setup_ui()
         self.load_doctors()
+        get_change_dispatcher().changed.connect(self.on_data_changed)
 
     def setup_ui(self):
         self.setStyleSheet("""
@@ -45,15 +53,7 @@ class DoctorWindow(QWidget):
             QPushButton#mainButton:hover {
                 background-color: #019875;
             }
-            QPushButton#editButton {
-                background-color: #3498db;
-                color: white;
-            }
-            QPushButton#deleteButton {
-                background-color: #e74c3c;
-                color: white;
-            }
-            QTableWidget {
+            QTableView {
                 background-color: #2f3640;
                 alternate-background-color: #3b3f46;
                 gridline-color: #7f8c8d;
@@ -89,11 +89,14 @@ class DoctorWindow(QWidget):
         self.specialization_input = QLineEdit()
         self.email_input = QLineEdit()
         self.contact_input = QLineEdit()
+        self.hours_input = QLineEdit()
+        self.hours_input.setPlaceholderText(f"Default: {format_working_hours(DEFAULT_WORKING_HOURS)}")
 
         form_layout.addRow("Name:", self.name_input)
         form_layout.addRow("Specialization:", self.specialization_input)
         form_layout.addRow("Email:", self.email_input)
         form_layout.addRow("Contact:", self.contact_input)
+        form_layout.addRow("Working hours:", self.hours_input)
 
         layout.addLayout(form_layout)
 
@@ -108,56 +111,55 @@ class DoctorWindow(QWidget):
         layout.addLayout(btn_layout)
 
         # Table for displaying doctors
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(["ID", "Name", "Specialization", "Email", "Contact", "Actions"])
+        self.model = KeysetTableModel(
+            self.doctors.page,
+            ["ID", "Name", "Specialization", "Email", "Contact", "Actions"],
+            action_column=5
+        )
+        self.model.fetch_failed.connect(lambda error: show_server_error(self, error))
+        self.actions_delegate = ActionButtonDelegate([
+            ("edit", "Edit", "#3498db", "white"),
+            ("delete", "Delete", "#e74c3c", "white"),
+        ])
+        self.actions_delegate.clicked.connect(self.on_row_action)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(5, self.actions_delegate)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(36)
+        self.table.verticalHeader().hide()
         self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         layout.addSpacing(20)
         layout.addWidget(self.table)
 
         self.setLayout(layout)
 
-    def get_db_path(self):
-        return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'db', 'hospital.db'))
-
     def load_doctors(self):
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM doctors")
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.table.setRowCount(0)
+        self.model.reload()
 
-        for row_idx, row in enumerate(rows):
-            self.table.insertRow(row_idx)
-            for col_idx, col_val in enumerate(row[:5]):  # Only set columns 0 to 4
-                self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(col_val)))
-
-            # Action buttons
-            edit_btn = QPushButton("Edit")
-            edit_btn.setObjectName("editButton")
-            delete_btn = QPushButton("Delete")
-            delete_btn.setObjectName("deleteButton")
-
-            edit_btn.clicked.connect(lambda _, r=row: self.load_for_edit(r))
-            delete_btn.clicked.connect(lambda _, did=row[0]: self.delete_doctor(did))
-
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(5, 0, 5, 0)
-            action_layout.setSpacing(10)
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(delete_btn)
-
-            self.table.setCellWidget(row_idx, 5, action_widget)
-
-        self.table.resizeColumnsToContents()
-        self.table.resizeRowsToContents()
+    def refresh(self):
+        self.load_doctors()
 
+    @shows_server_errors
+    def on_data_changed(self, events):
+        doctor_events = [event for event in events if event.entity == DOCTOR]
+        if doctor_events:
+            self.model.apply_changes(doctor_events, self.doctors.get)
+
+    @shows_server_errors
+    def on_row_action(self, row_idx, action):
+        row = self.model.row_at(row_idx)
+        if action == "edit":
+            self.load_for_edit(row)
+        elif action == "delete":
+            self.delete_doctor(row.id)
+
+    @shows_server_errors
     def add_or_update_doctor(self):
         name = self.name_input.text()
         specialization = self.specialization_input.text()
@@ -168,29 +170,25 @@ class DoctorWindow(QWidget):
             QMessageBox.warning(self, "Error", "Name and specialization are required.")
             return
 
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
+        try:
+            hours = parse_working_hours(self.hours_input.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
 
+        # The doctor and its working hours are saved in one transaction
         if self.selected_doctor_id:
             # Update doctor
-            cursor.execute("""
-                UPDATE doctors
-                SET name=?, specialization=?, email=?, contact=?
-                WHERE id=?
-            """, (name, specialization, email, contact, self.selected_doctor_id))
+            doctor = self.doctors.update(self.selected_doctor_id, name, specialization, email, contact, hours)
             self.add_btn.setText("Add Doctor")
             self.selected_doctor_id = None
         else:
             # Add new doctor
-            cursor.execute("""
-                INSERT INTO doctors (name, specialization, email, contact)
-                VALUES (?, ?, ?, ?)
-            """, (name, specialization, email, contact))
+            doctor = self.doctors.add(name, specialization, email, contact, hours)
+        if doctor:
+            self.model.patch_saved(doctor)
 
-        conn.commit()
-        conn.close()
         self.clear_form()
-        self.load_doctors()
         QMessageBox.information(self, "Success", "Doctor saved successfully.")
 
     def delete_doctor(self, doctor_id):
@@ -200,12 +198,7 @@ class DoctorWindow(QWidget):
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            conn = sqlite3.connect(self.get_db_path())
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM doctors WHERE id=?", (doctor_id,))
-            conn.commit()
-            conn.close()
-            self.load_doctors()
+            self.doctors.delete(doctor_id)
 
     def load_for_edit(self, row):
         self.selected_doctor_id = row[0]
@@ -213,6 +206,7 @@ class DoctorWindow(QWidget):
         self.specialization_input.setText(row[2])
         self.email_input.setText(row[3])
         self.contact_input.setText(row[4])
+        self.hours_input.setText(format_working_hours(self.doctors.working_hours([row[0]]).get(row[0], [])))
         self.add_btn.setText("Update Doctor")
 
     def clear_form(self):
@@ -220,3 +214,4 @@ class DoctorWindow(QWidget):
         self.specialization_input.clear()
         self.email_input.clear()
         self.contact_input.clear()
+        self.hours_input.clear()
@@ -1,16 +1,16 @@
 # ui/login.py
 
-from ui.dashboard import DashboardWindow
-
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit,
     QPushButton, QVBoxLayout, QFormLayout, QMessageBox,
     QSpacerItem, QSizePolicy
 )
 from PyQt5.QtCore import Qt
-import sqlite3
 import sys
-import os
+
+from database.repository import UserRepository
+from services.api_client import open_repository
+from ui.server_errors import shows_server_errors
 
 
 class LoginWindow(QWidget):
@@ -96,20 +96,16 @@ class LoginWindow(QWidget):
             }
         """)
 
+    @shows_server_errors
     def check_login(self):
         username = self.username_input.text()
         password = self.password_input.text()
 
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        db_path = os.path.join(BASE_DIR, 'db', 'hospital.db')
-        conn = sqlite3.connect(db_path)
-
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE username=? AND password=?", (username, password))
-        result = cursor.fetchone()
-        conn.close()
+        result = open_repository(UserRepository).authenticate(username, password)
 
         if result:
+            # Imported here so the login box does not wait for the dashboard
+            from ui.dashboard import DashboardWindow
             self.dashboard = DashboardWindow()
             self.dashboard.show()
             self.close()
@@ -0,0 +1,133 @@
+# ui/patient_lookup.py
+import functools
+import sqlite3
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QStandardItem, QStandardItemModel
+from PyQt5.QtWidgets import QCompleter
+
+from database.repository import PatientRepository
+from services.api_client import ApiError, open_patient_search, open_repository
+
+
+DEBOUNCE_MS = 200
+SUGGEST_DELAY_MS = 50
+SUGGESTION_LIMIT = 10
+
+_pool = None
+
+
+def lookup_pool():
+    # A single reader thread is enough: debouncing keeps at most one query
+    # in flight per form, and its connection stays warm between lookups.
+    global _pool
+    if _pool is None:
+        _pool = QThreadPool()
+        _pool.setMaxThreadCount(1)
+    return _pool
+
+
+class _QueryTask(QRunnable):
+    def __init__(self, owner, generation, text):
+        super().__init__()
+        self.owner = owner
+        self.generation = generation
+        self.text = text
+
+    def run(self):
+        try:
+            result = self.owner.query(self.text)
+        except (sqlite3.Error, ApiError):
+            result = None
+        try:
+            self.owner.finished.emit(self.generation, result)
+        except RuntimeError:
+            # The form was closed while the query was running
+            pass
+
+
+class _DebouncedQuery(QObject):
+    # Debounces text input and runs query(text) off the GUI thread. Only the
+    # result for the latest text is ever delivered.
+    found = pyqtSignal(object)
+    cleared = pyqtSignal()
+    finished = pyqtSignal(int, object)
+
+    def __init__(self, query, delay_ms, parent=None):
+        super().__init__(parent)
+        self.query = query
+        self.generation = 0
+        self.pending_text = ""
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.start_query)
+        self.finished.connect(self.on_finished)
+
+    def request(self, text):
+        self.generation += 1
+        self.pending_text = text.strip()
+        if not self.pending_text:
+            self.timer.stop()
+            self.cleared.emit()
+            return
+        self.timer.start()
+
+    def start_query(self):
+        lookup_pool().start(_QueryTask(self, self.generation, self.pending_text))
+
+    def on_finished(self, generation, result):
+        if generation != self.generation:
+            return
+        self.found.emit(result)
+
+
+class PatientLookup(_DebouncedQuery):
+    # Resolves an id or full name to a single Patient (or None)
+    def __init__(self, delay_ms=DEBOUNCE_MS, repository=None, parent=None):
+        repository = repository or open_repository(PatientRepository)
+        super().__init__(repository.find, delay_ms, parent)
+        self.repository = repository
+
+
+class PatientSuggestions(_DebouncedQuery):
+    # Ranked partial-name suggestions for the completer popup
+    def __init__(self, delay_ms=SUGGEST_DELAY_MS, search=None, limit=SUGGESTION_LIMIT, parent=None):
+        search = search or open_patient_search()
+        super().__init__(functools.partial(search.suggest, limit=limit), delay_ms, parent)
+        self.search = search
+        self.limit = limit
+
+
+class PatientCompleter(QCompleter):
+    # Shows "Name (ID n, age)" in the popup and inserts the patient id, so
+    # picking a suggestion always resolves to exactly one patient.
+    ID_ROLE = Qt.UserRole + 1
+
+    def __init__(self, line_edit, search=None):
+        super().__init__(line_edit)
+        self.line_edit = line_edit
+        self.suggestion_model = QStandardItemModel(self)
+        self.setModel(self.suggestion_model)
+        self.setCompletionRole(self.ID_ROLE)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setWidget(line_edit)
+        self.activated[str].connect(self.line_edit.setText)
+
+        self.suggestions = PatientSuggestions(search=search, parent=self)
+        self.suggestions.found.connect(self.show_suggestions)
+        self.suggestions.cleared.connect(self.popup().hide)
+        # textEdited only fires for typing, not for the id inserted on pick
+        line_edit.textEdited.connect(self.suggestions.request)
+
+    def show_suggestions(self, patients):
+        self.suggestion_model.clear()
+        for patient in patients or []:
+            item = QStandardItem(f"{patient.name}  (ID {patient.id}, age {patient.age})")
+            item.setData(str(patient.id), self.ID_ROLE)
+            self.suggestion_model.appendRow(item)
+        if self.suggestion_model.rowCount() and self.line_edit.hasFocus():
+            self.complete()
+        else:
+            self.popup().hide()
@@ -1,11 +1,16 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QFormLayout, QLabel,
-    QLineEdit, QPushButton, QMessageBox, QTableWidget,
-    QTableWidgetItem, QHBoxLayout, QHeaderView
+    QLineEdit, QPushButton, QMessageBox, QTableView,
+    QHBoxLayout, QHeaderView
 )
 from PyQt5.QtCore import Qt
-import sqlite3
-import os
+
+from database.events import PATIENT
+from database.repository import PatientRepository
+from services.api_client import open_repository
+from ui.change_events import get_change_dispatcher
+from ui.server_errors import show_server_error, shows_server_errors
+from ui.table_models import KeysetTableModel, ActionButtonDelegate
 
 
 class PatientWindow(QWidget):
@@ -14,8 +19,10 @@ class PatientWindow(QWidget):
         self.setWindowTitle("Manage Patients")
         self.setGeometry(150, 150, 800, 600)
         self.selected_patient_id = None
+        self.patients = open_repository(PatientRepository)
         self.setup_ui()
         self.load_patients()
+        get_change_dispatcher().changed.connect(self.on_data_changed)
 
     def setup_ui(self):
         self.setStyleSheet("""
@@ -50,15 +57,7 @@ class PatientWindow(QWidget):
             QPushButton#mainButton:hover {
                 background-color: #019875;
             }
-            QPushButton#editButton {
-                background-color: #3498db;
-                color: white;
-            }
-            QPushButton#deleteButton {
-                background-color: #e74c3c;
-                color: white;
-            }
-            QTableWidget {
+            QTableView {
                 background-color: #2f3640;
                 alternate-background-color: #3b3f46;
                 gridline-color: #7f8c8d;
@@ -99,56 +98,57 @@ class PatientWindow(QWidget):
         btn_layout.addStretch()
         main_layout.addLayout(btn_layout)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(["ID", "Name", "Age", "Gender", "Contact", "Actions"])
+        self.model = KeysetTableModel(
+            self.patients.page,
+            ["ID", "Name", "Age", "Gender", "Contact", "Actions"],
+            action_column=5
+        )
+        self.model.fetch_failed.connect(lambda error: show_server_error(self, error))
+        self.actions_delegate = ActionButtonDelegate([
+            ("edit", "Edit", "#3498db", "white"),
+            ("delete", "Delete", "#e74c3c", "white"),
+        ])
+        self.actions_delegate.clicked.connect(self.on_row_action)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(5, self.actions_delegate)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(36)
+        self.table.verticalHeader().hide()
         self.table.setAlternatingRowColors(True)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
 
         main_layout.addSpacing(20)
         main_layout.addWidget(self.table)
 
         self.setLayout(main_layout)
 
-    def get_db_path(self):
-        return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'db', 'hospital.db'))
-
     def load_patients(self):
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM patients")
-        rows = cursor.fetchall()
-        conn.close()
-
-        self.table.setRowCount(0)
+        self.model.reload()
 
-        for row_idx, row in enumerate(rows):
-            self.table.insertRow(row_idx)
-            for col_idx, col_val in enumerate(row[:5]):
-                item = QTableWidgetItem(str(col_val))
-                item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                self.table.setItem(row_idx, col_idx, item)
-
-            edit_btn = QPushButton("Edit")
-            edit_btn.setObjectName("editButton")
-            edit_btn.clicked.connect(lambda _, r=row: self.load_for_edit(r))
-
-            delete_btn = QPushButton("Delete")
-            delete_btn.setObjectName("deleteButton")
-            delete_btn.clicked.connect(lambda _, pid=row[0]: self.delete_patient(pid))
-
-            action_layout = QHBoxLayout()
-            action_layout.setContentsMargins(0, 0, 0, 0)
-            action_layout.setSpacing(8)
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(delete_btn)
-
-            action_widget = QWidget()
-            action_widget.setLayout(action_layout)
-
-            self.table.setCellWidget(row_idx, 5, action_widget)
+    def refresh(self):
+        self.load_patients()
 
+    @shows_server_errors
+    def on_data_changed(self, events):
+        # Other windows' and workstations' saves; this window's own are
+        # patched in as they return
+        patient_events = [event for event in events if event.entity == PATIENT]
+        if patient_events:
+            self.model.apply_changes(patient_events, self.patients.get)
+
+    @shows_server_errors
+    def on_row_action(self, row_idx, action):
+        row = self.model.row_at(row_idx)
+        if action == "edit":
+            self.load_for_edit(row)
+        elif action == "delete":
+            self.delete_patient(row.id)
+
+    @shows_server_errors
     def add_or_update_patient(self):
         name = self.name_input.text().strip()
         age = self.age_input.text().strip()
@@ -159,27 +159,16 @@ class PatientWindow(QWidget):
             QMessageBox.warning(self, "Error", "Name and age are required.")
             return
 
-        conn = sqlite3.connect(self.get_db_path())
-        cursor = conn.cursor()
-
         if self.selected_patient_id:
-            cursor.execute("""
-                UPDATE patients
-                SET name=?, age=?, gender=?, contact=?
-                WHERE id=?
-            """, (name, age, gender, contact, self.selected_patient_id))
+            patient = self.patients.update(self.selected_patient_id, name, age, gender, contact)
             self.add_btn.setText("Add Patient")
             self.selected_patient_id = None
         else:
-            cursor.execute("""
-                INSERT INTO patients (name, age, gender, contact)
-                VALUES (?, ?, ?, ?)
-            """, (name, age, gender, contact))
+            patient = self.patients.add(name, age, gender, contact)
+        if patient:
+            self.model.patch_saved(patient)
 
-        conn.commit()
-        conn.close()
         self.clear_form()
-        self.load_patients()
         QMessageBox.information(self, "Success", "Patient saved successfully.")
 
     def delete_patient(self, patient_id):
@@ -189,12 +178,7 @@ class PatientWindow(QWidget):
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            conn = sqlite3.connect(self.get_db_path())
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM patients WHERE id=?", (patient_id,))
-            conn.commit()
-            conn.close()
-            self.load_patients()
+            self.patients.delete(patient_id)
 
     def load_for_edit(self, row):
         self.selected_patient_id = row[0]
@@ -0,0 +1,212 @@
+import datetime
+import time
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QPushButton, QDateEdit, QSizePolicy
+)
+from PyQt5.QtCore import Qt, QDate, QRectF
+from PyQt5.QtGui import QPainter, QColor
+
+from database.events import APPOINTMENT, BILL
+from database.reports import ReportRepository
+from ui.change_events import get_change_dispatcher
+
+DEFAULT_DAYS = 30
+MONTHS_SHOWN = 12
+TOP_ROWS = 10
+
+
+class BarChart(QWidget):
+    # Minimal bar chart painted directly: vertical bars for series over time,
+    # horizontal bars for ranked lists with long labels
+    def __init__(self, title, color, horizontal=False, value_format="{:,.0f}"):
+        super().__init__()
+        self.title = title
+        self.color = QColor(color)
+        self.horizontal = horizontal
+        self.value_format = value_format
+        self.labels = []
+        self.values = []
+        self.setMinimumSize(380, 240)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_data(self, labels, values):
+        self.labels = list(labels)
+        self.values = list(values)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor("#2f3640"))
+        painter.setPen(QColor("#f5f6fa"))
+        font = painter.font()
+        font.setBold(True)
+        painter.setFont(font)
+        painter.drawText(QRectF(8, 4, self.width() - 16, 20), Qt.AlignLeft | Qt.AlignVCenter, self.title)
+        font.setBold(False)
+        font.setPointSizeF(font.pointSizeF() * 0.85)
+        painter.setFont(font)
+
+        area = QRectF(8, 30, self.width() - 16, self.height() - 38)
+        if not self.values:
+            painter.drawText(area, Qt.AlignCenter, "No data for this period")
+            return
+        peak = max(self.values) or 1
+        if self.horizontal:
+            self.paint_horizontal(painter, area, peak)
+        else:
+            self.paint_vertical(painter, area, peak)
+
+    def paint_vertical(self, painter, area, peak):
+        label_height = 16
+        bars = QRectF(area.left(), area.top() + label_height, area.width(),
+                      area.height() - 2 * label_height)
+        slot = bars.width() / len(self.values)
+        # Labels are thinned out so they never overlap
+        label_every = max(1, int(60 // slot) + 1)
+        for i, (label, value) in enumerate(zip(self.labels, self.values)):
+            height = bars.height() * value / peak
+            rect = QRectF(bars.left() + i * slot + slot * 0.1, bars.bottom() - height, slot * 0.8, height)
+            painter.fillRect(rect, self.color)
+            if i % label_every == 0:
+                left = min(max(bars.left(), bars.left() + i * slot + slot / 2 - 30), bars.right() - 60)
+                painter.drawText(QRectF(left, bars.bottom() + 2, 60, label_height), Qt.AlignCenter, label)
+        painter.drawText(QRectF(area.left(), area.top(), area.width(), label_height),
+                         Qt.AlignRight | Qt.AlignVCenter, "max " + self.value_format.format(peak))
+
+    def paint_horizontal(self, painter, area, peak):
+        label_width = min(160, area.width() * 0.4)
+        value_width = 70
+        slot = area.height() / len(self.values)
+        bar_width = area.width() - label_width - value_width
+        for i, (label, value) in enumerate(zip(self.labels, self.values)):
+            top = area.top() + i * slot
+            painter.drawText(QRectF(area.left(), top, label_width - 6, slot),
+                             Qt.AlignRight | Qt.AlignVCenter, label)
+            width = bar_width * value / peak
+            painter.fillRect(QRectF(area.left() + label_width, top + slot * 0.15, width, slot * 0.7), self.color)
+            painter.drawText(QRectF(area.left() + label_width + width + 4, top, value_width, slot),
+                             Qt.AlignLeft | Qt.AlignVCenter, self.value_format.format(value))
+
+
+class ReportsWindow(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Reports")
+        self.setGeometry(150, 150, 1000, 700)
+        self.reports = ReportRepository()
+        self.setup_ui()
+        self.load_reports()
+        get_change_dispatcher().changed.connect(self.on_data_changed)
+
+    def setup_ui(self):
+        self.setStyleSheet("""
+            QWidget {
+                background-color: #1e272e;
+                color: #f5f6fa;
+                font-family: 'Segoe UI', sans-serif;
+            }
+            QLabel#title {
+                font-size: 20px;
+                font-weight: bold;
+            }
+            QDateEdit {
+                padding: 6px;
+                border: 1px solid #485460;
+                border-radius: 5px;
+                background-color: #2f3640;
+                color: #f5f6fa;
+            }
+            QPushButton {
+                padding: 8px 14px;
+                font-size: 14px;
+                font-weight: bold;
+                border: none;
+                border-radius: 5px;
+                background-color: #3498db;
+                color: white;
+            }
+        """)
+
+        layout = QVBoxLayout()
+        title = QLabel("📊 Reports")
+        title.setObjectName("title")
+        layout.addWidget(title, alignment=Qt.AlignCenter)
+
+        range_layout = QHBoxLayout()
+        today = QDate.currentDate()
+        self.from_input = QDateEdit(today.addDays(-(DEFAULT_DAYS - 1)))
+        self.to_input = QDateEdit(today)
+        for widget in (self.from_input, self.to_input):
+            widget.setCalendarPopup(True)
+            widget.setDisplayFormat("yyyy-MM-dd")
+            widget.dateChanged.connect(self.load_reports)
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.load_reports)
+        range_layout.addWidget(QLabel("From:"))
+        range_layout.addWidget(self.from_input)
+        range_layout.addWidget(QLabel("To:"))
+        range_layout.addWidget(self.to_input)
+        range_layout.addWidget(refresh_btn)
+        range_layout.addStretch()
+        self.totals_label = QLabel()
+        range_layout.addWidget(self.totals_label)
+        layout.addLayout(range_layout)
+
+        self.daily_chart = BarChart("Daily revenue (₹)", "#00b894")
+        self.monthly_chart = BarChart(f"Monthly revenue, last {MONTHS_SHOWN} months (₹)", "#0984e3")
+        self.doctor_chart = BarChart("Appointments per doctor", "#fdcb6e", horizontal=True)
+        self.patient_chart = BarChart(f"Top {TOP_ROWS} patients by revenue, all time (₹)", "#e17055",
+                                      horizontal=True)
+        grid = QGridLayout()
+        grid.addWidget(self.daily_chart, 0, 0)
+        grid.addWidget(self.monthly_chart, 0, 1)
+        grid.addWidget(self.doctor_chart, 1, 0)
+        grid.addWidget(self.patient_chart, 1, 1)
+        layout.addLayout(grid)
+
+        self.timing_label = QLabel()
+        self.timing_label.setStyleSheet("color: #7f8c8d; font-size: 12px;")
+        layout.addWidget(self.timing_label)
+        self.setLayout(layout)
+
+    def date_range(self):
+        # The "to" day is inclusive in the window and exclusive in queries
+        start = self.from_input.date().toPyDate()
+        end = self.to_input.date().toPyDate() + datetime.timedelta(days=1)
+        return start.isoformat(), end.isoformat()
+
+    def load_reports(self):
+        started = time.perf_counter()
+        start, end = self.date_range()
+        end_date = datetime.date.fromisoformat(end)
+        month_start = datetime.date(end_date.year, end_date.month, 1)
+        for _ in range(MONTHS_SHOWN - 1):
+            month_start = (month_start - datetime.timedelta(days=1)).replace(day=1)
+
+        daily = self.reports.daily_revenue(start, end)
+        monthly = self.reports.monthly_revenue(month_start.isoformat(), end)
+        doctors = self.reports.doctor_load(start, end)[:TOP_ROWS]
+        patients = self.reports.top_patients(TOP_ROWS)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.daily_chart.set_data([row.day[5:] for row in daily], [row.revenue for row in daily])
+        self.monthly_chart.set_data([row.month for row in monthly], [row.revenue for row in monthly])
+        self.doctor_chart.set_data([row.name or f"#{row.doctor_id}" for row in doctors],
+                                   [row.appointments for row in doctors])
+        self.patient_chart.set_data([row.name or f"#{row.patient_id}" for row in patients],
+                                    [row.revenue for row in patients])
+        bills = sum(row.bills for row in daily)
+        revenue = sum(row.revenue for row in daily)
+        self.totals_label.setText(f"{bills:,} bills, ₹{revenue:,.2f} in this period")
+        self.timing_label.setText(f"Summaries read in {elapsed_ms:.1f} ms")
+
+    def refresh(self):
+        self.load_reports()
+
+    def on_data_changed(self, events):
+        # The summaries are already current once a write commits; reading
+        # them again costs a few milliseconds, so only visible windows do it
+        if self.isVisible() and any(event.entity in (BILL, APPOINTMENT) for event in events):
+            self.load_reports()
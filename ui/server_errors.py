@@ -0,0 +1,32 @@
+# ui/server_errors.py
+#
+# In server mode any repository call can fail with ApiError: the server is
+# down, or it turned the request away. PyQt aborts the application when an
+# exception escapes a slot, so the windows wrap the slots that reach the
+# server in @shows_server_errors, which reports the failure in a message box
+# and leaves the window as it was.
+import functools
+import inspect
+
+from PyQt5.QtWidgets import QMessageBox
+
+from services.api_client import ApiError
+
+
+def show_server_error(parent, error):
+    QMessageBox.warning(parent, "Server Error", f"The server could not complete the request:\n{error}")
+
+
+def shows_server_errors(slot):
+    # Passes on only as many signal arguments as the slot takes, as PyQt does
+    # for a plain method (clicked also sends its checked flag)
+    parameters = list(inspect.signature(slot).parameters.values())[1:]
+    takes = None if any(p.kind == p.VAR_POSITIONAL for p in parameters) else len(parameters)
+
+    @functools.wraps(slot)
+    def wrapper(self, *args):
+        try:
+            return slot(self, *args[:takes])
+        except ApiError as error:
+            show_server_error(self, error)
+    return wrapper
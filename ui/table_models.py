@@ -0,0 +1,183 @@
+# ui/table_models.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QEvent, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtWidgets import QStyledItemDelegate
+
+from database.events import BULK, DELETE
+from services.api_client import ApiError
+
+# More changes than this in one batch reload the model instead
+MAX_ROW_PATCHES = 200
+
+
+class KeysetTableModel(QAbstractTableModel):
+    # Rows are pulled from the repository one page at a time, keyed on the
+    # last id seen, so the cost of opening or scrolling does not grow with
+    # the size of the table.
+    PAGE_SIZE = 200
+    # A page the server could not deliver; the window reports it
+    fetch_failed = pyqtSignal(object)
+
+    def __init__(self, fetch_page, headers, action_column=None, parent=None):
+        super().__init__(parent)
+        self.fetch_page = fetch_page
+        self.headers = headers
+        self.action_column = action_column
+        self.rows = []
+        self.exhausted = False
+        # id -> row this window saved and already patched in
+        self.saved = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.column() == self.action_column:
+            return None
+        if role == Qt.DisplayRole:
+            value = self.rows[index.row()][index.column()]
+            return "" if value is None else str(value)
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        after_id = self.rows[-1][0] if self.rows else 0
+        try:
+            page = self.fetch_page(after_id, self.PAGE_SIZE)
+        except ApiError as error:
+            # No more pages until the next reload, or every scroll would retry
+            self.exhausted = True
+            self.fetch_failed.emit(error)
+            return
+        if len(page) < self.PAGE_SIZE:
+            self.exhausted = True
+        if not page:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+
+    def reload(self):
+        self.beginResetModel()
+        self.rows = []
+        self.exhausted = False
+        self.saved = {}
+        self.endResetModel()
+        self.fetchMore()
+
+    def row_at(self, row):
+        return self.rows[row]
+
+    def position(self, row_id):
+        # Rows are kept in id order, so a binary search finds the slot
+        low, high = 0, len(self.rows)
+        while low < high:
+            mid = (low + high) // 2
+            if self.rows[mid][0] < row_id:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def upsert_row(self, row):
+        # Patches a single written row in place; selection and scroll
+        # position survive because the view only sees that row change
+        position = self.position(row[0])
+        if position < len(self.rows) and self.rows[position][0] == row[0]:
+            self.rows[position] = row
+            self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.headers) - 1))
+        elif position < len(self.rows) or self.exhausted:
+            # Past the last loaded id it will arrive with a later page
+            self.beginInsertRows(QModelIndex(), position, position)
+            self.rows.insert(position, row)
+            self.endInsertRows()
+
+    def patch_saved(self, row):
+        # For rows the window itself just wrote: the repository returned the
+        # stored row, so it is patched in now and the change event that
+        # follows for it is not read back from the database
+        self.upsert_row(row)
+        self.saved[row[0]] = row
+
+    def remove_row(self, row_id):
+        position = self.position(row_id)
+        if position < len(self.rows) and self.rows[position][0] == row_id:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self.rows[position]
+            self.endRemoveRows()
+
+    def apply_changes(self, events, fetch_row):
+        # Applies change-bus events for this model's entity; fetch_row(id)
+        # returns the current row, or None once it is gone
+        if len(events) > MAX_ROW_PATCHES or any(event.op == BULK for event in events):
+            self.reload()
+            return
+        for event in events:
+            if self.saved.pop(event.id, None) is not None and event.op != DELETE:
+                continue
+            row = None if event.op == DELETE else fetch_row(event.id)
+            if row is None:
+                self.remove_row(event.id)
+            else:
+                self.upsert_row(row)
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    # Paints the per-row action buttons instead of creating real widgets for
+    # every row, and reports clicks as (row, action name).
+    clicked = pyqtSignal(int, str)
+
+    SPACING = 8
+    MARGIN = 4
+
+    def __init__(self, actions, parent=None):
+        super().__init__(parent)
+        # actions: list of (name, label, background colour, text colour)
+        self.actions = actions
+
+    def button_rects(self, rect):
+        count = len(self.actions)
+        inner = rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        width = max(0, (inner.width() - self.SPACING * (count - 1)) // count)
+        return [
+            QRect(inner.left() + i * (width + self.SPACING), inner.top(), width, inner.height())
+            for i in range(count)
+        ]
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        font = painter.font()
+        font.setBold(True)
+        painter.setFont(font)
+        for rect, (_, label, background, foreground) in zip(self.button_rects(option.rect), self.actions):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(background))
+            painter.drawRoundedRect(rect, 5, 5)
+            painter.setPen(QColor(foreground))
+            painter.drawText(rect, Qt.AlignCenter, label)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            for rect, (name, *_rest) in zip(self.button_rects(option.rect), self.actions):
+                if rect.contains(event.pos()):
+                    self.clicked.emit(index.row(), name)
+                    return True
+        return super().editorEvent(event, model, option, index)